@@ -10,20 +10,68 @@ Each sheet contains:
  - Level 1..N dependencies (each as a semicolon-separated list)
 
 Usage:
-  python generate_file_sheets.py --root <workspace_root> --out <excel.xlsx> [--levels N]
+  python generate_file_sheets.py --root <workspace_root> --out <excel.xlsx> [--levels N] [--layout per-file|long]
+
+--layout long writes a normalized workbook instead (recommended for large workspaces):
+ - Files: FileID, ProjectRoot, FilePath, DeclaredSymbols
+ - FileDependencies: FilePath, Level, Dependency (one row per dependency)
+ - MethodCalls: FilePath, Method, Level, Target (one row per call-chain entry)
+ - EndpointLinks: FilePath, HttpMethod, Url, ApiProjectRoot, ApiFile, Action, Route (one row per UI -> API edge)
+It is written in openpyxl write-only mode, so rows stream out with constant memory.
+
+Next to the workbook a sidecar SQLite index (<excel>.index.sqlite, see --index) is written with the
+same per-file dependencies and method call-chains, so query_deps.py can answer lookups without
+opening the workbook.
+
+Angular HttpClient calls are linked to the ASP.NET controller actions they reach (attribute routes,
+matched through a route-template trie across all projects, see ../endpoint_links.py); the per-file
+sheets list them under "HTTP calls to API endpoints" and the index has an endpoint_links table.
+
+--watch keeps running after the outputs are written: changes below --root (inotify on Linux, polling
+elsewhere or with --poll) are applied to the in-memory project indexes file by file, only the rows
+that can change are recomputed, and the outputs are rewritten (see LiveProject).
+
+--metrics out.json records wall/CPU time, files/s and bytes read per phase (discover, index, adjacency,
+rows, endpoints, workbook, query_index), peak memory, the --metrics-slowest files of every indexing stage and the
+dependency / call-chain counts per level. --profile-phase <phase> also dumps cProfile stats for it.
+
+--from-ast <dir> takes the C# facts from the output of the Roslyn exporter (Program.cs) instead of
+scanning the .cs files; summary.json and the per-file entries are streamed one entry at a time (see
+../ast_export.py). TS files, and .cs files missing from the export, are still scanned.
+
+Byte-identical source files (same extension, size and sha1; generated clients, copied migrations,
+vendored helpers) are grouped during discovery and scanned once, across projects; the other copies
+share the first one's per-file entries (--no-dedup turns this off, see ../identical_files.py).
 
 Requires:
   pip install openpyxl
 """
 
 import argparse
+import json
+import mmap
 import os
 import re
+import sqlite3
+import sys
+import time
+from array import array
+from bisect import bisect_left
 from collections import defaultdict, deque
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Dict, List, Set
 from openpyxl import Workbook
 
+# ast_export.py, identical_files.py, phase_timer.py and source_watcher.py are shared with
+# generate_imports_from_source.py, one directory up (as is endpoint_links.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ast_export import AstExport, entry_path, entry_types  # noqa: E402
+from endpoint_links import extract_cs_routes, extract_ts_http_calls, link_endpoints  # noqa: E402
+from identical_files import IdenticalFiles  # noqa: E402
+from phase_timer import RunMetrics, stage_clock  # noqa: E402
+from source_watcher import SourceWatcher  # noqa: E402
+
 # Extensions and regex patterns (same as previous script)
 TS_EXTS = [".ts", ".tsx", ".js", ".jsx"]
 CS_EXTS = [".cs"]
@@ -31,6 +79,10 @@ CS_EXTS = [".cs"]
 IMPORT_FROM_RE = re.compile(r"import\s+(?:[\s\S]+?)\s+from\s+['\"](?P<spec>[^'\"]+)['\"]", re.MULTILINE)
 IMPORT_SIMPLE_RE = re.compile(r"import\s+['\"](?P<spec>[^'\"]+)['\"]", re.MULTILINE)
 REQUIRE_RE = re.compile(r"require\(['\"](?P<spec>[^'\"]+)['\"]\)")
+# re-exports (barrel files): export * from './x'; export { A, B as C } from './y'
+EXPORT_FROM_RE = re.compile(r"export\s+(?:\*(?:\s+as\s+[A-Za-z_$][\w$]*)?|\{[^}]*\})\s*from\s+['\"](?P<spec>[^'\"]+)['\"]")
+# tsconfig.json is JSON with comments and trailing commas: strings are kept, comments / trailing commas dropped
+JSONC_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\])*"|//[^\n]*|/\*[\s\S]*?\*/|,(?=\s*[}\]])')
 EXPORT_RE = re.compile(r"export\s+(?:default\s+)?(?:class|function|const|let|var|interface|type)\s+(?P<name>[A-Za-z_][A-Za-z0-9_]*)")
 EXPORT_NAMED_RE = re.compile(r"export\s*\{\s*([^\}]+)\s*\}")
 MODULE_EXPORTS_RE = re.compile(r"module\.exports\s*=\s*(?P<name>[A-Za-z_][A-Za-z0-9_]*)")
@@ -38,66 +90,235 @@ USING_RE = re.compile(r"using\s+(?P<ns>[A-Za-z0-9_.]+)\s*;")
 NAMESPACE_RE = re.compile(r"namespace\s+(?P<ns>[A-Za-z0-9_.]+)")
 CS_TYPE_DECL_RE = re.compile(r"\b(class|struct|interface|enum)\s+(?P<name>[A-Za-z_][A-Za-z0-9_]*)")
 IDENTIFIER_RE = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\b")
-CS_METHOD_DECL_RE = re.compile(r"\b(?:public|private|protected|internal)?\s*(?:static\s+)?(?:async\s+)?[\w<>\[\],\s]+\s+(?P<name>[A-Za-z_][A-Za-z0-9_]*)\s*\(")
+# method declarations: "<modifiers / type ...> Name(" where everything before the name lies in one run of
+# CS_DECL_RUN_RE characters (see iter_cs_method_names; the former single regex backtracked over long runs)
+CS_DECL_RUN_RE = re.compile(r"[\w<>\[\],\s]+")
+WORD_CHAR_RE = re.compile(r"\w")
+ASCII_IDENT_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_")
+GENERIC_ARGS_RE = re.compile(r"<[^<>]*>")
 INVOKE_RE = re.compile(r"([A-Za-z_][A-Za-z0-9_\.\>]*)\s*\(")
+# start of a C# comment, char literal or (verbatim / interpolated / raw) string literal
+CS_LEX_START_RE = re.compile(r"//|/\*|'|(?:\$+@?|@\$*)?\"")
+CS_CHAR_LITERAL_RE = re.compile(r"'(?:\\.|[^'\\\n])*'")
+CS_BRACE_RE = re.compile(r"[{}]")
+# replaces comment / literal content in the masked text; not matched by \w or \s, so it also
+# acts as a barrier for CS_DECL_RUN_RE
+CS_MASK_CHAR = "\0"
+
+
+# directory names that are never descended into
+IGNORED_DIRS = {"node_modules", "obj", "bin", ".git", "packages", "dist", "build", "target"}
 
 
-def find_projects(root: Path):
-    projects = set()
-    IGNORED_DIRS = {"node_modules", "obj", "bin", ".git", "packages", "dist", "build", "target"}
+def _is_project_marker(name: str) -> bool:
+    return name == "package.json" or name.endswith(".csproj") or name.endswith(".sln")
 
-    def ignored(p: Path):
-        return any(part in IGNORED_DIRS for part in p.parts)
 
-    for p in root.rglob("package.json"):
-        if not ignored(p):
-            projects.add(p.parent.resolve())
-    for p in root.rglob("*.csproj"):
-        if not ignored(p):
-            projects.add(p.parent.resolve())
-    for p in root.rglob("*.sln"):
-        if not ignored(p):
-            projects.add(p.parent.resolve())
+def scan_workspace(root: Path):
+    """Walk root once with os.scandir, skipping IGNORED_DIRS before descending into them.
+
+    Project markers (package.json, *.csproj, *.sln) and TS/C# source files are collected in the same
+    pass. Returns {"root", "projects", "files", "spans"}: the marker directories, the source files per
+    extension in walk order (directory by directory, depth first) and, for root and every project
+    directory, the (start, end) slice of each extension list that lies below it.
+    """
+    root = root.resolve()
+    files = {ext: [] for ext in TS_EXTS + CS_EXTS}
+    projects = []
+    spans = {}
+    stack = [(root, None)]
+    while stack:
+        d, start = stack.pop()
+        if start is not None:
+            # leaving d: everything collected since entering it lies below it
+            spans[d] = {ext: (start[ext], len(lst)) for ext, lst in files.items()}
+            continue
+        try:
+            with os.scandir(d) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        start = {ext: len(lst) for ext, lst in files.items()}
+        is_project = False
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            if _is_project_marker(name):
+                is_project = True
+            try:
+                if entry.is_dir() and not entry.is_symlink():
+                    if name not in IGNORED_DIRS:
+                        subdirs.append(d / name)
+                    continue
+                dot = name.rfind(".")
+                lst = files.get(name[dot:]) if dot != -1 else None
+                if lst is not None and entry.is_file():
+                    lst.append(d / name)
+            except OSError:
+                continue
+        if is_project:
+            projects.append(d)
+        if is_project or d == root:
+            stack.append((d, start))
+        stack.extend((sd, None) for sd in reversed(subdirs))
+    return {"root": root, "projects": projects, "files": files, "spans": spans}
+
+
+def find_projects(root: Path, scan=None):
+    scan = scan or scan_workspace(root)
+    projects = set(scan["projects"])
     if not projects:
-        projects.add(root.resolve())
+        projects.add(scan["root"])
     return sorted(projects)
 
 
-def list_source_files(project_root: Path):
+def list_source_files(project_root: Path, scan=None):
+    """Source files below project_root, grouped by extension (TS_EXTS + CS_EXTS order), taken from
+    scan when it covers project_root and from a fresh walk otherwise."""
+    span = scan["spans"].get(project_root) if scan else None
+    if span is None:
+        scan = scan_workspace(project_root)
+        span = scan["spans"][scan["root"]]
     files = []
-    IGNORED_DIRS = {"node_modules", "obj", "bin", ".git", "packages", "dist", "build", "target"}
-
-    def ignored(p: Path):
-        return any(part in IGNORED_DIRS for part in p.parts)
-
     for ext in TS_EXTS + CS_EXTS:
-        for f in project_root.rglob(f"*{ext}"):
-            if not ignored(f):
-                files.append(f)
-    return [p for p in files if p.is_file()]
+        lo, hi = span[ext]
+        files.extend(scan["files"][ext][lo:hi])
+    return files
 
 
 def read_text(path: Path) -> str:
+    """Decode a file straight from a read-only memory map (no intermediate bytes copy); callers keep
+    only what they extract from the text."""
     try:
-        return path.read_text(encoding="utf-8", errors="ignore")
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                text = str(mm, "utf-8", "ignore")
     except Exception:
         return ""
+    # universal newlines, as read_text() would do
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
 
+def load_jsonc(path: Path):
+    """Parse a JSON-with-comments file such as tsconfig.json; None when missing or invalid."""
+    try:
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        return json.loads(JSONC_TOKEN_RE.sub(lambda m: m.group(0) if m.group(0)[0] == '"' else "", text))
+    except (OSError, ValueError):
+        return None
+
+
+def load_tsconfig_paths(project_root: Path):
+    """Return (base_url, [(pattern, [absolute substitution, ...]), ...]) from project_root/tsconfig.json,
+    following relative "extends" chains (nearer files win). base_url is None when not configured."""
+    base_url = None
+    paths = None
+    paths_base = None
+    cfg_path = project_root / "tsconfig.json"
+    seen = set()
+    while cfg_path is not None and cfg_path not in seen and cfg_path.is_file():
+        seen.add(cfg_path)
+        cfg = load_jsonc(cfg_path)
+        if not isinstance(cfg, dict):
+            break
+        opts = cfg.get("compilerOptions") or {}
+        if base_url is None and isinstance(opts.get("baseUrl"), str):
+            base_url = os.path.normpath(os.path.join(str(cfg_path.parent), opts["baseUrl"]))
+        if paths is None and isinstance(opts.get("paths"), dict):
+            paths = opts["paths"]
+            paths_base = str(cfg_path.parent)
+        ext = cfg.get("extends")
+        if isinstance(ext, str) and ext.startswith("."):
+            if not ext.endswith(".json"):
+                ext += ".json"
+            cfg_path = (cfg_path.parent / ext).resolve()
+        else:
+            cfg_path = None
+    aliases = []
+    for pattern, targets in (paths or {}).items():
+        if isinstance(targets, str):
+            targets = [targets]
+        # paths are relative to baseUrl, or to the tsconfig that declares them when there is none
+        anchor = base_url or paths_base
+        aliases.append((pattern, [os.path.normpath(os.path.join(anchor, t)) for t in targets if isinstance(t, str)]))
+    return base_url, aliases
+
+
+class TsModuleResolver:
+    """Resolves TS/JS import specifiers of one project against its discovered files.
+
+    A specifier resolves to every existing candidate among: the path itself, <path><ext> and
+    <path>/index<ext> (barrel files) for each of TS_EXTS. Relative specifiers are taken from the
+    importer's directory; other specifiers go through tsconfig.json compilerOptions.paths (longest
+    matching prefix, first substitution that resolves) and then baseUrl; bare package imports that
+    neither covers stay unresolved. Candidates are looked up in the in-memory file set, and only
+    paths that discovery cannot see (outside the project, inside IGNORED_DIRS, non-source suffix) are
+    checked on disk. Results are project-relative paths, memoized per (importer directory, specifier).
+    """
+
+    def __init__(self, project_root: Path, files: List[Path]):
+        self.root = str(project_root)
+        self.prefix = os.path.join(self.root, "")
+        self.files = {str(f) for f in files}
+        self.memo: Dict[tuple, tuple] = {}
+        self._tsconfig = None
+
+    def _exists(self, path: str, as_file: bool = False) -> bool:
+        if path in self.files:
+            return True
+        if path.startswith(self.prefix) and os.path.splitext(path)[1] in TS_EXTS + CS_EXTS:
+            if not any(part in IGNORED_DIRS for part in path[len(self.prefix):].split(os.sep)[:-1]):
+                # discovery would have listed it
+                return False
+        return os.path.isfile(path) if as_file else os.path.exists(path)
+
+    def _candidates(self, base: str) -> List[str]:
+        found = [base] if self._exists(base, as_file=True) else []
+        found += [base + ext for ext in TS_EXTS if self._exists(base + ext)]
+        found += [os.path.join(base, "index" + ext) for ext in TS_EXTS if self._exists(os.path.join(base, "index" + ext))]
+        return found
 
-def resolve_ts_import(project_root: Path, importer: Path, spec: str):
-    if not spec.startswith("."):
+    def _aliased(self, spec: str) -> List[str]:
+        if self._tsconfig is None:
+            self._tsconfig = load_tsconfig_paths(Path(self.root))
+        base_url, aliases = self._tsconfig
+        best = None
+        for pattern, targets in aliases:
+            if "*" in pattern:
+                head, _, tail = pattern.partition("*")
+                if spec.startswith(head) and spec.endswith(tail) and len(spec) >= len(head) + len(tail):
+                    star = spec[len(head):len(spec) - len(tail)]
+                    if best is None or len(head) > best[0]:
+                        best = (len(head), [t.replace("*", star) for t in targets])
+            elif pattern == spec:
+                # an exact pattern beats any wildcard
+                best = (len(spec) + 1, targets)
+                break
+        if best is not None:
+            for target in best[1]:
+                found = self._candidates(target)
+                if found:
+                    return found
+        if base_url is not None:
+            return self._candidates(os.path.normpath(os.path.join(base_url, spec)))
         return []
-    base = (importer.parent / spec).resolve()
-    candidates = []
-    for ext in TS_EXTS:
-        p = Path(str(base) + ext)
-        candidates.append(p)
-    for ext in TS_EXTS:
-        p = base / ("index" + ext)
-        candidates.append(p)
-    if base.exists() and base.is_file():
-        candidates.insert(0, base)
-    return [p for p in candidates if p.exists()]
+
+    def resolve(self, importer: Path, spec: str) -> tuple:
+        """Project-relative paths (absolute when outside the project) that spec imports from importer."""
+        importer_dir = str(importer.parent)
+        key = (importer_dir, spec) if spec.startswith(".") else ("", spec)
+        hit = self.memo.get(key)
+        if hit is None:
+            if spec.startswith("."):
+                found = self._candidates(os.path.normpath(os.path.join(importer_dir, spec)))
+            else:
+                found = self._aliased(spec)
+            hit = self.memo[key] = tuple(f[len(self.prefix):] if f.startswith(self.prefix) else f for f in found)
+        return hit
 
 
 def extract_ts_declarations_and_imports(path: Path, text: str):
@@ -119,6 +340,8 @@ def extract_ts_declarations_and_imports(path: Path, text: str):
         imports.append(m.group("spec"))
     for m in REQUIRE_RE.finditer(text):
         imports.append(m.group("spec"))
+    for m in EXPORT_FROM_RE.finditer(text):
+        imports.append(m.group("spec"))
     return declared, imports
 
 
@@ -136,69 +359,295 @@ def extract_cs_declarations_and_usings(path: Path, text: str):
     return declared_types, declared_namespaces, usings, identifiers
 
 
-def build_indexes(files: List[Path], project_root: Path):
-    ts_exports = {}
-    ts_imports = {}
-    cs_types = {}
-    cs_namespaces = {}
-    cs_usings = {}
-    cs_identifiers = {}
-    file_texts = {}
+class SymbolTable:
+    """Interns identifier strings to dense integer ids.
+
+    Per-file identifier references (and the names invoked by each C# method) are kept as sorted
+    array('I') buffers of ids instead of sets of strings, and symbol_decl_map is keyed by id, so the
+    identifier->declaration joins run on ints.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def intern(self, name: str) -> int:
+        sid = self.ids.get(name)
+        if sid is None:
+            sid = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return sid
+
+    def intern_all(self, names) -> array:
+        """Sorted, de-duplicated ids of names as a compact array('I')."""
+        return array("I", sorted({self.intern(n) for n in names}))
+
+
+# shared by every project of a run, so each identifier string is stored once
+SYMBOLS = SymbolTable()
 
+
+def _cs_string_end(text: str, start: int) -> int:
+    """End offset (exclusive) of the C# string literal starting at start, including its $/@ prefix.
+    Handles regular, verbatim (@""), interpolated ($"" with nested holes) and raw (\"\"\") strings."""
+    n = len(text)
+    q = start
+    while q < n and text[q] in "$@":
+        q += 1
+    prefix = text[start:q]
+    quotes = 0
+    while q + quotes < n and text[q + quotes] == '"':
+        quotes += 1
+    if quotes >= 3:
+        close = text.find('"' * quotes, q + quotes)
+        return n if close == -1 else close + quotes
+    verbatim = "@" in prefix
+    interpolated = "$" in prefix
+    i = q + 1
+    while i < n:
+        c = text[i]
+        if c == '\\' and not verbatim:
+            i += 2
+        elif c == '"':
+            if verbatim and i + 1 < n and text[i + 1] == '"':
+                i += 2
+            else:
+                return i + 1
+        elif c == '\n' and not verbatim:
+            # unterminated regular string: stop at the end of the line
+            return i
+        elif c == '{' and interpolated:
+            if i + 1 < n and text[i + 1] == '{':
+                i += 2
+            else:
+                i = _cs_hole_end(text, i + 1)
+        else:
+            i += 1
+    return n
+
+
+def _cs_hole_end(text: str, i: int) -> int:
+    """End offset of an interpolation hole whose content starts at i (just after its '{')."""
+    n = len(text)
+    depth = 1
+    while i < n:
+        c = text[i]
+        if c == '{':
+            depth += 1
+            i += 1
+        elif c == '}':
+            depth -= 1
+            i += 1
+            if depth == 0:
+                return i
+        elif c == '"' or (c in "$@" and i + 1 < n and text[i + 1] in '"$@'):
+            i = _cs_string_end(text, i)
+        elif c == "'":
+            m = CS_CHAR_LITERAL_RE.match(text, i)
+            i = m.end() if m else i + 1
+        else:
+            i += 1
+    return n
+
+
+def mask_cs_non_code(text: str) -> str:
+    """Return text with the content of comments, strings, verbatim/interpolated strings and char
+    literals replaced by CS_MASK_CHAR. The result has the same length, so offsets map 1:1 to text.
+    Single linear pass: the regex jumps between literal/comment starts."""
+    out = []
+    last = 0
+    n = len(text)
+    m = CS_LEX_START_RE.search(text)
+    while m:
+        start = m.start()
+        tok = m.group()
+        if tok == "//":
+            end = text.find("\n", start)
+            end = n if end == -1 else end
+        elif tok == "/*":
+            end = text.find("*/", start + 2)
+            end = n if end == -1 else end + 2
+        elif tok == "'":
+            lit = CS_CHAR_LITERAL_RE.match(text, start)
+            end = lit.end() if lit else start + 1
+        else:
+            end = _cs_string_end(text, start)
+        out.append(text[last:start])
+        out.append(CS_MASK_CHAR * (end - start))
+        last = end
+        m = CS_LEX_START_RE.search(text, end)
+    out.append(text[last:])
+    return "".join(out)
+
+
+def iter_cs_method_names(masked: str):
+    """Yield (name, index of its '(') for every method declaration in masked text, in source order.
+
+    A declaration is a maximal run of CS_DECL_RUN_RE characters directly followed by '(' whose tail
+    is whitespace, an identifier (the name) and optional whitespace, with at least two characters
+    between the run's first word character and the name. These are exactly the matches of the former
+    single regex (optional modifiers, a [\\w<>\\[\\],\\s]+ run, whitespace, name, '('), which backtracked
+    quadratically over long identifier/comma runs such as big enums or initializers. Runs do not
+    overlap and each is inspected once from its ends, so this scan is linear.
+    """
+    n = len(masked)
+    for m in CS_DECL_RUN_RE.finditer(masked):
+        paren = m.end()
+        if paren >= n or masked[paren] != "(":
+            continue
+        start = m.start()
+        name_end = paren
+        while name_end > start and masked[name_end - 1].isspace():
+            name_end -= 1
+        name_start = name_end
+        while name_start > start and masked[name_start - 1] in ASCII_IDENT_CHARS:
+            name_start -= 1
+        if (name_start == name_end or masked[name_start].isdigit()
+                or name_start == start or not masked[name_start - 1].isspace()):
+            continue
+        first_word = WORD_CHAR_RE.search(masked, start, name_start)
+        if first_word is None or first_word.start() > name_start - 2:
+            continue
+        yield masked[name_start:name_end], paren
+
+
+def extract_cs_method_bodies(text: str) -> Dict[str, str]:
+    """Map method name -> body for the C# methods declared in text (simple heuristic).
+
+    One linear sweep masks comments/literals and pairs every code brace with a stack; each
+    declaration found by iter_cs_method_names then takes the first code '{' after it (bisect) and its
+    precomputed partner, so braces inside strings, chars and comments are never counted and no text is
+    rescanned.
+    """
+    masked = mask_cs_non_code(text)
+    opens = []
+    close_of = {}
+    stack = []
+    for b in CS_BRACE_RE.finditer(masked):
+        if b.group() == "{":
+            opens.append(b.start())
+            stack.append(b.start())
+        elif stack:
+            close_of[stack.pop()] = b.start()
+    methods = {}
+    for name, paren in iter_cs_method_names(masked):
+        # find the opening brace after the declaration
+        k = bisect_left(opens, paren + 1)
+        if k == len(opens):
+            continue
+        idx = opens[k]
+        end = close_of.get(idx)
+        methods[name] = text[idx + 1:end] if end is not None else ""
+    return methods
+
+
+# build_indexes entries that hold one value per file
+PER_FILE_INDEXES = ("ts_exports", "ts_imports", "ts_identifiers", "ts_http_calls", "cs_types", "cs_namespaces",
+                    "cs_usings", "cs_identifiers", "cs_methods", "cs_routes")
+
+
+def index_file(f: Path, symbols: SymbolTable, stage_times: Dict[str, float] = None, ast_facts: Dict[str, Dict] = None):
+    """Read one source file and return its PER_FILE_INDEXES entries ({} for other extensions).
+    When stage_times is a dict, the seconds spent in each stage are added to it (--metrics).
+    C# files found in ast_facts (--from-ast, see load_ast_facts) are only read for their routes."""
+    lap = stage_clock(stage_times)
+    if ast_facts is not None and f.suffix in CS_EXTS:
+        entries = ast_facts.get(str(f))
+        if entries is not None:
+            if "cs_routes" in entries and entries["cs_routes"] is None:
+                # a controller: the exporter keeps attribute names only, so the routes come from the source
+                entries = {key: value for key, value in entries.items() if key != "cs_routes"}
+                routes = extract_cs_routes(read_text(f))
+                if routes:
+                    entries["cs_routes"] = routes
+                lap("routes")
+            return entries
+    text = read_text(f)
+    lap("read")
+    if f.suffix in TS_EXTS:
+        decls, imports = extract_ts_declarations_and_imports(f, text)
+        lap("ts_declarations_imports")
+        identifiers = symbols.intern_all(IDENTIFIER_RE.findall(text))
+        lap("identifiers")
+        entries = {
+            "ts_exports": decls,
+            "ts_imports": imports,
+            "ts_identifiers": identifiers,
+        }
+        http_calls = extract_ts_http_calls(text)
+        if http_calls:
+            entries["ts_http_calls"] = http_calls
+        lap("http_calls")
+        return entries
+    if f.suffix in CS_EXTS:
+        types, namespaces, usings, identifiers = extract_cs_declarations_and_usings(f, text)
+        identifiers = symbols.intern_all(identifiers)
+        lap("cs_declarations_usings")
+        # Extract method declarations and the names invoked in their bodies (simple heuristic);
+        # the bodies themselves are not kept
+        methods = {mname: symbols.intern_all(invoked_method_names(body))
+                   for mname, body in extract_cs_method_bodies(text).items()}
+        lap("method_bodies")
+        entries = {
+            "cs_types": types,
+            "cs_namespaces": namespaces,
+            "cs_usings": usings,
+            "cs_identifiers": identifiers,
+            "cs_methods": methods,
+        }
+        routes = extract_cs_routes(text)
+        if routes:
+            entries["cs_routes"] = routes
+        lap("routes")
+        return entries
+    return {}
+
+
+def build_indexes(files: List[Path], project_root: Path, symbols: SymbolTable = None, metrics: RunMetrics = None,
+                  ast_facts: Dict[str, Dict] = None, identical: IdenticalFiles = None):
+    """Per-file entries (index_file) and the declaration maps of one project. With identical (grouped
+    during discovery, possibly across projects), a file with an identical copy indexed before takes that
+    copy's entries instead of being read (entries are only ever replaced, never modified in place)."""
+    symbols = symbols or SYMBOLS
+    per_file = {key: {} for key in PER_FILE_INDEXES}
     for f in files:
-        rel = f.relative_to(project_root)
-        text = read_text(f)
-        file_texts[str(rel)] = text
-        if f.suffix in TS_EXTS:
-            decls, imports = extract_ts_declarations_and_imports(f, text)
-            ts_exports[str(rel)] = decls
-            ts_imports[str(rel)] = imports
-        elif f.suffix in CS_EXTS:
-            types, namespaces, usings, identifiers = extract_cs_declarations_and_usings(f, text)
-            cs_types[str(rel)] = types
-            cs_namespaces[str(rel)] = namespaces
-            cs_usings[str(rel)] = usings
-            cs_identifiers[str(rel)] = identifiers
-            # Extract method declarations and bodies (simple heuristic)
-            methods = {}
-            for m in CS_METHOD_DECL_RE.finditer(text):
-                name = m.group('name')
-                # find the opening brace after the match
-                idx = text.find('{', m.end())
-                if idx == -1:
-                    continue
-                # find matching closing brace
-                depth = 0
-                end = idx
-                for i in range(idx, len(text)):
-                    if text[i] == '{':
-                        depth += 1
-                    elif text[i] == '}':
-                        depth -= 1
-                        if depth == 0:
-                            end = i
-                            break
-                body = text[idx+1:end] if end > idx else ''
-                methods[name] = body
-            cs_methods = locals().get('cs_methods', {})
-            cs_methods[str(rel)] = methods
+        rel = str(f.relative_to(project_root))
+        entries = identical.shared(f) if identical is not None else None
+        if entries is not None:
+            for key, value in entries.items():
+                per_file[key][rel] = value
+            continue
+        stage_times = {} if metrics is not None else None
+        entries = index_file(f, symbols, stage_times, ast_facts)
+        if identical is not None:
+            identical.keep(f, entries)
+        for key, value in entries.items():
+            per_file[key][rel] = value
+        if metrics is not None:
+            try:
+                size = f.stat().st_size
+            except OSError:
+                size = 0
+            metrics.record_file(f, stage_times, size)
+    ts_exports = per_file["ts_exports"]
+    cs_types = per_file["cs_types"]
+    cs_namespaces = per_file["cs_namespaces"]
+    cs_methods = per_file["cs_methods"]
 
+    # symbol id -> declaring files
     symbol_decl_map = defaultdict(set)
     for f, syms in ts_exports.items():
         for s in syms:
-            symbol_decl_map[s].add(f)
+            symbol_decl_map[symbols.intern(s)].add(f)
     for f, syms in cs_types.items():
         for s in syms:
-            symbol_decl_map[s].add(f)
+            symbol_decl_map[symbols.intern(s)].add(f)
 
     # method -> files map (for C# methods)
     method_decl_map = defaultdict(set)
-    try:
-        for f, methods in cs_methods.items():
-            for mname in methods.keys():
-                method_decl_map[mname].add(f)
-    except NameError:
-        cs_methods = {}
+    for f, methods in cs_methods.items():
+        for mname in methods.keys():
+            method_decl_map[mname].add(f)
 
     namespace_decl_map = defaultdict(set)
     for f, nss in cs_namespaces.items():
@@ -206,181 +655,459 @@ def build_indexes(files: List[Path], project_root: Path):
             namespace_decl_map[ns].add(f)
 
     return {
-        "ts_exports": ts_exports,
-        "ts_imports": ts_imports,
-        "cs_types": cs_types,
-        "cs_namespaces": cs_namespaces,
-        "cs_usings": cs_usings,
-        "cs_identifiers": cs_identifiers,
-        "cs_methods": cs_methods,
+        **per_file,
+        "symbols": symbols,
         "symbol_decl_map": dict(symbol_decl_map),
+        # ids with at least one declaration; intersecting a file's id array with it keeps the join loop
+        # down to the identifiers that can actually resolve
+        "declared_symbols": frozenset(symbol_decl_map),
         "namespace_decl_map": dict(namespace_decl_map),
         "method_decl_map": dict(method_decl_map),
-        "file_texts": file_texts,
+        "ts_resolver": TsModuleResolver(project_root, files),
     }
 
 
+def _direct_dependencies(f: str, fpath: Path, project_root: Path, idxs):
+    """Direct file dependencies of f: TS imports resolved by idxs["ts_resolver"], or C# using->namespace and
+    identifier->declared symbol joins."""
+    direct = set()
+    if fpath.suffix in TS_EXTS:
+        resolver = idxs["ts_resolver"]
+        for spec in idxs["ts_imports"].get(f, []):
+            direct.update(resolver.resolve(fpath, spec))
+    if fpath.suffix in CS_EXTS:
+        usings = idxs["cs_usings"].get(f, [])
+        for ns in usings:
+            for ff in idxs["namespace_decl_map"].get(ns, []):
+                if ff != f:
+                    direct.add(ff)
+        symbol_decl_map = idxs["symbol_decl_map"]
+        for sid in idxs["declared_symbols"].intersection(idxs["cs_identifiers"].get(f, ())):
+            for ff in symbol_decl_map[sid]:
+                if ff != f:
+                    direct.add(ff)
+    return direct
+
+
+def dependency_adjacency(f: str, project_root: Path, idxs):
+    """Direct dependencies of f, computed once per project and memoized in idxs["dep_adjacency"]."""
+    memo = idxs.setdefault("dep_adjacency", {})
+    direct = memo.get(f)
+    if direct is None:
+        fpath = project_root / f
+        direct = _direct_dependencies(f, fpath, project_root, idxs) if fpath.exists() else set()
+        memo[f] = direct
+    return direct
+
+
+def build_dependency_adjacency(files: List[Path], project_root: Path, idxs):
+    """Fill the per-project adjacency memo for every listed file up front."""
+    for p in files:
+        dependency_adjacency(str(p.relative_to(project_root)), project_root, idxs)
+    return idxs["dep_adjacency"]
+
+
+def ts_identifier_dependencies(relpath: str, idxs):
+    """Files declaring a symbol that the TS file relpath mentions (joined over its interned identifiers)."""
+    found = set()
+    symbol_decl_map = idxs["symbol_decl_map"]
+    for sid in idxs["declared_symbols"].intersection(idxs["ts_identifiers"].get(relpath, ())):
+        for f in symbol_decl_map[sid]:
+            if f != relpath:
+                found.add(f)
+    return found
+
+
 def compute_dependencies_for_file(relpath: str, path: Path, project_root: Path, idxs, max_levels: int):
-    deps_levels = [set() for _ in range(max_levels + 1)]
-    visited = set()
+    """Return deps_levels (index 1..max_levels) for one file.
 
-    if path.suffix in TS_EXTS:
-        imports = idxs["ts_imports"].get(relpath, [])
-        for spec in imports:
-            resolved = resolve_ts_import(project_root, path, spec)
-            if resolved:
-                for r in resolved:
-                    try:
-                        deps_levels[1].add(str(Path(r).resolve().relative_to(project_root.resolve())))
-                    except Exception:
-                        deps_levels[1].add(str(Path(r).resolve()))
-
-    if path.suffix in CS_EXTS:
-        usings = idxs["cs_usings"].get(relpath, [])
-        for ns in usings:
-            for f in idxs["namespace_decl_map"].get(ns, []):
-                if f != relpath:
-                    deps_levels[1].add(f)
-        identifiers = idxs["cs_identifiers"].get(relpath, set())
-        for ident in identifiers:
-            for f in idxs["symbol_decl_map"].get(ident, []):
-                if f != relpath:
-                    deps_levels[1].add(f)
+    Level 1 is the file's direct adjacency (plus, for TS files, the identifier->symbol join over its
+    interned identifiers); levels 2..N come from a BFS over the shared adjacency, where a file is only added at the
+    first level it is reached. The file itself is never listed, not even when an import or using cycle leads
+    back to it.
+    """
+    deps_levels = [set() for _ in range(max_levels + 1)]
 
+    deps_levels[1] |= dependency_adjacency(relpath, project_root, idxs)
     if path.suffix in TS_EXTS:
-        text = idxs["file_texts"].get(relpath, "")
-        ids = set(IDENTIFIER_RE.findall(text))
-        for ident in ids:
-            for f in idxs["symbol_decl_map"].get(ident, []):
-                if f != relpath:
-                    deps_levels[1].add(f)
+        deps_levels[1] |= ts_identifier_dependencies(relpath, idxs)
 
+    # a file reached again through a cycle (A -> B -> A) is not its own Level 2+ dependency
+    seen = set(deps_levels[1]) | {relpath}
+    frontier = deps_levels[1]
     for lvl in range(1, max_levels):
-        for f in list(deps_levels[lvl]):
-            if f in visited:
-                continue
-            visited.add(f)
-            fpath = (project_root / f)
-            if not fpath.exists():
-                continue
-            direct = set()
-            if fpath.suffix in TS_EXTS:
-                imports = idxs["ts_imports"].get(f, [])
-                for spec in imports:
-                    resolved = resolve_ts_import(project_root, fpath, spec)
-                    if resolved:
-                        for r in resolved:
-                            try:
-                                direct.add(str(Path(r).resolve().relative_to(project_root.resolve())))
-                            except Exception:
-                                direct.add(str(Path(r).resolve()))
-            if fpath.suffix in CS_EXTS:
-                usings = idxs["cs_usings"].get(f, [])
-                for ns in usings:
-                    for ff in idxs["namespace_decl_map"].get(ns, []):
-                        if ff != f:
-                            direct.add(ff)
-                identifiers = idxs["cs_identifiers"].get(f, set())
-                for ident in identifiers:
-                    for ff in idxs["symbol_decl_map"].get(ident, []):
-                        if ff != f:
-                            direct.add(ff)
-            for d in direct:
-                if d not in deps_levels[1] and all(d not in deps_levels[x] for x in range(1, lvl+1)):
-                    deps_levels[lvl+1].add(d)
+        nxt = deps_levels[lvl + 1]
+        for f in frontier:
+            for d in dependency_adjacency(f, project_root, idxs):
+                if d not in seen:
+                    nxt.add(d)
+        seen |= nxt
+        frontier = nxt
 
     return deps_levels
 
 
+def invoked_method_names(body: str) -> Set[str]:
+    """Names invoked in a method body (last identifier after '.' or '::', generic args stripped)."""
+    invoked = set()
+    for inv in INVOKE_RE.finditer(body):
+        full = inv.group(1)
+        # take last identifier after dot or '::'
+        last = full.split('.')[-1].split('::')[-1]
+        # strip generic angle brackets
+        last = re.sub(r"<.*>$", "", last)
+        if last:
+            invoked.add(last)
+    return invoked
+
+
+def build_method_call_graph(idxs):
+    """Project-wide C# method call graph.
+
+    Every declared method is interned as a 'relativepath::method' node id; the invoked-name ids
+    recorded for its body by build_indexes are joined against method_decl_map.
+    Returns {"keys": [node key by id], "ids": {node key: id}, "edges": [tuple of callee ids by id]}.
+    """
+    cs_methods = idxs.get("cs_methods", {})
+    method_decl_map = idxs.get("method_decl_map", {})
+    names = idxs["symbols"].names
+    keys = []
+    ids = {}
+    for f, methods in cs_methods.items():
+        for mname in methods:
+            ids[f + "::" + mname] = len(keys)
+            keys.append(f + "::" + mname)
+
+    callees_by_name = {}
+    edges = []
+    for key in keys:
+        f, mname = key.split("::", 1)
+        targets = set()
+        for sid in cs_methods[f][mname]:
+            named = callees_by_name.get(sid)
+            if named is None:
+                name = names[sid]
+                named = callees_by_name[sid] = tuple(ids[f2 + "::" + name] for f2 in method_decl_map.get(name, []))
+            targets.update(named)
+        edges.append(tuple(targets))
+    return {"keys": keys, "ids": ids, "edges": edges}
+
+
 def compute_method_calls_for_file(relpath: str, path: Path, project_root: Path, idxs, max_levels: int):
     """Compute method-level call graph for methods declared in this file.
     Returns dict: method_name -> list of sets for levels (index 1..max_levels)
     Each entry in sets is string 'relativepath::method'
+
+    Levels come from a BFS over the shared project call graph (build_method_call_graph, cached in
+    idxs["method_graph"]); a callee is only added at the first level it is reached.
     """
     result = {}
-    cs_methods = idxs.get("cs_methods", {})
-    method_decl_map = idxs.get("method_decl_map", {})
-
-    methods = cs_methods.get(relpath, {})
+    methods = idxs.get("cs_methods", {}).get(relpath, {})
     if not methods:
         return result
 
+    graph = idxs.get("method_graph")
+    if graph is None:
+        graph = idxs["method_graph"] = build_method_call_graph(idxs)
+    keys, edges = graph["keys"], graph["edges"]
+
     # For each method declared in this file
-    for mname, body in methods.items():
+    for mname in methods:
         levels = [set() for _ in range(max_levels + 1)]
-        # find invoked identifiers
-        invoked = set()
-        for inv in INVOKE_RE.finditer(body):
-            full = inv.group(1)
-            # take last identifier after dot or '::'
-            last = full.split('.')[-1].split('::')[-1]
-            # strip generic angle brackets
-            last = re.sub(r"<.*>$", "", last)
-            if last:
-                invoked.add(last)
-
-        # map invoked names to declared methods (files)
-        for name in invoked:
-            for f in method_decl_map.get(name, []):
-                if f != relpath:
-                    levels[1].add(f + "::" + name)
-                else:
-                    levels[1].add(f + "::" + name)
-
-        # BFS for further levels
-        for lvl in range(1, max_levels):
-            for item in list(levels[lvl]):
-                # item is 'file::method'
-                try:
-                    fpath_str, method_name = item.split("::", 1)
-                except ValueError:
-                    continue
-                # find method body in that file
-                other_methods = cs_methods.get(fpath_str, {})
-                body2 = other_methods.get(method_name)
-                if not body2:
-                    continue
-                # find invoked in body2
-                invoked2 = set()
-                for inv in INVOKE_RE.finditer(body2):
-                    full = inv.group(1)
-                    last = full.split('.')[-1].split('::')[-1]
-                    last = re.sub(r"<.*>$", "", last)
-                    if last:
-                        invoked2.add(last)
-                for name2 in invoked2:
-                    for f2 in method_decl_map.get(name2, []):
-                        key = f2 + "::" + name2
-                        # avoid duplicates across earlier levels
-                        if all(key not in levels[x] for x in range(1, lvl+1)):
-                            levels[lvl+1].add(key)
-
+        frontier = set(edges[graph["ids"][relpath + "::" + mname]])
+        seen = set(frontier)
+        for lvl in range(1, max_levels + 1):
+            levels[lvl] = {keys[n] for n in frontier}
+            if lvl == max_levels:
+                break
+            nxt = set()
+            for n in frontier:
+                for c in edges[n]:
+                    if c not in seen:
+                        nxt.add(c)
+            seen |= nxt
+            frontier = nxt
         result[mname] = levels
 
     return result
 
 
-def process_project(project_root: Path, max_levels: int = 3):
-    files = list_source_files(project_root)
-    idxs = build_indexes(files, project_root)
-    results = []
-    for p in files:
-        rel = str(p.relative_to(project_root))
-        deps_levels = compute_dependencies_for_file(rel, p, project_root, idxs, max_levels)
-        method_calls = compute_method_calls_for_file(rel, p, project_root, idxs, max_levels)
-        declared = []
+def file_row(rel: str, p: Path, project_root: Path, idxs, max_levels: int):
+    deps_levels = compute_dependencies_for_file(rel, p, project_root, idxs, max_levels)
+    method_calls = compute_method_calls_for_file(rel, p, project_root, idxs, max_levels)
+    declared = []
+    if p.suffix in TS_EXTS:
+        declared = sorted(idxs["ts_exports"].get(rel, []))
+    elif p.suffix in CS_EXTS:
+        declared = sorted(list(idxs["cs_types"].get(rel, set()) | idxs["cs_namespaces"].get(rel, set())))
+    return {
+        "file": rel,
+        "declared": declared,
+        "levels": deps_levels,
+        "method_calls": method_calls,
+        "project_root": str(project_root),
+        # linked across projects by link_endpoints() once every project has its rows
+        "http_calls": idxs["ts_http_calls"].get(rel, []),
+        "routes": idxs["cs_routes"].get(rel, []),
+        "endpoints": [],
+    }
+
+
+def ast_cs_entries(entry, symbols: SymbolTable):
+    """index_file()'s C# entries for one AstExporter file entry (see ast_export.py).
+
+    Declared types, namespaces and usings are taken as exported. The identifiers are the tokens of
+    every name, type, base type and attribute the entry records plus those of its method bodies
+    (bodyText), and each method with a body maps to the last names of its exported methodCalls.
+    The exporter does not list constructors, so unlike the regex scan they have no call-chains.
+    Controllers get a cs_routes placeholder: attribute arguments are not exported, so index_file reads
+    their routes from the source.
+    """
+    namespaces = set(entry.get("namespaces") or ())
+    usings = list(entry.get("usings") or ())
+    types = {t["name"] for t in entry.get("declaredTypes") or () if t.get("name")}
+    identifiers = set(types)
+    for name in list(namespaces) + usings:
+        identifiers.update(IDENTIFIER_RE.findall(name))
+    methods = {}
+    for info in entry_types(entry):
+        for text in [info.get("name") or ""] + list(info.get("baseTypes") or ()) + list(info.get("attributes") or ()):
+            identifiers.update(IDENTIFIER_RE.findall(text))
+        for member in list(info.get("fields") or ()) + list(info.get("properties") or ()):
+            identifiers.update(IDENTIFIER_RE.findall(f"{member.get('type') or ''} {member.get('name') or ''}"))
+        for method in info.get("methods") or ():
+            name = method.get("name") or ""
+            identifiers.update(IDENTIFIER_RE.findall(f"{method.get('returnType') or ''} {name}"))
+            for param in method.get("parameters") or ():
+                identifiers.update(IDENTIFIER_RE.findall(f"{param.get('type') or ''} {param.get('name') or ''}"))
+            body = method.get("bodyText") or ""
+            if not body or not name:
+                continue
+            identifiers.update(IDENTIFIER_RE.findall(body))
+            invoked = methods.setdefault(name, set())
+            for call in method.get("methodCalls") or ():
+                expr = call.get("expression") or ""
+                while "<" in expr and GENERIC_ARGS_RE.search(expr):
+                    expr = GENERIC_ARGS_RE.sub("", expr)
+                last = expr.split(".")[-1].split("::")[-1].strip()
+                if last:
+                    invoked.add(last)
+    entries = {
+        "cs_types": types,
+        "cs_namespaces": namespaces,
+        "cs_usings": usings,
+        "cs_identifiers": symbols.intern_all(identifiers),
+        "cs_methods": {mname: symbols.intern_all(invoked) for mname, invoked in methods.items()},
+    }
+    if (entry.get("symbols") or {}).get("controllers"):
+        entries["cs_routes"] = None
+    return entries
+
+
+def load_ast_facts(export: AstExport, root: Path, symbols: SymbolTable = None, metrics: RunMetrics = None):
+    """--from-ast: {absolute path: index_file() C# entries} for every file of an AstExporter output,
+    read one entry at a time; only the interned facts are kept."""
+    symbols = symbols or SYMBOLS
+    facts = {}
+    for entry in export.iter_entries():
+        p = entry_path(entry, root)
+        stage_times = {} if metrics is not None else None
+        lap = stage_clock(stage_times)
+        facts[str(p)] = ast_cs_entries(entry, symbols)
+        lap("ast_facts")
+        if metrics is not None:
+            metrics.record_file(p, stage_times)
+    return facts
+
+
+# phases main() reports with --metrics (index, adjacency and rows accumulate over projects)
+PHASES = ("ast_load", "discover", "index", "adjacency", "rows", "endpoints", "workbook", "query_index")
+
+
+def process_project(project_root: Path, max_levels: int = 3, files: List[Path] = None, timer=None,
+                    ast_facts: Dict[str, Dict] = None, identical: IdenticalFiles = None):
+    """Rows for every source file of one project. timer (a phase_timer.PhaseTimer) receives the time
+    spent in each phase: list_files (only when files is None), index, adjacency and rows. ast_facts
+    (--from-ast, see load_ast_facts) replaces the scan of the C# files it covers; identical lets
+    byte-identical files share one scan (see build_indexes)."""
+    phase = timer.phase if timer is not None else (lambda name, files=None: nullcontext())
+    if files is None:
+        with phase("list_files"):
+            files = list_source_files(project_root)
+    with phase("index", files=len(files)):
+        idxs = build_indexes(files, project_root, metrics=timer if isinstance(timer, RunMetrics) else None,
+                             ast_facts=ast_facts, identical=identical)
+    with phase("adjacency", files=len(files)):
+        build_dependency_adjacency(files, project_root, idxs)
+    with phase("rows", files=len(files)):
+        return [file_row(str(p.relative_to(project_root)), p, project_root, idxs, max_levels) for p in files]
+
+
+def _repost(index, f: str, old, new):
+    """Move f from the index entries (name -> set of declaring files) of its old names to those of its
+    new ones. Returns the names whose entries changed."""
+    old, new = set(old), set(new)
+    for name in old - new:
+        holders = index[name]
+        holders.discard(f)
+        if not holders:
+            del index[name]
+    for name in new - old:
+        index.setdefault(name, set()).add(f)
+    return old ^ new
+
+
+class LiveProject:
+    """One project's indexes, dependency adjacency and rows, kept in memory by --watch.
+
+    update() re-indexes the changed files and moves their declarations in symbol_decl_map,
+    namespace_decl_map and method_decl_map. Direct dependencies are recomputed only for those files
+    and for files that use a changed namespace or mention a changed symbol (plus every TS file when
+    files were added or removed or tsconfig.json changed, since import resolution depends on them).
+    Rows are recomputed for files that reach a file whose direct dependencies changed in fewer than
+    max_levels steps (walked back through the reverse adjacency), and for files with a method whose
+    call-chains reach a method whose callees changed.
+    """
+
+    def __init__(self, project_root: Path, files: List[Path], max_levels: int, identical: IdenticalFiles = None):
+        self.root = project_root
+        self.max_levels = max_levels
+        self.files = files
+        self.rels = [str(p.relative_to(project_root)) for p in files]
+        self.idxs = build_indexes(files, project_root, identical=identical)
+        build_dependency_adjacency(files, project_root, self.idxs)
+        # file -> files its rows expand (direct dependencies, plus the identifier join for TS files)
+        self.forward = {}
+        self.reverse = defaultdict(set)
+        for rel, p in zip(self.rels, files):
+            self._link(rel, self._expands(rel, p))
+        self.rows = {rel: file_row(rel, p, project_root, self.idxs, max_levels) for rel, p in zip(self.rels, files)}
+
+    def ordered_rows(self):
+        return [self.rows[rel] for rel in self.rels]
+
+    def _expands(self, rel: str, p: Path):
+        edges = set(dependency_adjacency(rel, self.root, self.idxs))
         if p.suffix in TS_EXTS:
-            declared = sorted(idxs["ts_exports"].get(rel, []))
-        elif p.suffix in CS_EXTS:
-            declared = sorted(list(idxs["cs_types"].get(rel, set()) | idxs["cs_namespaces"].get(rel, set())))
-        results.append({
-            "file": rel,
-            "declared": declared,
-            "levels": deps_levels,
-            "method_calls": method_calls,
-            "project_root": str(project_root)
-        })
-    return results
+            edges |= ts_identifier_dependencies(rel, self.idxs)
+        return edges
+
+    def _link(self, rel: str, edges):
+        old = self.forward.get(rel, set())
+        for d in old - edges:
+            self.reverse[d].discard(rel)
+        for d in edges - old:
+            self.reverse[d].add(rel)
+        if edges:
+            self.forward[rel] = edges
+        else:
+            self.forward.pop(rel, None)
+
+    def _reindex(self, rel: str, entries):
+        """Replace rel's per-file entries; returns the changed (symbol ids, namespaces, method names)."""
+        idxs = self.idxs
+        symbols = idxs["symbols"]
+        old_decls = idxs["ts_exports"].get(rel) or idxs["cs_types"].get(rel) or ()
+        new_decls = entries.get("ts_exports") or entries.get("cs_types") or ()
+        changed_symbols = _repost(idxs["symbol_decl_map"], rel, [symbols.intern(s) for s in old_decls],
+                                  [symbols.intern(s) for s in new_decls])
+        changed_namespaces = _repost(idxs["namespace_decl_map"], rel, idxs["cs_namespaces"].get(rel, ()),
+                                     entries.get("cs_namespaces", ()))
+        changed_methods = _repost(idxs["method_decl_map"], rel, idxs["cs_methods"].get(rel, {}),
+                                  entries.get("cs_methods", {}))
+        for key in PER_FILE_INDEXES:
+            if key in entries:
+                idxs[key][rel] = entries[key]
+            else:
+                idxs[key].pop(rel, None)
+        return changed_symbols, changed_namespaces, changed_methods
+
+    def update(self, files: List[Path], modified: Set[str], tsconfig_changed: bool = False) -> int:
+        """Apply one batch: files is the project's current file list, modified the project-relative
+        paths of files changed on disk. Returns the number of rows recomputed or dropped."""
+        idxs = self.idxs
+        rels = [str(p.relative_to(self.root)) for p in files]
+        paths = dict(zip(rels, files))
+        added = paths.keys() - set(self.rels)
+        removed = set(self.rels) - paths.keys()
+        reindex = (modified & paths.keys()) | added
+        if not reindex and not removed and not tsconfig_changed:
+            return 0
+        self.files, self.rels = files, rels
+
+        changed_symbols, changed_namespaces, changed_methods = set(), set(), set()
+        for rel in sorted(reindex | removed):
+            entries = index_file(paths[rel], idxs["symbols"]) if rel in paths else {}
+            syms, nss, methods = self._reindex(rel, entries)
+            changed_symbols |= syms
+            changed_namespaces |= nss
+            changed_methods |= methods
+        if changed_symbols:
+            idxs["declared_symbols"] = frozenset(idxs["symbol_decl_map"])
+        if added or removed or tsconfig_changed:
+            idxs["ts_resolver"] = TsModuleResolver(self.root, files)
+
+        # files whose direct dependencies or identifier join may differ now
+        candidates = set(reindex)
+        joined = set()
+        if changed_namespaces:
+            candidates.update(f for f, usings in idxs["cs_usings"].items() if not changed_namespaces.isdisjoint(usings))
+        if changed_symbols:
+            candidates.update(f for f, ids in idxs["cs_identifiers"].items() if not changed_symbols.isdisjoint(ids))
+            joined.update(f for f, ids in idxs["ts_identifiers"].items() if not changed_symbols.isdisjoint(ids))
+        if added or removed or tsconfig_changed:
+            candidates.update(idxs["ts_imports"])
+        candidates |= joined
+
+        memo = idxs["dep_adjacency"]
+        changed_adjacency = removed | added
+        for rel in removed:
+            memo.pop(rel, None)
+            self._link(rel, set())
+            del self.rows[rel]
+        for rel in candidates:
+            old = memo.pop(rel, None)
+            if dependency_adjacency(rel, self.root, idxs) != old:
+                changed_adjacency.add(rel)
+            self._link(rel, self._expands(rel, paths[rel]))
+
+        dirty = reindex | joined
+        reached = set(changed_adjacency)
+        frontier = reached
+        for _ in range(self.max_levels - 1):
+            frontier = {r for d in frontier for r in self.reverse.get(d, ()) if r not in reached}
+            reached |= frontier
+        dirty |= reached
+
+        if any(paths.get(rel, Path(rel)).suffix in CS_EXTS for rel in reindex | removed):
+            dirty |= self._refresh_method_graph(reindex | removed, changed_methods)
+
+        dirty &= paths.keys()
+        for rel in dirty:
+            self.rows[rel] = file_row(rel, paths[rel], self.root, idxs, self.max_levels)
+        return len(dirty) + len(removed)
+
+    def _refresh_method_graph(self, changed_files: Set[str], changed_methods: Set[str]) -> Set[str]:
+        """Rebuild the method call graph; returns the files with a method whose call-chains (up to
+        max_levels) can pass through a method whose callees changed."""
+        idxs = self.idxs
+        graph = idxs["method_graph"] = build_method_call_graph(idxs)
+        symbols = idxs["symbols"]
+        changed_ids = frozenset(symbols.intern(m) for m in changed_methods)
+        frontier = set()
+        for n, key in enumerate(graph["keys"]):
+            f, mname = key.split("::", 1)
+            if f in changed_files or not changed_ids.isdisjoint(idxs["cs_methods"][f][mname]):
+                frontier.add(n)
+        callers = defaultdict(list)
+        for n, callees in enumerate(graph["edges"]):
+            for c in callees:
+                callers[c].append(n)
+        reached = set(frontier)
+        for _ in range(self.max_levels - 1):
+            frontier = {c for n in frontier for c in callers.get(n, ()) if c not in reached}
+            reached |= frontier
+        return {graph["keys"][n].split("::", 1)[0] for n in reached}
 
 
 def safe_sheet_name(name: str, idx: int):
@@ -424,6 +1151,14 @@ def write_excel_one_sheet_per_file(all_file_rows: List[Dict], out_path: Path, ma
                     vals = sorted(levels[lvl])
                     ws.append([f"  Level {lvl}", "; ".join(vals)])
                 ws.append([])
+        # UI file -> controller action edges (link_endpoints)
+        endpoints = row.get("endpoints", [])
+        if endpoints:
+            ws.append([])
+            ws.append(["HTTP calls to API endpoints:"])
+            ws.append(["Call", "Endpoint", "Route", "API project"])
+            for verb, url, api_root, api_file, action, route in endpoints:
+                ws.append([f"{verb} {url}", f"{api_file}::{action}", route, api_root])
         for col in ws.columns:
             max_len = 0
             col_letter = col[0].column_letter
@@ -440,30 +1175,262 @@ def write_excel_one_sheet_per_file(all_file_rows: List[Dict], out_path: Path, ma
     wb.save(out_path)
 
 
+def write_excel_long_format(all_file_rows: List[Dict], out_path: Path, max_levels: int):
+    """Normalized layout: four sheets with one row per file / dependency / call-chain entry / endpoint
+    link, streamed through a write-only workbook (no per-file sheets, no autosizing)."""
+    wb = Workbook(write_only=True)
+    ws_files = wb.create_sheet(title="Files")
+    ws_deps = wb.create_sheet(title="FileDependencies")
+    ws_calls = wb.create_sheet(title="MethodCalls")
+    ws_links = wb.create_sheet(title="EndpointLinks")
+    ws_files.append(["FileID", "ProjectRoot", "FilePath", "DeclaredSymbols"])
+    ws_deps.append(["FilePath", "Level", "Dependency"])
+    ws_calls.append(["FilePath", "Method", "Level", "Target"])
+    ws_links.append(["FilePath", "HttpMethod", "Url", "ApiProjectRoot", "ApiFile", "Action", "Route"])
+
+    for i, row in enumerate(all_file_rows):
+        ws_files.append([i + 1, row["project_root"], row["file"], "; ".join(row["declared"])])
+        for lvl in range(1, max_levels + 1):
+            for d in sorted(row["levels"][lvl]):
+                ws_deps.append([row["file"], lvl, d])
+        for mname, levels in row.get("method_calls", {}).items():
+            wrote = False
+            for lvl in range(1, max_levels + 1):
+                for t in sorted(levels[lvl]):
+                    ws_calls.append([row["file"], mname, lvl, t])
+                    wrote = True
+            if not wrote:
+                # keep methods without outgoing calls visible
+                ws_calls.append([row["file"], mname, None, None])
+        for verb, url, api_root, api_file, action, route in row.get("endpoints", []):
+            ws_links.append([row["file"], verb, url, api_root, api_file, action, route])
+
+    wb.save(out_path)
+
+
+def default_index_path(out_path: Path) -> Path:
+    return out_path.with_suffix(".index.sqlite")
+
+
+def write_dependency_index(all_file_rows: List[Dict], index_path: Path, max_levels: int):
+    """Write the sidecar query index: files (with their worksheet name), per-level file dependencies,
+    per-level method call-chains and UI -> API endpoint links, indexed by file path, file name, method
+    name and controller action."""
+    if index_path.exists():
+        index_path.unlink()
+    conn = sqlite3.connect(str(index_path))
+    conn.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE files (file_id INTEGER PRIMARY KEY, file TEXT, file_key TEXT, file_name TEXT, project_root TEXT, sheet TEXT, declared TEXT);
+        CREATE TABLE file_deps (file_id INTEGER, level INTEGER, dep TEXT);
+        CREATE TABLE method_calls (file_id INTEGER, method TEXT, level INTEGER, target TEXT);
+        CREATE TABLE endpoint_links (file_id INTEGER, http_method TEXT, url TEXT, api_project_root TEXT, api_file TEXT, action TEXT, route TEXT);
+    """)
+    conn.execute("INSERT INTO meta VALUES ('levels', ?)", (str(max_levels),))
+    for i, row in enumerate(all_file_rows):
+        fid = i + 1
+        sheet = safe_sheet_name(Path(row["file"]).stem, fid)
+        file_key = row["file"].replace("\\", "/")
+        conn.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (fid, row["file"], file_key, file_key.rsplit("/", 1)[-1].lower(), row["project_root"], sheet, "; ".join(row["declared"])))
+        conn.executemany("INSERT INTO file_deps VALUES (?, ?, ?)",
+                         [(fid, lvl, d) for lvl in range(1, max_levels + 1) for d in sorted(row["levels"][lvl])])
+        conn.executemany("INSERT INTO method_calls VALUES (?, ?, ?, ?)",
+                         [(fid, mname, lvl, t)
+                          for mname, levels in row.get("method_calls", {}).items()
+                          for lvl in range(1, max_levels + 1)
+                          for t in (sorted(levels[lvl]) or [None])])
+        conn.executemany("INSERT INTO endpoint_links VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         [(fid,) + tuple(link) for link in row.get("endpoints", [])])
+    conn.executescript("""
+        CREATE INDEX ix_files_key ON files (file_key);
+        CREATE INDEX ix_files_name ON files (file_name);
+        CREATE INDEX ix_file_deps ON file_deps (file_id, level);
+        CREATE INDEX ix_file_deps_dep ON file_deps (dep);
+        CREATE INDEX ix_method_calls ON method_calls (file_id, method);
+        CREATE INDEX ix_method_calls_method ON method_calls (method);
+        CREATE INDEX ix_endpoint_links ON endpoint_links (file_id);
+        CREATE INDEX ix_endpoint_links_action ON endpoint_links (action);
+    """)
+    conn.commit()
+    conn.close()
+
+
+def write_outputs(all_rows: List[Dict], out: Path, args, verbose: bool = True, timer=None):
+    """Write the workbook (--layout) and, unless --no-index, the sidecar query index (timer phases:
+    workbook, query_index)."""
+    phase = timer.phase if timer is not None else (lambda name, files=None: nullcontext())
+    max_levels = args.levels
+    with phase("workbook", files=len(all_rows)):
+        if args.layout == "long":
+            if verbose:
+                print(f"Writing long-format Excel file for {len(all_rows)} files to: {out}")
+            write_excel_long_format(all_rows, out, max_levels)
+        else:
+            if verbose:
+                print(f"Writing Excel file with {len(all_rows)} sheets to: {out}")
+            write_excel_one_sheet_per_file(all_rows, out, max_levels)
+    if not args.no_index:
+        index_path = Path(args.index).resolve() if args.index else default_index_path(out)
+        if verbose:
+            print(f"Writing query index to: {index_path}")
+        with phase("query_index", files=len(all_rows)):
+            write_dependency_index(all_rows, index_path, max_levels)
+
+
+def update_live_projects(root: Path, live: Dict[Path, LiveProject], changed, max_levels: int):
+    """Apply one batch of changed paths below root (None: anything may have changed) to the live projects.
+    Projects that appear are built from scratch; projects that disappear are dropped. Returns the
+    projects in walk order and the number of rows recomputed or dropped."""
+    scan = scan_workspace(root)
+    projects = find_projects(root, scan)
+    recomputed = sum(len(p.rels) for proj, p in live.items() if proj not in projects)
+    for proj in projects:
+        files = list_source_files(proj, scan)
+        project = live.get(proj)
+        if project is None:
+            live[proj] = LiveProject(proj, files, max_levels)
+            recomputed += len(files)
+            continue
+        prefix = os.path.join(str(proj), "")
+        if changed is None:
+            modified = set(project.rels)
+            tsconfig_changed = True
+        else:
+            modified = {c[len(prefix):] for c in changed if c.startswith(prefix)}
+            tsconfig_changed = any(os.path.basename(m).startswith("tsconfig") and m.endswith(".json")
+                                   for m in modified)
+        recomputed += project.update(files, modified, tsconfig_changed)
+    for proj in [proj for proj in live if proj not in projects]:
+        del live[proj]
+    return projects, recomputed
+
+
+def watch_workspace(root: Path, out: Path, args, live: Dict[Path, LiveProject]):
+    """--watch loop: wait for changes below root, apply them to the live projects (update_live_projects)
+    and rewrite the outputs."""
+    watcher = SourceWatcher(root, skip_dir=lambda d: d.name in IGNORED_DIRS, interval=args.poll_interval, poll=args.poll)
+    if watcher.mode == "poll" and not args.poll:
+        print(f"inotify unavailable ({watcher.fallback_reason}); polling every {args.poll_interval}s")
+    print(f"Watching {root} for changes ({watcher.mode}); press Ctrl+C to stop")
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            projects, recomputed = update_live_projects(root, live, changed, args.levels)
+            if not recomputed:
+                continue
+            all_rows = [row for proj in projects for row in live[proj].ordered_rows()]
+            link_endpoints(all_rows)
+            write_outputs(all_rows, out, args, verbose=False)
+            print(f"Updated {out}: {recomputed} of {len(all_rows)} files recomputed in {time.perf_counter() - start:.2f}s")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--root", required=True, help="Workspace root to scan")
     ap.add_argument("--out", required=True, help="Output Excel file path")
     ap.add_argument("--levels", type=int, default=3, help="Max dependency levels to compute")
+    ap.add_argument("--layout", choices=["per-file", "long"], default="per-file",
+                    help="per-file: one worksheet per source file (default); long: Files/FileDependencies/MethodCalls sheets")
+    ap.add_argument("--index", help="Sidecar query index path (default: <out>.index.sqlite)")
+    ap.add_argument("--no-index", action="store_true", help="Do not write the sidecar query index")
+    ap.add_argument("--watch", action="store_true",
+                    help="After writing the outputs, keep watching --root and rewrite them incrementally on every change")
+    ap.add_argument("--poll", action="store_true", help="With --watch: poll for changes instead of using inotify")
+    ap.add_argument("--poll-interval", type=float, default=1.0, help="With --watch: seconds between checks (default: 1.0)")
+    ap.add_argument("--metrics", help="Write per-phase timings, bytes read, peak memory, the slowest files per "
+                                      "extraction stage and dependency counts to this JSON file")
+    ap.add_argument("--metrics-slowest", type=int, default=10,
+                    help="With --metrics: how many of the slowest files to keep per extraction stage (default: 10)")
+    ap.add_argument("--profile-phase", choices=PHASES, help="With --metrics: run this phase under cProfile")
+    ap.add_argument("--profile-out", help="With --profile-phase: cProfile stats file (default: <metrics file>.<phase>.prof)")
+    ap.add_argument("--from-ast", help="Take C# facts from this AstExporter output directory (summary.json + files/) "
+                                       "instead of scanning the .cs files; TS files are still scanned")
+    ap.add_argument("--no-dedup", action="store_true",
+                    help="Scan byte-identical files one by one instead of once per content hash")
     args = ap.parse_args()
+    if args.profile_phase and not args.metrics:
+        ap.error("--profile-phase needs --metrics")
+    if args.from_ast and args.watch:
+        ap.error("--watch cannot be combined with --from-ast")
 
     root = Path(args.root).resolve()
     out = Path(args.out).resolve()
     max_levels = args.levels
+    metrics = None
+    if args.metrics:
+        metrics = RunMetrics(args.metrics_slowest, args.profile_phase,
+                             args.profile_out or f"{args.metrics}.{args.profile_phase}.prof")
+
+    ast_facts = None
+    if args.from_ast:
+        with (metrics.phase("ast_load") if metrics else nullcontext({})) as stats:
+            export = AstExport(args.from_ast)
+            ast_facts = load_ast_facts(export, root, metrics=metrics)
+            stats["files"] = len(ast_facts)
+        print(f"AST export: {len(ast_facts)} C# files read from {export.summary}"
+              + (f" ({export.missing} listed entries missing)" if export.missing else ""))
 
-    projects = find_projects(root)
+    # one walk provides both the project list and every project's files
+    with (metrics.phase("discover") if metrics else nullcontext({})) as stats:
+        scan = scan_workspace(root)
+        projects = find_projects(root, scan)
+        # byte-identical files that will be scanned are grouped by content hash, so each is scanned once
+        identical = None
+        if not args.no_dedup:
+            identical = IdenticalFiles([p for ext, lst in scan["files"].items() for p in lst
+                                        if ast_facts is None or ext not in CS_EXTS or str(p) not in ast_facts])
+        stats["files"] = sum(len(lst) for lst in scan["files"].values())
     print(f"Found {len(projects)} projects.")
+    if ast_facts is not None:
+        scanned = sum(1 for p in scan["files"][".cs"] if str(p) not in ast_facts)
+        if scanned:
+            print(f"  {scanned} .cs files are not in the AST export and are scanned from source")
 
     all_rows = []
+    live = {}
     for proj in projects:
         print(f"Processing project: {proj}")
-        rows = process_project(proj, max_levels=max_levels)
+        if args.watch:
+            # the project's indexes stay in memory so that changes can be applied file by file
+            live[proj] = LiveProject(proj, list_source_files(proj, scan), max_levels, identical)
+            rows = live[proj].ordered_rows()
+        else:
+            rows = process_project(proj, max_levels=max_levels, files=list_source_files(proj, scan), timer=metrics,
+                                   ast_facts=ast_facts, identical=identical)
         print(f"  files: {len(rows)}")
         all_rows.extend(rows)
+    if identical is not None:
+        print(identical.summary())
 
-    print(f"Writing Excel file with {len(all_rows)} sheets to: {out}")
-    write_excel_one_sheet_per_file(all_rows, out, max_levels)
+    # UI HTTP calls and controller routes live in different projects, so they are linked workspace-wide
+    with (metrics.phase("endpoints", files=len(all_rows)) if metrics else nullcontext({})):
+        calls, linked = link_endpoints(all_rows)
+    if calls:
+        print(f"Linked {linked} of {calls} UI HTTP calls to API endpoints.")
+    write_outputs(all_rows, out, args, timer=metrics)
+    if metrics is not None:
+        for row in all_rows:
+            for lvl in range(1, max_levels + 1):
+                metrics.count("dependencies", f"level{lvl}", len(row["levels"][lvl]))
+                metrics.count("method_calls", f"level{lvl}", sum(len(levels[lvl]) for levels in row["method_calls"].values()))
+        if identical is not None:
+            metrics.count("extraction", "identical_copies", identical.reused_files)
+        metrics.count("endpoints", "http_calls", calls)
+        metrics.count("endpoints", "linked_calls", linked)
+        metrics.count("endpoints", "links", sum(len(row["endpoints"]) for row in all_rows))
+        metrics.count("endpoints", "routes", sum(len(row["routes"]) for row in all_rows))
+        metrics.write(args.metrics, script="generate_file_sheets", root=str(root), projects=len(projects),
+                      files=len(all_rows))
+        print(f"Wrote metrics to {args.metrics}")
     print("Done.")
+    if args.watch:
+        watch_workspace(root, out, args, live)
 
 if __name__ == "__main__":
     main()
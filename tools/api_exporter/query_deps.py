@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+query_deps.py
+
+Answer dependency / call-chain questions from the sidecar index that generate_file_sheets.py
+writes next to its workbook (<excel>.index.sqlite), instead of scanning the workbook sheets.
+
+Usage:
+  python query_deps.py --index <excel.index.sqlite> --file PatientsController.cs
+  python query_deps.py --index <excel.index.sqlite> --file Controllers/PatientsController.cs --methods
+  python query_deps.py --index <excel.index.sqlite> --method GetPatients [--file PatientsController.cs]
+  python query_deps.py --index <excel.index.sqlite> --action GetPatients [--file PatientsController.cs]
+
+--file matches an exact project-relative path, a path suffix (whole path segments, which may reach
+into the project root) or a bare file name (case-insensitive for names). Files are keyed by
+"<project root>/<project-relative path>", since projects can hold files with the same relative path.
+Results are printed as JSON:
+  file query:   {file: {"sheet": ..., "declared": [...], "levels": {"Level 1": [...], ...}, "endpoints": [...]}}
+  --methods:    {file: {method: {"Level 1": [...], ...}}}
+  method query: {file: {method: {"Level 1": [...], ...}}}
+  --action:     {"api_file::action": [{"file": UI file, "http_method": ..., "url": ..., "route": ...}, ...]}
+(--action lists the UI files whose HTTP calls reach a controller action; --file then names the controller.
+"endpoints" are the API actions a UI file calls. Both are empty for indexes written before endpoint links.)
+"""
+
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def open_index(index_path: Path):
+    conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'levels'").fetchone()
+    levels = int(row[0]) if row else 3
+    return conn, levels
+
+
+def result_key(project_root: str, file: str) -> str:
+    """Key of a file in query results: its project root joined with its project-relative path."""
+    return (project_root.rstrip("/\\") + "/" + file).replace("\\", "/")
+
+
+def find_files(conn, spec: str) -> List[tuple]:
+    """Return [(file_id, key, sheet, declared)] for files matching spec (exact path, path suffix or name);
+    key is result_key()."""
+    norm = spec.replace("\\", "/")
+    cols = "file_id, file, project_root, sheet, declared"
+    rows = conn.execute(f"SELECT {cols} FROM files WHERE file_key = ?", (norm,)).fetchall()
+    if not rows:
+        name = Path(norm).name.lower()
+        # the file-name index narrows the candidates; the suffix check keeps directory parts honest
+        rows = conn.execute(f"SELECT {cols} FROM files WHERE file_name = ?", (name,)).fetchall()
+        if "/" in norm:
+            rows = [r for r in rows if result_key(r[2], r[1]) == norm or result_key(r[2], r[1]).endswith("/" + norm)]
+    return [(file_id, result_key(project_root, file), sheet, declared)
+            for file_id, file, project_root, sheet, declared in rows]
+
+
+def file_dependencies(conn, file_id: int, levels: int, only_level: Optional[int] = None) -> Dict[str, List[str]]:
+    out = {f"Level {lvl}": [] for lvl in range(1, levels + 1) if only_level in (None, lvl)}
+    for lvl, dep in conn.execute("SELECT level, dep FROM file_deps WHERE file_id = ? ORDER BY level, dep", (file_id,)):
+        key = f"Level {lvl}"
+        if key in out:
+            out[key].append(dep)
+    return out
+
+
+def method_chains(conn, file_id: int, levels: int, method: Optional[str] = None,
+                  only_level: Optional[int] = None) -> Dict[str, Dict[str, List[str]]]:
+    sql = "SELECT method, level, target FROM method_calls WHERE file_id = ?"
+    params = [file_id]
+    if method:
+        sql += " AND method = ?"
+        params.append(method)
+    sql += " ORDER BY rowid"
+    out: Dict[str, Dict[str, List[str]]] = {}
+    for mname, lvl, target in conn.execute(sql, params):
+        chains = out.setdefault(mname, {f"Level {x}": [] for x in range(1, levels + 1) if only_level in (None, x)})
+        key = f"Level {lvl}"
+        if target is not None and key in chains:
+            chains[key].append(target)
+    return out
+
+
+def has_endpoint_links(conn) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'endpoint_links'").fetchone() is not None
+
+
+def file_endpoints(conn, file_id: int) -> List[Dict[str, str]]:
+    if not has_endpoint_links(conn):
+        return []
+    cols = ("http_method", "url", "api_project_root", "api_file", "action", "route")
+    return [dict(zip(cols, r)) for r in conn.execute(
+        f"SELECT {', '.join(cols)} FROM endpoint_links WHERE file_id = ? ORDER BY rowid", (file_id,))]
+
+
+def query_file(conn, levels: int, spec: str, with_methods: bool = False, only_level: Optional[int] = None):
+    result = {}
+    for file_id, file, sheet, declared in find_files(conn, spec):
+        if with_methods:
+            result[file] = method_chains(conn, file_id, levels, only_level=only_level)
+        else:
+            result[file] = {
+                "sheet": sheet,
+                "declared": [d for d in declared.split("; ") if d] if declared else [],
+                "levels": file_dependencies(conn, file_id, levels, only_level),
+                "endpoints": file_endpoints(conn, file_id),
+            }
+    return result
+
+
+def query_method(conn, levels: int, method: str, file_spec: Optional[str] = None, only_level: Optional[int] = None):
+    if file_spec:
+        file_ids = [(r[0], r[1]) for r in find_files(conn, file_spec)]
+    else:
+        file_ids = [(file_id, result_key(project_root, file)) for file_id, file, project_root in conn.execute(
+            "SELECT DISTINCT m.file_id, f.file, f.project_root FROM method_calls m JOIN files f ON f.file_id = m.file_id "
+            "WHERE m.method = ? ORDER BY m.file_id", (method,))]
+    result = {}
+    for file_id, file in file_ids:
+        chains = method_chains(conn, file_id, levels, method=method, only_level=only_level)
+        if chains:
+            result[file] = chains
+    return result
+
+
+def query_action(conn, action: str, file_spec: Optional[str] = None):
+    """UI callers of a controller action, grouped by 'api_file::action'."""
+    if not has_endpoint_links(conn):
+        return {}
+    norm = file_spec.replace("\\", "/") if file_spec else None
+    result: Dict[str, List[Dict[str, str]]] = {}
+    for file, project_root, verb, url, api_file, route in conn.execute(
+            "SELECT f.file, f.project_root, e.http_method, e.url, e.api_file, e.route FROM endpoint_links e "
+            "JOIN files f ON f.file_id = e.file_id WHERE e.action = ? ORDER BY e.api_file, f.project_root, f.file", (action,)):
+        api_key = api_file.replace("\\", "/")
+        if norm and not (api_key == norm or api_key.endswith("/" + norm)):
+            continue
+        result.setdefault(f"{api_file}::{action}", []).append(
+            {"file": result_key(project_root, file), "http_method": verb, "url": url, "route": route})
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--index", required=True, help="Sidecar index written by generate_file_sheets.py (<excel>.index.sqlite)")
+    ap.add_argument("--file", help="File to look up (exact relative path, path suffix or file name)")
+    ap.add_argument("--method", help="Method name to return call-chains for")
+    ap.add_argument("--methods", action="store_true", help="With --file: return the call-chains of every method in the file")
+    ap.add_argument("--action", help="Controller action to list the calling UI files for (--file narrows the controller)")
+    ap.add_argument("--level", type=int, help="Only return this level")
+    args = ap.parse_args()
+
+    index_path = Path(args.index)
+    if not index_path.exists():
+        print("ERROR: index not found at", index_path.resolve())
+        return 1
+    if not args.file and not args.method and not args.action:
+        ap.error("one of --file, --method or --action is required")
+
+    conn, levels = open_index(index_path)
+    if args.action:
+        result = query_action(conn, args.action, args.file)
+    elif args.method:
+        result = query_method(conn, levels, args.method, args.file, args.level)
+    else:
+        result = query_file(conn, levels, args.file, args.methods, args.level)
+    conn.close()
+    print(json.dumps(result, indent=2))
+    return 0 if result else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+serve_deps.py
+
+Build the generate_file_sheets.py dependency graph of a workspace once and keep it in memory to answer
+dependency, reverse-dependency, call-chain and endpoint questions in milliseconds, over HTTP/JSON on
+localhost or from a stdin REPL. No workbook is written.
+
+Usage:
+  python serve_deps.py --root <workspace_root> [--levels N] [--host 127.0.0.1] [--port 8765]
+  python serve_deps.py --root <workspace_root> --repl
+
+HTTP (GET, JSON responses; 404 with {} when nothing matches):
+  /deps?file=F[&level=N]        files F depends on, per level
+  /rdeps?file=F[&level=N]       files that depend on F, per level (the level at which they reach F)
+  /calls?file=F[&method=M]      call-chains of the methods declared in F
+  /callers?method=M[&file=F]    methods whose call-chains reach M (declared in F), per level
+  /endpoints?file=F             API actions the HTTP calls of the UI file F reach
+  /action?name=A[&file=F]       UI files whose HTTP calls reach the controller action A (in F)
+  /stats                        projects, files and the time of the last build / reload
+  /reload (GET or POST)         re-read the files changed since the last build or reload
+The REPL takes the same queries as lines: deps F [N], rdeps F [N], calls F [M], callers M [F],
+endpoints F, action A [F], stats, reload, quit.
+
+Paths in requests and responses are relative to --root ('/' separated). A file argument may also be a
+project-relative path, a path suffix or a bare file name (case-insensitive), as in query_deps.py.
+
+reload uses the same incremental update as generate_file_sheets.py --watch (LiveProject): changes are
+picked up through inotify (or an (mtime, size) comparison with --poll) and only the rows that can change
+are recomputed. The reverse indexes behind rdeps / callers / action are built on first use after each
+build or reload.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from generate_file_sheets import (IGNORED_DIRS, LiveProject, find_projects, link_endpoints, list_source_files,
+                                  scan_workspace, update_live_projects)
+from source_watcher import SourceWatcher  # importable once generate_file_sheets put tools/ on sys.path
+
+
+def _join(prefix: str, rel: str) -> str:
+    rel = rel.replace("\\", "/")
+    return f"{prefix}/{rel}" if prefix else rel
+
+
+class DependencyGraph:
+    """The live projects of one workspace plus the lookups the queries need."""
+
+    def __init__(self, root: Path, max_levels: int = 3, poll: bool = False):
+        self.root = root
+        self.max_levels = max_levels
+        start = time.perf_counter()
+        # started before the first scan, so that nothing written while building is missed
+        self.watcher = SourceWatcher(root, skip_dir=lambda d: d.name in IGNORED_DIRS, poll=poll)
+        scan = scan_workspace(root)
+        self.projects = find_projects(root, scan)
+        self.live: Dict[Path, LiveProject] = {
+            proj: LiveProject(proj, list_source_files(proj, scan), max_levels) for proj in self.projects}
+        self._refresh()
+        self.built_s = time.perf_counter() - start
+        self.reloaded_s = None
+
+    def _refresh(self):
+        """Re-link endpoints and rebuild the forward lookups; reverse indexes are dropped until used."""
+        all_rows = []
+        self.rows = {}
+        self.prefix = {}
+        self.by_name = defaultdict(list)
+        self.by_rel = defaultdict(list)
+        for proj in self.projects:
+            pre = os.path.relpath(proj, self.root).replace("\\", "/")
+            pre = "" if pre == "." else pre
+            self.prefix[str(proj)] = pre
+            for row in self.live[proj].ordered_rows():
+                key = _join(pre, row["file"])
+                self.rows[key] = row
+                self.by_rel[row["file"].replace("\\", "/")].append(key)
+                self.by_name[key.rsplit("/", 1)[-1].lower()].append(key)
+                all_rows.append(row)
+        link_endpoints(all_rows)
+        self._reverse_deps = None
+        self._reverse_calls = None
+        self._action_callers = None
+
+    def reload(self):
+        """Apply the files changed since the last build or reload."""
+        start = time.perf_counter()
+        changed = self.watcher.changes()
+        if changed is not None and not changed:
+            return {"changed": 0, "recomputed": 0, "files": len(self.rows), "seconds": time.perf_counter() - start}
+        self.projects, recomputed = update_live_projects(self.root, self.live, changed, self.max_levels)
+        self._refresh()
+        self.reloaded_s = time.perf_counter() - start
+        return {"changed": len(changed) if changed is not None else None, "recomputed": recomputed,
+                "files": len(self.rows), "seconds": self.reloaded_s}
+
+    def stats(self):
+        return {"root": str(self.root), "levels": self.max_levels, "projects": len(self.projects),
+                "files": len(self.rows), "watch": self.watcher.mode, "build_seconds": self.built_s,
+                "last_reload_seconds": self.reloaded_s}
+
+    def close(self):
+        self.watcher.close()
+
+    # --- lookups ---------------------------------------------------------------------------------------
+
+    def find(self, spec: str) -> List[str]:
+        """Keys of the files matching spec: workspace-relative path, project-relative path, path suffix or name."""
+        norm = spec.replace("\\", "/").strip("/")
+        if norm in self.rows:
+            return [norm]
+        if norm in self.by_rel:
+            return list(self.by_rel[norm])
+        keys = self.by_name.get(norm.rsplit("/", 1)[-1].lower(), [])
+        if "/" in norm:
+            keys = [k for k in keys if k.endswith("/" + norm)]
+        return list(keys)
+
+    def _levels(self, only_level: Optional[int]):
+        return [lvl for lvl in range(1, self.max_levels + 1) if only_level in (None, lvl)]
+
+    def _reverse(self):
+        if self._reverse_deps is None:
+            rev = defaultdict(lambda: defaultdict(list))
+            for key, row in self.rows.items():
+                pre = self.prefix[row["project_root"]]
+                for lvl in range(1, self.max_levels + 1):
+                    for dep in row["levels"][lvl]:
+                        rev[_join(pre, dep)][lvl].append(key)
+            self._reverse_deps = rev
+        return self._reverse_deps
+
+    def _callers(self):
+        if self._reverse_calls is None:
+            rev = defaultdict(lambda: defaultdict(list))
+            for key, row in self.rows.items():
+                pre = self.prefix[row["project_root"]]
+                for mname, levels in row["method_calls"].items():
+                    for lvl in range(1, self.max_levels + 1):
+                        for target in levels[lvl]:
+                            f, m = target.split("::", 1)
+                            rev[m][lvl].append((_join(pre, f), f"{key}::{mname}"))
+            self._reverse_calls = rev
+        return self._reverse_calls
+
+    def _actions(self):
+        if self._action_callers is None:
+            by_action = defaultdict(list)
+            for key, row in self.rows.items():
+                for verb, url, api_root, api_file, action, route in row.get("endpoints", []):
+                    by_action[action].append((_join(self.prefix.get(api_root, ""), api_file), key, verb, url, route))
+            self._action_callers = by_action
+        return self._action_callers
+
+    # --- queries ---------------------------------------------------------------------------------------
+
+    def deps(self, spec: str, only_level: Optional[int] = None):
+        result = {}
+        for key in self.find(spec):
+            row = self.rows[key]
+            pre = self.prefix[row["project_root"]]
+            result[key] = {
+                "declared": row["declared"],
+                "levels": {f"Level {lvl}": sorted(_join(pre, d) for d in row["levels"][lvl])
+                           for lvl in self._levels(only_level)},
+            }
+        return result
+
+    def rdeps(self, spec: str, only_level: Optional[int] = None):
+        rev = self._reverse()
+        return {key: {f"Level {lvl}": sorted(rev.get(key, {}).get(lvl, ())) for lvl in self._levels(only_level)}
+                for key in self.find(spec)}
+
+    def calls(self, spec: str, method: Optional[str] = None):
+        result = {}
+        for key in self.find(spec):
+            row = self.rows[key]
+            pre = self.prefix[row["project_root"]]
+            chains = {mname: {f"Level {lvl}": sorted(_join(pre, t) for t in levels[lvl])
+                              for lvl in range(1, self.max_levels + 1)}
+                      for mname, levels in row["method_calls"].items() if method in (None, mname)}
+            if chains:
+                result[key] = chains
+        return result
+
+    def callers(self, method: str, file_spec: Optional[str] = None):
+        wanted = set(self.find(file_spec)) if file_spec else None
+        result = {}
+        for lvl, entries in sorted(self._callers().get(method, {}).items()):
+            for target_file, caller in entries:
+                if wanted is None or target_file in wanted:
+                    result.setdefault(f"{target_file}::{method}", {}).setdefault(f"Level {lvl}", []).append(caller)
+        for levels in result.values():
+            for callers in levels.values():
+                callers.sort()
+        return result
+
+    def endpoints(self, spec: str):
+        result = {}
+        for key in self.find(spec):
+            row = self.rows[key]
+            if row.get("endpoints"):
+                result[key] = [{"http_method": verb, "url": url, "api_file": _join(self.prefix.get(api_root, ""), api_file),
+                                "action": action, "route": route}
+                               for verb, url, api_root, api_file, action, route in row["endpoints"]]
+        return result
+
+    def action(self, name: str, file_spec: Optional[str] = None):
+        wanted = set(self.find(file_spec)) if file_spec else None
+        result = {}
+        for api_file, ui_file, verb, url, route in self._actions().get(name, ()):
+            if wanted is None or api_file in wanted:
+                result.setdefault(f"{api_file}::{name}", []).append(
+                    {"file": ui_file, "http_method": verb, "url": url, "route": route})
+        return result
+
+
+def run_query(graph: DependencyGraph, command: str, args: Dict[str, str]):
+    """Dispatch one query; raises ValueError for an unknown command or missing argument."""
+    def arg(name, required=True):
+        value = args.get(name)
+        if required and not value:
+            raise ValueError(f"{command} needs {name}")
+        return value
+
+    def level():
+        value = args.get("level")
+        return int(value) if value else None
+
+    if command == "deps":
+        return graph.deps(arg("file"), level())
+    if command == "rdeps":
+        return graph.rdeps(arg("file"), level())
+    if command == "calls":
+        return graph.calls(arg("file"), arg("method", False))
+    if command == "callers":
+        return graph.callers(arg("method"), arg("file", False))
+    if command == "endpoints":
+        return graph.endpoints(arg("file"))
+    if command == "action":
+        return graph.action(arg("name"), arg("file", False))
+    if command == "stats":
+        return graph.stats()
+    if command == "reload":
+        return graph.reload()
+    raise ValueError(f"unknown query {command!r}")
+
+
+# positional REPL arguments per command
+REPL_ARGS = {"deps": ("file", "level"), "rdeps": ("file", "level"), "calls": ("file", "method"),
+             "callers": ("method", "file"), "endpoints": ("file",), "action": ("name", "file"),
+             "stats": (), "reload": ()}
+
+
+def serve_http(graph: DependencyGraph, host: str, port: int):
+    class Handler(BaseHTTPRequestHandler):
+        def _answer(self):
+            url = urlparse(self.path)
+            command = url.path.strip("/")
+            args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                result = run_query(graph, command, args)
+                status = 200 if result or command in ("stats", "reload") else 404
+            except ValueError as exc:
+                result, status = {"error": str(exc)}, 400
+            body = json.dumps(result, indent=2).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = _answer
+        do_POST = _answer
+
+        def log_message(self, fmt, *args):
+            pass
+
+    # one request at a time: reload mutates the graph the queries read
+    server = HTTPServer((host, port), Handler)
+    print(f"Serving {graph.root} on http://{host}:{server.server_port}/ ({len(graph.rows)} files); press Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped.")
+    finally:
+        server.server_close()
+
+
+def serve_repl(graph: DependencyGraph):
+    print(f"{len(graph.rows)} files loaded; commands: {', '.join(REPL_ARGS)}, quit", file=sys.stderr)
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        command = parts[0].lower()
+        if command in ("quit", "exit"):
+            break
+        args = dict(zip(REPL_ARGS.get(command, ()), parts[1:]))
+        try:
+            print(json.dumps(run_query(graph, command, args), indent=2), flush=True)
+        except ValueError as exc:
+            print(json.dumps({"error": str(exc)}), flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", required=True, help="Workspace root to scan")
+    ap.add_argument("--levels", type=int, default=3, help="Max dependency levels to compute")
+    ap.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    ap.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765, 0 picks a free one)")
+    ap.add_argument("--repl", action="store_true", help="Answer queries read from stdin instead of serving HTTP")
+    ap.add_argument("--poll", action="store_true", help="Detect changes for reload by polling instead of inotify")
+    args = ap.parse_args()
+
+    root = Path(args.root).resolve()
+    if not root.is_dir():
+        print("ERROR: root not found at", root)
+        return 1
+    graph = DependencyGraph(root, args.levels, poll=args.poll)
+    print(f"Loaded {len(graph.projects)} projects, {len(graph.rows)} files in {graph.built_s:.2f}s", file=sys.stderr)
+    try:
+        if args.repl:
+            serve_repl(graph)
+        else:
+            serve_http(graph, args.host, args.port)
+    finally:
+        graph.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
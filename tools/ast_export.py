@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for the output of the Roslyn exporter (api_exporter/Program.cs), used by the
+--from-ast modes of generate_imports_from_source.py and api_exporter/generate_file_sheets.py.
+
+The exporter writes <out>/api/summary.json ({"mode", "total_files", "files": [{"Path", ...}]}) and one
+<out>/api/files/<Path>.json per C# file (path, absolutePath, namespaces, usings, declaredTypes,
+symbols with controllers / classes / interfaces and their methods, parameters, fields, bodyText,
+methodCalls, ...). The summary elements are anonymous objects with PascalCase keys while the file
+entries use camelCase; entries are handed out with camelCase top-level and symbols keys either way.
+
+summary.json is read incrementally: only one element of its "files" array is decoded at a time, so
+a summary that inlines whole file entries (bodyText included) never has to fit in memory. A summary
+element that is a full file entry is used as is; otherwise the per-file JSON it names is loaded.
+Either way iter_entries() hands out one entry at a time and callers keep only the facts they derive
+from it.
+"""
+import json
+import os
+from pathlib import Path
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _Stream:
+    """Chunked text reader with a decode window; the consumed prefix of the window is dropped."""
+
+    def __init__(self, fh, chunk_size):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size):
+        data = self.fh.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of input), without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(self.chunk_size):
+                return ''
+
+    def expect(self, chars):
+        ch = self.peek()
+        if ch == '' or ch not in chars:
+            raise ValueError(f'expected one of {chars!r}, found {ch or "end of input"!r}')
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """Decode the next JSON value, reading more input (in growing chunks) until it is complete."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self._fill(size):
+                    raise
+                # a large value: grow the read size so it is not re-decoded once per chunk
+                size *= 2
+                continue
+            # a number at the end of the window may continue in the next chunk
+            if end == len(self.buf) and not self.eof and self._fill(size):
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_json_array(path, key, chunk_size=1 << 20):
+    """Yield the elements of the array stored under key in the top-level JSON object of path, one at
+    a time. Other top-level values are decoded and discarded. Yields nothing when key is absent."""
+    with open(path, 'r', encoding='utf-8-sig') as fh:
+        s = _Stream(fh, chunk_size)
+        s.expect('{')
+        if s.peek() == '}':
+            return
+        while True:
+            name = s.value()
+            s.expect(':')
+            if name == key and s.peek() == '[':
+                s.expect('[')
+                if s.peek() != ']':
+                    while True:
+                        yield s.value()
+                        if s.expect(',]') == ']':
+                            break
+                else:
+                    s.expect(']')
+            else:
+                s.value()
+            if s.expect(',}') == '}':
+                return
+
+
+def _camel(key):
+    return key[:1].lower() + key[1:]
+
+
+def _normalize(entry):
+    """The entry with camelCase top-level and symbols keys (as the exporter names them)."""
+    entry = {_camel(k): v for k, v in entry.items()}
+    if isinstance(entry.get('symbols'), dict):
+        entry['symbols'] = {_camel(k): v for k, v in entry['symbols'].items()}
+    return entry
+
+
+def _entry_is_complete(item):
+    return 'declaredTypes' in item or 'symbols' in item
+
+
+class AstExport:
+    """One exporter output directory: the directory passed to AstExporter --output, its api/
+    subdirectory or the directory holding summary.json."""
+
+    def __init__(self, path):
+        path = Path(path)
+        for d in (path / 'api', path):
+            if (d / 'summary.json').is_file():
+                self.api_dir = d
+                break
+        else:
+            raise FileNotFoundError(f'no summary.json in {path} or {path / "api"}')
+        self.summary = self.api_dir / 'summary.json'
+        self.files_dir = self.api_dir / 'files'
+        self.missing = 0
+
+    def entry_file(self, rel):
+        return self.files_dir / (rel.replace('\\', '/') + '.json')
+
+    def iter_entries(self):
+        """Yield every file entry listed in summary.json (in summary order). Entries whose per-file
+        JSON is missing or unreadable are skipped and counted in self.missing."""
+        for item in iter_json_array(self.summary, 'files'):
+            item = _normalize(item) if isinstance(item, dict) else {}
+            if _entry_is_complete(item):
+                yield item
+                continue
+            rel = item.get('path')
+            if not rel:
+                self.missing += 1
+                continue
+            try:
+                with open(self.entry_file(rel), 'r', encoding='utf-8-sig') as fh:
+                    entry = json.load(fh)
+            except (OSError, ValueError):
+                self.missing += 1
+                continue
+            if not isinstance(entry, dict):
+                self.missing += 1
+                continue
+            yield _normalize(entry)
+
+
+def entry_path(entry, root: Path):
+    """Absolute path of an entry's source file: absolutePath when it lies below root, else root/path
+    (the export may come from another machine or checkout)."""
+    rel = (entry.get('path') or '').replace('\\', '/')
+    absolute = entry.get('absolutePath')
+    if absolute:
+        p = Path(os.path.normpath(absolute.replace('\\', os.sep)))
+        try:
+            p.relative_to(root)
+            return p
+        except ValueError:
+            pass
+    return Path(os.path.normpath(os.path.join(str(root), *rel.split('/'))))
+
+
+def entry_root(entry):
+    """The root AstExporter scanned, recovered from an entry's absolutePath and path (None if unknown)."""
+    absolute = (entry.get('absolutePath') or '').replace('\\', '/')
+    rel = (entry.get('path') or '').replace('\\', '/')
+    if not absolute or not rel or not absolute.endswith(rel):
+        return None
+    return Path(os.path.normpath(absolute[:len(absolute) - len(rel)] or '/'))
+
+
+def entry_types(entry):
+    """The entry's class-like symbols (controllers, classes, interfaces) as the exporter wrote them."""
+    symbols = entry.get('symbols') or {}
+    for key in ('controllers', 'classes', 'interfaces'):
+        for info in symbols.get(key) or ():
+            yield info
+
+
+def entry_methods(entry):
+    """(method, declaring type) for every method of the entry's classes, controllers and interfaces."""
+    for info in entry_types(entry):
+        for method in info.get('methods') or ():
+            yield method, info
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark the declaration scanner of generate_imports_from_source.py on a corpus of pathological inputs.
+
+Each corpus entry is a generator of C#-like text of a given size that is known to be a worst case for
+regex-based declaration heuristics (long whitespace runs, long generic signatures without a terminator,
+minified one-line files, unclosed parameter attributes, ...). For every entry and size the script times
+the declaration extractors (parse_declared_types_and_methods + parse_field_and_param_types) and the full
+per-file extraction (extract_file_facts), and prints the growth factor between consecutive sizes; with
+linear scanning doubling the size roughly doubles the time.
+
+Usage:
+  python tools/bench_declaration_scanner.py
+  python tools/bench_declaration_scanner.py --sizes 10000 20000 40000 80000 --repeat 3
+  python tools/bench_declaration_scanner.py --legacy           # also time the former heuristics (small sizes, with a timeout)
+  python tools/bench_declaration_scanner.py --write-corpus bench_corpus/   # dump the corpus as .cs files
+
+--write-corpus writes one file per entry at the largest size, so the corpus can also be fed to
+generate_imports_from_source.py --source-root bench_corpus/.
+"""
+import argparse
+import multiprocessing
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import generate_imports_from_source as gis
+
+
+# name -> (description, text generator taking a size in characters)
+CORPUS = {
+    'whitespace_run': (
+        'modifier followed by a long whitespace run and no terminator',
+        lambda n: 'public' + ' ' * n + 'x'),
+    'modifier_run': (
+        'many modifiers in a row with no terminator (every one starts a new match attempt)',
+        lambda n: 'public static ' * (n // 14)),
+    'padded_generic_signature': (
+        'column-aligned nested generic return type that never reaches a parameter list',
+        lambda n: 'public static ' + ('Dictionary<string,' + ' ' * 32) * (n // 50) + 'int' + '>' * (n // 50) + ' Get'),
+    'unclosed_generic_field': (
+        'field whose generic type is never closed on its line',
+        lambda n: 'private readonly ' + 'List<' * (n // 5) + 'int _items;\n'),
+    'minified_members': (
+        'generated one-line class body with modifiers but no terminators',
+        lambda n: 'public partial class Generated { ' + 'public int, ' * (n // 12) + '}'),
+    'long_signature': (
+        'method with very many generic parameters in its return type',
+        lambda n: ('public async Task<Tuple<' + ', '.join('T%d' % i for i in range(n // 5)) + '>> Run(int a)'
+                   + ' { }\n')),
+    'unclosed_attributes': (
+        'parameter list full of unclosed attribute brackets',
+        lambda n: 'public void Handle(' + '[' * n + ' int x) { }\n'),
+    'many_small_methods': (
+        'ordinary but very long file of short members (baseline)',
+        lambda n: 'namespace Bench {\npublic class Big {\n'
+                  + ''.join('    public int M%d(List<int> a, [FromBody] Dto b) => 1;\n' % i for i in range(n // 55))
+                  + '}\n}\n'),
+}
+
+
+# the pre-scanner heuristics, kept here only to show the difference (--legacy)
+def legacy_declared_methods(text):
+    methods = []
+    for m in re.finditer(r"\b(?:public|private|protected|internal|static|async|protected internal|internal protected)\s+[A-Za-z0-9_<>,\s\[\]]+\s+([A-Za-z0-9_]+)\s*\(", text):
+        methods.append(m.group(1))
+    return methods
+
+
+def legacy_field_and_param_types(text):
+    types = set()
+    for m in re.finditer(r"\b(?:public|private|protected|internal|static|readonly|volatile|const)\s+([A-Za-z0-9_<>.,\s\[\]]+)\s+[A-Za-z0-9_]+\s*(?:=|;)", text):
+        t = m.group(1).strip()
+        tshort = re.sub(r"<.*>$", "", t).split()[-1]
+        if tshort:
+            types.add(tshort)
+    for m in re.finditer(r"\b(?:public|private|protected|internal|static|async|protected internal|internal protected)\s+[A-Za-z0-9_<>,\s\[\]]+\s+[A-Za-z0-9_]+\s*\(([^)]*)\)", text):
+        plist = m.group(1)
+        if not plist:
+            continue
+        for p in plist.split(','):
+            p = p.strip()
+            if not p:
+                continue
+            p = re.sub(r"\[[^\]]+\]", "", p).strip()
+            p = re.sub(r"\b(ref|out|in|params)\b", "", p).strip()
+            parts = p.split()
+            if len(parts) >= 2:
+                types.add(re.sub(r"<.*>$", "", parts[0]))
+    return types
+
+
+def run_scanner(text):
+    gis.parse_declared_types_and_methods(text)
+    gis.parse_field_and_param_types(text)
+
+
+def run_legacy(text):
+    legacy_declared_methods(text)
+    legacy_field_and_param_types(text)
+
+
+def best_of(fn, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def time_extract(path, repeat):
+    return best_of(gis.extract_file_facts, str(path), repeat)
+
+
+def time_legacy(text, timeout):
+    """Time the legacy heuristics in a child process so a catastrophic case can be abandoned."""
+    with multiprocessing.Pool(1) as pool:
+        res = pool.apply_async(best_of, (run_legacy, text, 1))
+        try:
+            return res.get(timeout)
+        except multiprocessing.TimeoutError:
+            pool.terminate()
+            return None
+
+
+def fmt_time(sec):
+    return 'timeout' if sec is None else f'{sec * 1000:9.2f}ms'
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[25000, 50000, 100000, 200000],
+                    help='Input sizes (characters) per corpus entry')
+    ap.add_argument('--repeat', type=int, default=3, help='Best of N timings')
+    ap.add_argument('--only', nargs='+', choices=sorted(CORPUS), help='Only run these corpus entries')
+    ap.add_argument('--legacy', action='store_true', help='Also time the former backtracking heuristics')
+    ap.add_argument('--legacy-sizes', type=int, nargs='+', default=[1000, 2000, 4000, 8000],
+                    help='Sizes for --legacy (kept small: the legacy heuristics are super-linear)')
+    ap.add_argument('--legacy-timeout', type=float, default=10.0, help='Seconds before a legacy run is abandoned')
+    ap.add_argument('--write-corpus', help='Write the corpus (largest size) as .cs files into this directory')
+    args = ap.parse_args()
+
+    names = args.only or list(CORPUS)
+    if args.write_corpus:
+        out_dir = Path(args.write_corpus)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name in names:
+            (out_dir / f'{name}.cs').write_text(CORPUS[name][1](max(args.sizes)), encoding='utf-8')
+        print(f'Wrote {len(names)} files to {out_dir}')
+
+    worst = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            desc, make = CORPUS[name]
+            print(f'{name}: {desc}')
+            print(f'  {"size":>9}  {"scanner":>11}  {"growth":>6}  {"extract":>11}  {"growth":>6}')
+            prev = None
+            for size in args.sizes:
+                text = make(size)
+                path = Path(tmp) / f'{name}.cs'
+                path.write_text(text, encoding='utf-8')
+                scan = best_of(run_scanner, text, args.repeat)
+                extract = time_extract(path, args.repeat)
+                worst = max(worst, extract / max(len(text), 1))
+                if prev:
+                    growth = (f'{scan / prev[0]:6.2f}', f'{extract / prev[1]:6.2f}')
+                else:
+                    growth = ('', '')
+                print(f'  {len(text):>9}  {fmt_time(scan)}  {growth[0]:>6}  {fmt_time(extract)}  {growth[1]:>6}')
+                prev = (max(scan, 1e-9), max(extract, 1e-9))
+            if args.legacy:
+                prev = None
+                for size in args.legacy_sizes:
+                    text = make(size)
+                    legacy = time_legacy(text, args.legacy_timeout)
+                    growth = f'{legacy / prev:6.2f}' if legacy is not None and prev else ''
+                    print(f'  {len(text):>9}  {fmt_time(legacy)}  {growth:>6}  (legacy)')
+                    if legacy is None:
+                        break
+                    prev = max(legacy, 1e-9)
+    print(f'Worst full extraction cost: {worst * 1e6:.2f}us per character')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Benchmark generate_imports_from_source.py and api_exporter/generate_file_sheets.py on synthetic
+.NET + Angular workspaces.
+
+For every scale (number of source files) a workspace is generated under --workdir (reused when it
+already exists for that scale and seed): ASP.NET-style modules (one .csproj each) with controllers,
+services, interfaces, repositories, DTOs and a DependencyInjection.cs registering the services, and an
+Angular app (package.json + tsconfig.json with path aliases) with feature folders of components,
+services, models and barrel index files that import each other through relative paths and the aliases.
+Cross-module usings / imports are drawn from a seeded generator, so a given scale and seed always
+produce the same tree.
+
+Each scanner then runs once per scale in a fresh process (so peak RSS is per run):
+  imports  - generate_imports_from_source.main (phases: discover, extract, index, imports, save)
+  sheets   - generate_file_sheets.scan_workspace + process_project for every project
+             (phases: discover, index, adjacency, rows; the workbook is not written)
+and the wall / CPU time and throughput of every phase, total files/s and peak RSS are printed and
+written to --output as JSON. --compare prints the change against an earlier results file.
+
+Usage:
+  python tools/bench_scanners.py                                  # 1k files, both scanners
+  python tools/bench_scanners.py --scales 1000 10000 100000 --output bench_results.json
+  python tools/bench_scanners.py --scanners imports --workers 4 --compare old_results.json
+  python tools/bench_scanners.py --generate-only --scales 10000   # just write the workspace
+
+generate_file_sheets.py needs openpyxl importable even though no workbook is written.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from phase_timer import PhaseTimer, peak_rss_mb
+
+TOOLS_DIR = Path(__file__).resolve().parent
+RESULTS_SCHEMA_VERSION = 1
+
+# files per generated unit: a .NET feature (interface, service, repository, controller, DTO) and an
+# Angular feature (component, service, model, barrel index.ts)
+CS_FEATURE_FILES = 5
+TS_FEATURE_FILES = 4
+# features per .csproj module
+FEATURES_PER_MODULE = 40
+# share of the files that are C#
+CS_SHARE = 0.6
+
+DOMAIN_WORDS = ['Patient', 'Order', 'Invoice', 'Claim', 'Provider', 'Schedule', 'Payment', 'Document',
+                'Report', 'Account', 'Referral', 'Encounter', 'Audit', 'Notification', 'Inventory', 'Lab']
+
+
+def feature_name(i):
+    return f'{DOMAIN_WORDS[i % len(DOMAIN_WORDS)]}{i // len(DOMAIN_WORDS)}'
+
+
+def kebab(name):
+    return ''.join('-' + c.lower() if c.isupper() and n else c.lower() for n, c in enumerate(name))
+
+
+def cs_feature_files(module, feature, deps):
+    """(relative path, text) of one .NET feature; deps are (module, feature) pairs its service uses."""
+    ns = f'Company.{module}'
+    usings = sorted({f'Company.{m}.Interfaces' for m, _ in deps} | {f'Company.{m}.Models' for m, _ in deps})
+    using_block = ''.join(f'using {u};\n' for u in usings)
+    dep_fields = ''.join(f'        private readonly I{d}Service _{d[0].lower() + d[1:]}Service;\n' for _, d in deps)
+    dep_params = ', '.join(f'I{d}Service {d[0].lower() + d[1:]}Service' for _, d in deps)
+    dep_assign = ''.join(f'            _{d[0].lower() + d[1:]}Service = {d[0].lower() + d[1:]}Service;\n' for _, d in deps)
+    dep_calls = ''.join(f'            var {d[0].lower() + d[1:]} = await _{d[0].lower() + d[1:]}Service.Get{d}Async(id);\n'
+                        for _, d in deps)
+    ctor_params = f'I{feature}Repository repository' + (', ' + dep_params if dep_params else '')
+    return [
+        (f'{module}/Interfaces/I{feature}Service.cs', f'''using System.Collections.Generic;
+using System.Threading.Tasks;
+using {ns}.Models;
+
+namespace {ns}.Interfaces
+{{
+    public interface I{feature}Service
+    {{
+        Task<{feature}Dto> Get{feature}Async(int id);
+        Task<IReadOnlyList<{feature}Dto>> List{feature}sAsync(int page, int pageSize);
+        Task Save{feature}Async({feature}Dto dto);
+    }}
+}}
+'''),
+        (f'{module}/Services/{feature}Service.cs', f'''using System.Collections.Generic;
+using System.Linq;
+using System.Threading.Tasks;
+using {ns}.Interfaces;
+using {ns}.Models;
+using {ns}.Repositories;
+{using_block}
+namespace {ns}.Services
+{{
+    public class {feature}Service : I{feature}Service
+    {{
+        private readonly I{feature}Repository _repository;
+{dep_fields}
+        public {feature}Service({ctor_params})
+        {{
+            _repository = repository;
+{dep_assign}        }}
+
+        public async Task<{feature}Dto> Get{feature}Async(int id)
+        {{
+{dep_calls}            var entity = await _repository.FindAsync(id);
+            return Map(entity);
+        }}
+
+        public async Task<IReadOnlyList<{feature}Dto>> List{feature}sAsync(int page, int pageSize)
+        {{
+            var items = await _repository.PageAsync(page, pageSize);
+            return items.Select(Map).ToList();
+        }}
+
+        public Task Save{feature}Async({feature}Dto dto)
+        {{
+            var entity = new {feature}Dto {{ Id = dto.Id, Name = dto.Name.Trim() }};
+            return _repository.SaveAsync(entity);
+        }}
+
+        private static {feature}Dto Map({feature}Dto entity)
+        {{
+            return new {feature}Dto {{ Id = entity.Id, Name = entity.Name }};
+        }}
+    }}
+}}
+'''),
+        (f'{module}/Repositories/{feature}Repository.cs', f'''using System.Collections.Generic;
+using System.Threading.Tasks;
+using {ns}.Models;
+
+namespace {ns}.Repositories
+{{
+    public interface I{feature}Repository
+    {{
+        Task<{feature}Dto> FindAsync(int id);
+        Task<List<{feature}Dto>> PageAsync(int page, int pageSize);
+        Task SaveAsync({feature}Dto entity);
+    }}
+
+    public class {feature}Repository : I{feature}Repository
+    {{
+        private readonly Dictionary<int, {feature}Dto> _store = new Dictionary<int, {feature}Dto>();
+
+        public Task<{feature}Dto> FindAsync(int id)
+        {{
+            _store.TryGetValue(id, out var entity);
+            return Task.FromResult(entity);
+        }}
+
+        public Task<List<{feature}Dto>> PageAsync(int page, int pageSize)
+        {{
+            return Task.FromResult(new List<{feature}Dto>(_store.Values));
+        }}
+
+        public Task SaveAsync({feature}Dto entity)
+        {{
+            _store[entity.Id] = entity;
+            return Task.CompletedTask;
+        }}
+    }}
+}}
+'''),
+        (f'{module}/Controllers/{feature}Controller.cs', f'''using System.Threading.Tasks;
+using Microsoft.AspNetCore.Mvc;
+using {ns}.Interfaces;
+using {ns}.Models;
+
+namespace {ns}.Controllers
+{{
+    [ApiController]
+    [Route("api/{kebab(feature)}")]
+    public class {feature}Controller : ControllerBase
+    {{
+        private readonly I{feature}Service _service;
+
+        public {feature}Controller(I{feature}Service service)
+        {{
+            _service = service;
+        }}
+
+        [HttpGet("{{id}}")]
+        public async Task<IActionResult> Get(int id)
+        {{
+            var dto = await _service.Get{feature}Async(id);
+            return dto == null ? NotFound() : Ok(dto);
+        }}
+
+        [HttpGet]
+        public async Task<IActionResult> List([FromQuery] int page = 1, [FromQuery] int pageSize = 20)
+        {{
+            return Ok(await _service.List{feature}sAsync(page, pageSize));
+        }}
+
+        [HttpPost]
+        public async Task<IActionResult> Save([FromBody] {feature}Dto dto)
+        {{
+            await _service.Save{feature}Async(dto);
+            return NoContent();
+        }}
+    }}
+}}
+'''),
+        (f'{module}/Models/{feature}Dto.cs', f'''namespace {ns}.Models
+{{
+    public class {feature}Dto
+    {{
+        public int Id {{ get; set; }}
+        public string Name {{ get; set; }}
+    }}
+}}
+'''),
+    ]
+
+
+def cs_registration_file(module, features):
+    ns = f'Company.{module}'
+    lines = ''.join(f'            services.AddScoped<I{f}Service, {f}Service>();\n'
+                    f'            services.AddScoped<I{f}Repository, {f}Repository>();\n' for f in features)
+    return (f'{module}/DependencyInjection.cs', f'''using Microsoft.Extensions.DependencyInjection;
+using {ns}.Interfaces;
+using {ns}.Repositories;
+using {ns}.Services;
+
+namespace {ns}
+{{
+    public static class DependencyInjection
+    {{
+        public static IServiceCollection Add{module}(this IServiceCollection services)
+        {{
+{lines}            return services;
+        }}
+    }}
+}}
+''')
+
+
+def ts_feature_files(feature, deps):
+    """(relative path, text) of one Angular feature below src/app/features; deps are features whose
+    models and services it uses."""
+    k = kebab(feature)
+    dep_imports = ''.join(f"import {{ {d}Model }} from '../{kebab(d)}/{kebab(d)}.model';\n" for d in deps)
+    dep_service_imports = ''.join(f"import {{ {d}Service }} from '@features/{kebab(d)}';\n" for d in deps)
+    dep_ctor = ''.join(f', private {d[0].lower() + d[1:]}Service: {d}Service' for d in deps)
+    dep_fields = ''.join(f'  {d[0].lower() + d[1:]}?: {d}Model;\n' for d in deps)
+    return [
+        (f'{k}/{k}.model.ts', f'''{dep_imports}
+export interface {feature}Model {{
+  id: number;
+  name: string;
+{dep_fields}}}
+'''),
+        (f'{k}/{k}.service.ts', f'''import {{ Injectable }} from '@angular/core';
+import {{ HttpClient }} from '@angular/common/http';
+import {{ Observable }} from 'rxjs';
+import {{ {feature}Model }} from './{k}.model';
+import {{ ApiConfig }} from '@shared/api-config';
+
+@Injectable({{ providedIn: 'root' }})
+export class {feature}Service {{
+  constructor(private http: HttpClient) {{}}
+
+  get(id: number): Observable<{feature}Model> {{
+    return this.http.get<{feature}Model>(`${{ApiConfig.baseUrl}}/api/{k}/${{id}}`);
+  }}
+
+  list(page = 1): Observable<{feature}Model[]> {{
+    return this.http.get<{feature}Model[]>(`${{ApiConfig.baseUrl}}/api/{k}?page=${{page}}`);
+  }}
+
+  save(model: {feature}Model): Observable<void> {{
+    return this.http.post<void>(`${{ApiConfig.baseUrl}}/api/{k}`, model);
+  }}
+}}
+'''),
+        (f'{k}/{k}.component.ts', f'''import {{ Component, OnInit }} from '@angular/core';
+import {{ {feature}Service }} from './{k}.service';
+import {{ {feature}Model }} from './{k}.model';
+{dep_service_imports}
+@Component({{
+  selector: 'app-{k}',
+  templateUrl: './{k}.component.html',
+}})
+export class {feature}Component implements OnInit {{
+  items: {feature}Model[] = [];
+
+  constructor(private service: {feature}Service{dep_ctor}) {{}}
+
+  ngOnInit(): void {{
+    this.service.list().subscribe(items => (this.items = items));
+  }}
+}}
+'''),
+        (f'{k}/index.ts', f'''export * from './{k}.model';
+export * from './{k}.service';
+export {{ {feature}Component }} from './{k}.component';
+'''),
+    ]
+
+
+TS_SHARED = [
+    ('shared/api-config.ts', "export const ApiConfig = { baseUrl: '/backend' };\n"),
+]
+TSCONFIG = '''{
+  // generated by bench_scanners.py
+  "compilerOptions": {
+    "baseUrl": "./",
+    "paths": {
+      "@shared/*": ["src/app/shared/*"],
+      "@features/*": ["src/app/features/*"],
+    },
+  },
+}
+'''
+
+
+def generate_workspace(root: Path, n_files: int, seed: int = 0):
+    """Write a synthetic workspace of (about) n_files source files below root; returns the number of
+    source files written."""
+    rng = random.Random(seed)
+    n_cs_features = max(1, round(n_files * CS_SHARE / CS_FEATURE_FILES))
+    n_ts_features = max(1, round(n_files * (1 - CS_SHARE) / TS_FEATURE_FILES))
+    written = 0
+
+    backend = root / 'Backend'
+    modules = [f'Module{m}' for m in range((n_cs_features + FEATURES_PER_MODULE - 1) // FEATURES_PER_MODULE)]
+    features = [(modules[i // FEATURES_PER_MODULE], feature_name(i)) for i in range(n_cs_features)]
+    for module in modules:
+        (backend / module).mkdir(parents=True, exist_ok=True)
+        (backend / module / f'Company.{module}.csproj').write_text('<Project Sdk="Microsoft.NET.Sdk.Web" />\n')
+    for i, (module, feature) in enumerate(features):
+        # services call up to two earlier features, mostly in their own module
+        deps = rng.sample(features[:i], min(i, rng.randint(0, 2)))
+        for rel, text in cs_feature_files(module, feature, deps):
+            path = backend / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+            written += 1
+    for module in modules:
+        rel, text = cs_registration_file(module, [f for m, f in features if m == module])
+        (backend / rel).write_text(text)
+        written += 1
+
+    frontend = root / 'Frontend'
+    app = frontend / 'src' / 'app'
+    frontend.mkdir(parents=True, exist_ok=True)
+    (frontend / 'package.json').write_text('{ "name": "bench-frontend", "private": true }\n')
+    (frontend / 'tsconfig.json').write_text(TSCONFIG)
+    for rel, text in TS_SHARED:
+        (app / rel).parent.mkdir(parents=True, exist_ok=True)
+        (app / rel).write_text(text)
+        written += 1
+    ts_features = [feature_name(i) for i in range(n_ts_features)]
+    for i, feature in enumerate(ts_features):
+        deps = rng.sample(ts_features[:i], min(i, rng.randint(0, 3)))
+        for rel, text in ts_feature_files(feature, deps):
+            path = app / 'features' / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+            written += 1
+    return written
+
+
+def ensure_workspace(workdir: Path, n_files: int, seed: int):
+    """Generated workspace for this scale and seed, written only when missing."""
+    root = workdir / f'workspace_{n_files}_s{seed}'
+    marker = root / '.bench_complete'
+    if not marker.exists():
+        if root.exists():
+            shutil.rmtree(root)
+        written = generate_workspace(root, n_files, seed)
+        marker.write_text(str(written))
+    return root, int(marker.read_text())
+
+
+def run_imports(root: str, workers: int, extensions: str, fmt: str, use_cache: bool):
+    """One generate_imports_from_source.main run (in a fresh process); returns its measurements."""
+    import generate_imports_from_source as gis
+
+    timer = PhaseTimer()
+    with tempfile.TemporaryDirectory() as out_dir:
+        argv = ['--source-root', root, '--output', str(Path(out_dir) / 'imports'), '--format', fmt,
+                '--workers', str(workers), '--extensions', extensions]
+        if use_cache:
+            argv += ['--cache', str(Path(root) / '.bench_fact_cache.sqlite')]
+        else:
+            argv.append('--no-cache')
+        # the script's own progress output would drown the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            gis.main(argv, timer=timer)
+    return timer.report(), timer.total_wall_s(), peak_rss_mb()
+
+
+def run_sheets(root: str, levels: int):
+    """generate_file_sheets discovery and process_project for every project (in a fresh process)."""
+    sys.path.insert(0, str(TOOLS_DIR / 'api_exporter'))
+    import generate_file_sheets as gfs
+
+    timer = PhaseTimer()
+    with timer.phase('discover') as stats:
+        scan = gfs.scan_workspace(Path(root))
+        projects = gfs.find_projects(Path(root), scan)
+        stats['files'] = sum(len(lst) for lst in scan['files'].values())
+    for proj in projects:
+        gfs.process_project(proj, max_levels=levels, files=gfs.list_source_files(proj, scan), timer=timer)
+    return timer.report(), timer.total_wall_s(), peak_rss_mb()
+
+
+def run_in_fresh_process(fn, *args):
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=TOOLS_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def print_run(run):
+    print(f"{run['scanner']:8} {run['files']:>7} files  {run['wall_s']:8.2f}s  {run['files_per_s']:9.0f} files/s  "
+          f"peak RSS {run['peak_rss_mb'] or 0:.0f} MB")
+    for name, phase in run['phases'].items():
+        rate = f"{phase['files_per_s']:9.0f} files/s" if 'files_per_s' in phase else ''
+        print(f"    {name:10} wall {phase['wall_s']:8.3f}s  cpu {phase['cpu_s'] + phase['child_cpu_s']:8.3f}s  {rate}")
+
+
+def compare(results, baseline):
+    """Print wall-time and peak-RSS changes per (scanner, scale) and phase against a baseline results file."""
+    old = {(r['scanner'], r['scale']): r for r in baseline.get('runs', [])}
+    print(f"Compared with {baseline.get('git_revision') or 'baseline'} ({baseline.get('timestamp', '?')}):")
+    for run in results['runs']:
+        ref = old.get((run['scanner'], run['scale']))
+        if ref is None:
+            continue
+        print(f"{run['scanner']:8} {run['scale']:>7}  wall {ref['wall_s']:.2f}s -> {run['wall_s']:.2f}s "
+              f"({(run['wall_s'] / ref['wall_s'] - 1) * 100 if ref['wall_s'] else 0:+.0f}%)  "
+              f"peak RSS {ref['peak_rss_mb'] or 0:.0f} -> {run['peak_rss_mb'] or 0:.0f} MB")
+        for name, phase in run['phases'].items():
+            ref_phase = ref['phases'].get(name)
+            if ref_phase and ref_phase['wall_s']:
+                print(f"    {name:10} {ref_phase['wall_s']:8.3f}s -> {phase['wall_s']:8.3f}s "
+                      f"({(phase['wall_s'] / ref_phase['wall_s'] - 1) * 100:+.0f}%)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    ap.add_argument('--scales', type=int, nargs='+', default=[1000], help='Workspace sizes in source files (default: 1000)')
+    ap.add_argument('--scanners', nargs='+', choices=['imports', 'sheets'], default=['imports', 'sheets'])
+    ap.add_argument('--seed', type=int, default=0, help='Seed of the workspace generator (default: 0)')
+    ap.add_argument('--workdir', help='Where generated workspaces are kept (default: a temporary directory, removed afterwards)')
+    ap.add_argument('--output', default='bench_results.json', help='Results file (default: bench_results.json)')
+    ap.add_argument('--compare', help='Earlier results file to compare against')
+    ap.add_argument('--workers', type=int, default=1, help='--workers for generate_imports_from_source (default: 1)')
+    ap.add_argument('--extensions', default='.cs,.ts', help='--extensions for generate_imports_from_source (default: .cs,.ts)')
+    ap.add_argument('--format', default='csv', help='--format for generate_imports_from_source (default: csv)')
+    ap.add_argument('--cache', action='store_true', help='Run generate_imports_from_source with its fact cache (the first run fills it)')
+    ap.add_argument('--levels', type=int, default=3, help='Dependency levels for generate_file_sheets (default: 3)')
+    ap.add_argument('--generate-only', action='store_true', help='Only generate the workspaces (needs --workdir)')
+    args = ap.parse_args()
+    if args.generate_only and not args.workdir:
+        ap.error('--generate-only needs --workdir')
+
+    tmp = None if args.workdir else tempfile.TemporaryDirectory(prefix='bench_scanners_')
+    workdir = Path(args.workdir or tmp.name).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    results = {
+        'schema_version': RESULTS_SCHEMA_VERSION,
+        'git_revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'options': {k: getattr(args, k) for k in ('seed', 'workers', 'extensions', 'format', 'cache', 'levels')},
+        'runs': [],
+    }
+    try:
+        for scale in args.scales:
+            start = time.perf_counter()
+            root, n_files = ensure_workspace(workdir, scale, args.seed)
+            print(f'Workspace for {scale} files: {root} ({n_files} source files, ready in {time.perf_counter() - start:.1f}s)')
+            if args.generate_only:
+                continue
+            for scanner in args.scanners:
+                if scanner == 'imports':
+                    phases, wall, rss = run_in_fresh_process(run_imports, str(root), args.workers, args.extensions,
+                                                             args.format, args.cache)
+                else:
+                    phases, wall, rss = run_in_fresh_process(run_sheets, str(root), args.levels)
+                run = {'scanner': scanner, 'scale': scale, 'files': n_files, 'wall_s': wall,
+                       'files_per_s': n_files / wall if wall else None, 'peak_rss_mb': rss, 'phases': phases}
+                results['runs'].append(run)
+                print_run(run)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    if args.generate_only:
+        return 0
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print('Wrote', args.output)
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Cross-stack linking of Angular HttpClient calls to ASP.NET controller actions, used by
+api_exporter/generate_file_sheets.py.
+
+extract_cs_routes() reads the attribute routes of a controller source file ([Route] / [RoutePrefix] on
+the class, [HttpGet("{id}")], [HttpPost], [Route(...)] ... on the actions) and combines them into full
+route templates; [controller] and [action] are substituted, templates starting with / or ~/ ignore the
+controller prefix. The Roslyn exporter only records attribute names, so the templates always come from
+the source. Conventional (non-attribute) routes are not modelled.
+
+extract_ts_http_calls() finds http.get/post/put/delete/patch/head/options/request(...) calls on an
+HttpClient-like receiver (any receiver whose name contains "http") and reduces the URL argument to a
+pattern: string literals, template literals and '+' concatenations are evaluated, identifiers and
+this.fields are resolved through the string assignments of the same file (the last one before the call),
+and anything else becomes a {} placeholder. A placeholder in front of the first literal segment is taken
+as the base URL (environment.apiUrl and the like).
+
+RouteTrie holds every route template of the workspace, one node per path segment (literal segments by
+lower-cased text, one child for parameters, catch-all parameters kept on the node), so each URL is
+matched in one walk down the trie regardless of the number of endpoints. Literal segments win over
+parameters as in ASP.NET routing. A URL behind an unknown base URL may also match below the first one
+or two route segments (e.g. a base URL ending in /api).
+
+link_endpoints() builds the trie from the "routes" of every row and fills in the "endpoints" of every row
+that has "http_calls".
+"""
+import re
+from bisect import bisect_left, bisect_right
+
+# --- C# attribute routes -------------------------------------------------------------------------------
+
+# one attribute list; strings may contain brackets ("api/[controller]")
+CS_ATTR_LIST_RE = re.compile(r'\[(?P<body>(?:[^\[\]"]|"(?:\\.|[^"\\])*")*)\]')
+CS_CLASS_RE = re.compile(r'\bclass\s+(?P<name>[A-Za-z_][A-Za-z0-9_]*)')
+CS_DECL_HEADER_RE = re.compile(r'[^(){};=\[]*')
+CS_IDENT_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+CS_STRING_RE = re.compile(r'^(?:template\s*:\s*|Template\s*=\s*)?@?"((?:\\.|""|[^"\\])*)"$')
+ROUTE_TOKEN_RE = re.compile(r'\[(controller|action)\]', re.IGNORECASE)
+
+HTTP_VERB_ATTRS = {'httpget': 'GET', 'httppost': 'POST', 'httpput': 'PUT', 'httpdelete': 'DELETE',
+                   'httppatch': 'PATCH', 'httphead': 'HEAD', 'httpoptions': 'OPTIONS'}
+ROUTE_ATTRS = {'route', 'routeprefix'}
+ANY_VERB = '*'
+
+
+def _split_top_level(text, sep):
+    """Split text at the sep characters that are not nested in brackets or string literals."""
+    parts = []
+    depth = 0
+    start = 0
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '"\'`':
+            i = _string_end(text, i)
+            continue
+        if ch in '([{':
+            depth += 1
+        elif ch in ')]}':
+            depth -= 1
+        elif ch in sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _string_end(text, i):
+    """Index just past the string literal that starts at text[i] (template literals skip their ${...})."""
+    quote = text[i]
+    i += 1
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == quote:
+            return i + 1
+        if quote == '`' and text.startswith('${', i):
+            i = _expression_end(text, i + 2, '}') + 1
+            continue
+        i += 1
+    return n
+
+
+def _expression_end(text, i, stops):
+    """Index of the first stop character at nesting depth 0 from i on (len(text) if there is none)."""
+    depth = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '"\'`':
+            i = _string_end(text, i)
+            continue
+        if depth == 0 and ch in stops:
+            return i
+        if ch in '([{':
+            depth += 1
+        elif ch in ')]}':
+            depth -= 1
+        i += 1
+    return n
+
+
+# what can start a comment or a string literal
+COMMENT_OR_STRING_RE = re.compile(r'//|/\*|["\'`]')
+
+
+def _verbatim_string_end(text, i):
+    """Index just past the C# verbatim string (@"...", quotes doubled) whose opening quote is text[i]."""
+    i += 1
+    while True:
+        j = text.find('"', i)
+        if j == -1:
+            return len(text)
+        if not text.startswith('""', j):
+            return j + 1
+        i = j + 2
+
+
+def _comment_checker(text, cs=False):
+    """in_comment(pos): whether pos lies in a // or /* */ comment of text. One linear pass that skips
+    string literals (C# verbatim strings when cs), so the // of "http://..." does not start a comment."""
+    spans = []
+    n = len(text)
+    m = COMMENT_OR_STRING_RE.search(text)
+    while m:
+        start = m.start()
+        tok = m.group()
+        if tok == '//':
+            end = text.find('\n', start)
+            end = n if end == -1 else end
+            spans.append((start, end))
+        elif tok == '/*':
+            end = text.find('*/', start + 2)
+            end = n if end == -1 else end + 2
+            spans.append((start, end))
+        elif cs and tok == '"' and '@' in text[max(0, start - 2):start]:
+            end = _verbatim_string_end(text, start)
+        elif cs and tok == '`':
+            end = start + 1
+        else:
+            end = _string_end(text, start)
+        m = COMMENT_OR_STRING_RE.search(text, end)
+    starts = [start for start, _ in spans]
+
+    def in_comment(pos):
+        k = bisect_right(starts, pos) - 1
+        return k >= 0 and pos < spans[k][1]
+    return in_comment
+
+
+def _parse_attributes(body):
+    """[(lower-case attribute name without the Attribute suffix, template or None)] of one attribute list."""
+    attrs = []
+    for part in _split_top_level(body, ','):
+        part = part.strip()
+        if ':' in part.split('(', 1)[0]:
+            # target specifier ([assembly: ...], [return: ...])
+            part = part.split(':', 1)[1].strip()
+        m = CS_IDENT_RE.match(part.split('(', 1)[0].strip().rsplit('.', 1)[-1])
+        if not m:
+            continue
+        name = m.group(0).lower()
+        if name.endswith('attribute'):
+            name = name[:-len('attribute')]
+        template = None
+        if '(' in part:
+            args = part[part.index('(') + 1:part.rindex(')') if ')' in part else len(part)]
+            for arg in _split_top_level(args, ','):
+                sm = CS_STRING_RE.match(arg.strip())
+                if sm:
+                    template = sm.group(1)
+                    break
+        attrs.append((name, template))
+    return attrs
+
+
+def _join_template(prefix, template):
+    if template and template.startswith(('/', '~/')):
+        return template.lstrip('~').strip('/')
+    return '/'.join(p.strip('/') for p in (prefix, template) if p and p.strip('/'))
+
+
+def extract_cs_routes(text):
+    """[(verb, route template, class, method)] for the attribute-routed actions in one C# file
+    (verb is '*' for actions routed by [Route] alone)."""
+    if 'Http' not in text and 'Route' not in text:
+        return []
+    in_comment = _comment_checker(text, cs=True)
+    classes = [(m.start(), m.group('name')) for m in CS_CLASS_RE.finditer(text) if not in_comment(m.start())]
+    class_starts = [pos for pos, _ in classes]
+    class_prefixes = {}
+    routes = []
+    matches = [m for m in CS_ATTR_LIST_RE.finditer(text) if not in_comment(m.start())]
+    k = 0
+    while k < len(matches):
+        # a run of adjacent attribute lists belongs to the same declaration
+        attrs = _parse_attributes(matches[k].group('body'))
+        end = matches[k].end()
+        k += 1
+        while k < len(matches) and not text[end:matches[k].start()].strip():
+            attrs.extend(_parse_attributes(matches[k].group('body')))
+            end = matches[k].end()
+            k += 1
+        if not any(name in ROUTE_ATTRS or name in HTTP_VERB_ATTRS for name, _ in attrs):
+            continue
+        header = CS_DECL_HEADER_RE.match(text, end)
+        stop = text[header.end()] if header.end() < len(text) else ''
+        cm = CS_CLASS_RE.search(header.group(0))
+        if cm:
+            class_prefixes[(end + cm.start(), cm.group('name'))] = [t or '' for name, t in attrs if name in ROUTE_ATTRS]
+            continue
+        idents = CS_IDENT_RE.findall(header.group(0))
+        if stop != '(' or not idents:
+            continue
+        method = idents[-1]
+        c = bisect_left(class_starts, end) - 1
+        if c < 0:
+            continue
+        cls = classes[c]
+        controller = cls[1][:-len('Controller')] if cls[1].endswith('Controller') else cls[1]
+        verbs = [(HTTP_VERB_ATTRS[name], t) for name, t in attrs if name in HTTP_VERB_ATTRS]
+        own = [t for name, t in attrs if name == 'route' and t is not None]
+        pairs = []
+        for verb, t in verbs:
+            pairs.extend([(verb, t)] if t is not None else [(verb, r) for r in own or [None]])
+        if not verbs:
+            pairs = [(ANY_VERB, r) for r in own]
+        seen = set()
+        for verb, t in pairs:
+            for prefix in class_prefixes.get(cls) or ['']:
+                template = _join_template(prefix, t)
+                template = ROUTE_TOKEN_RE.sub(lambda m: controller if m.group(1).lower() == 'controller' else method,
+                                              template)
+                key = (verb, template)
+                if key not in seen:
+                    seen.add(key)
+                    routes.append((verb, template, cls[1], method))
+    return routes
+
+
+# --- TypeScript HttpClient calls -----------------------------------------------------------------------
+
+TS_HTTP_CALL_RE = re.compile(r'\b(?P<recv>[A-Za-z_$][\w$]*)\s*\.\s*'
+                             r'(?P<verb>get|post|put|delete|patch|head|options|request)\s*(?=[<(])')
+TS_ASSIGN_RE = re.compile(r'(?:\bthis\s*\.\s*)?(?<![\w$.])(?P<name>[A-Za-z_$][\w$]*)\s*(?:[?!]?\s*:\s*string\s*)?=(?![=>])')
+TS_REF_RE = re.compile(r'^(?:this\s*\.\s*)?(?P<name>[A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*)$')
+URL_SCHEME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://[^/]*')
+PLACEHOLDER = '{}'
+
+
+def _skip_generic_args(text, i):
+    """Index just past a balanced <...> starting at text[i]."""
+    depth = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == '<':
+            depth += 1
+        elif ch == '>':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        elif ch in ';{}':
+            break
+        i += 1
+    return i
+
+
+def _string_value(literal):
+    body = literal[1:-1]
+    return re.sub(r'\\(.)', r'\1', body)
+
+
+def _url_pattern(expr, lookup, pos, depth=0):
+    """Evaluate a URL expression to a pattern with {} for every part that is not known text."""
+    out = []
+    for term in _split_top_level(expr, '+'):
+        term = term.strip()
+        if not term:
+            continue
+        ch = term[0]
+        if ch in '\'"' and term[-1] == ch and len(term) >= 2:
+            out.append(_string_value(term))
+        elif ch == '`' and term[-1] == '`' and len(term) >= 2:
+            body = term[1:-1]
+            i = 0
+            while i < len(body):
+                j = body.find('${', i)
+                if j < 0:
+                    out.append(body[i:])
+                    break
+                out.append(body[i:j])
+                end = _expression_end(body, j + 2, '}')
+                out.append(_url_pattern(body[j + 2:end], lookup, pos, depth + 1))
+                i = end + 1
+        elif ch == '(' and term[-1] == ')':
+            out.append(_url_pattern(term[1:-1], lookup, pos, depth + 1))
+        else:
+            m = TS_REF_RE.match(term)
+            value = lookup(re.sub(r'\s+', '', m.group('name')), pos) if m and depth < 4 else None
+            out.append(_url_pattern(value, lookup, pos, depth + 1) if value is not None else PLACEHOLDER)
+    return ''.join(out)
+
+
+def _string_assignments(text, in_comment):
+    """{name: [(position, expression)]} for assignments whose value contains a string literal."""
+    assigned = {}
+    for m in TS_ASSIGN_RE.finditer(text):
+        end = _expression_end(text, m.end(), ';,)}]\n')
+        expr = text[m.end():end].strip()
+        if expr and any(q in expr for q in '\'"`') and not in_comment(m.start()):
+            assigned.setdefault(m.group('name'), []).append((m.start(), expr))
+    return assigned
+
+
+def extract_ts_http_calls(text):
+    """[(verb, URL pattern)] for the HttpClient calls of one TS file, in source order."""
+    if 'http' not in text.lower():
+        return []
+    in_comment = _comment_checker(text)
+    assigned = None
+
+    def lookup(name, pos):
+        candidates = assigned.get(name)
+        if not candidates:
+            return None
+        before = [expr for p, expr in candidates if p < pos]
+        return before[-1] if before else candidates[0][1]
+
+    calls = []
+    for m in TS_HTTP_CALL_RE.finditer(text):
+        if 'http' not in m.group('recv').lower() or in_comment(m.start()):
+            continue
+        i = m.end()
+        if text[i] == '<':
+            i = _skip_generic_args(text, i)
+            while i < len(text) and text[i].isspace():
+                i += 1
+            if i >= len(text) or text[i] != '(':
+                continue
+        end = _expression_end(text, i + 1, ')')
+        args = _split_top_level(text[i + 1:end], ',')
+        verb = m.group('verb').upper()
+        if verb == 'REQUEST':
+            # request(method, url, options) or request(new HttpRequest(...))
+            if len(args) < 2 or args[0].strip()[:1] not in '\'"`':
+                continue
+            verb = _string_value(args[0].strip()).upper()
+            args = args[1:]
+        if not args or not args[0].strip():
+            continue
+        if assigned is None:
+            assigned = _string_assignments(text, in_comment)
+        url = _url_pattern(args[0], lookup, m.start())
+        if url.strip() and url.strip() != PLACEHOLDER:
+            calls.append((verb, url.strip()))
+    return calls
+
+
+# --- route trie ----------------------------------------------------------------------------------------
+
+class _Node:
+    __slots__ = ('literal', 'param', 'catch_all', 'endpoints')
+
+    def __init__(self):
+        self.literal = {}
+        self.param = None
+        self.catch_all = []
+        self.endpoints = []
+
+
+def _template_segments(template):
+    return [s for s in template.split('/') if s]
+
+
+def _is_optional(segment):
+    return segment.startswith('{') and ('?}' in segment or '=' in segment)
+
+
+def url_segments(url):
+    """(segments, behind_base_url) of a URL pattern; dynamic segments are '*', query and fragment dropped."""
+    url = url.split('?', 1)[0].split('#', 1)[0]
+    url = URL_SCHEME_RE.sub('', url)
+    segments = [('*' if PLACEHOLDER in s else s) for s in url.split('/') if s and s != '.']
+    based = False
+    while segments and segments[0] == '*':
+        segments.pop(0)
+        based = True
+    return segments, based
+
+
+class RouteTrie:
+    """Route templates by path segment; see the module docstring for the matching rules."""
+
+    def __init__(self):
+        self.root = _Node()
+        self.size = 0
+
+    def add(self, template, endpoint):
+        """endpoint is (verb, ...): the verb is matched against the calling verb ('*' for any)."""
+        node = self.root
+        segments = _template_segments(template)
+        for k, seg in enumerate(segments):
+            if seg.startswith('{*') or seg.startswith('{**'):
+                node.catch_all.append(endpoint)
+                self.size += 1
+                return
+            if all(_is_optional(s) for s in segments[k:]):
+                node.endpoints.append(endpoint)
+            if '{' in seg:
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.literal.setdefault(seg.lower(), _Node())
+        node.endpoints.append(endpoint)
+        self.size += 1
+
+    @staticmethod
+    def _accepts(endpoints, verb):
+        return [e for e in endpoints if e[0] in (verb, ANY_VERB)]
+
+    def _match(self, node, segments, i, verb):
+        if i == len(segments):
+            return self._accepts(node.endpoints, verb) or self._accepts(node.catch_all, verb)
+        seg = segments[i]
+        if seg != '*':
+            child = node.literal.get(seg.lower())
+            if child is not None:
+                found = self._match(child, segments, i + 1, verb)
+                if found:
+                    return found
+            if node.param is not None:
+                found = self._match(node.param, segments, i + 1, verb)
+                if found:
+                    return found
+        else:
+            if node.param is not None:
+                found = self._match(node.param, segments, i + 1, verb)
+                if found:
+                    return found
+            found = []
+            for child in node.literal.values():
+                found.extend(self._match(child, segments, i + 1, verb))
+            if found:
+                return found
+        return self._accepts(node.catch_all, verb)
+
+    def match(self, url, verb):
+        """Endpoints a call with this verb and URL pattern reaches (empty when none)."""
+        segments, based = url_segments(url)
+        if not segments:
+            return []
+        found = self._match(self.root, segments, 0, verb)
+        if found or not based:
+            return found
+        # the base URL may end in the first route segment(s): try one and two levels down
+        frontier = [self.root]
+        for _ in range(2):
+            frontier = [c for n in frontier for c in list(n.literal.values()) + ([n.param] if n.param else [])]
+            found = [e for n in frontier for e in self._match(n, segments, 0, verb)]
+            if found:
+                return found
+        return []
+
+
+def link_endpoints(rows):
+    """Set row["endpoints"] = [(verb, url, api project root, api file, action, route template)] for every
+    row, from the "http_calls" of the UI rows and the "routes" of the API rows. Returns (calls, linked)."""
+    trie = RouteTrie()
+    for row in rows:
+        for verb, template, _cls, method in row.get("routes") or ():
+            trie.add(template, (verb, template, row["project_root"], row["file"], method))
+    memo = {}
+    calls = linked = 0
+    for row in rows:
+        edges = []
+        for verb, url in row.get("http_calls") or ():
+            calls += 1
+            found = memo.get((verb, url))
+            if found is None:
+                found = memo[(verb, url)] = trie.match(url, verb) if trie.size else []
+            if found:
+                linked += 1
+            edges.extend((verb, url, root, f, method, template) for _v, template, root, f, method in found)
+        row["endpoints"] = sorted(set(edges))
+    return calls, linked
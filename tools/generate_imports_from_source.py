@@ -14,21 +14,84 @@ Usage (interactive):
 Or with arguments:
   python tools/generate_imports_from_source.py --source-root "C:\path\to\repo" --output "asts_enhanced/file_imports_from_source.xlsx"
 
-Requires: openpyxl
+Each file is read and comment-stripped once; all per-file facts are extracted in a process pool
+(--workers) in that single pass. Per-file extraction results are cached on disk (default: <output dir>/.import_fact_cache.sqlite) so that a
+rerun only re-parses files that are new or changed. Use --cache to pick another location, --no-cache to
+disable it. The cache is dropped automatically when this script (the extraction rules) changes.
+Byte-identical files (same extension, size and sha1) are grouped before extraction and only one copy
+of each is parsed; the others share its facts (--no-dedup turns this off, see identical_files.py).
+
+Source text is memory-mapped only while a file's facts are extracted; afterwards only the facts are
+kept. --memory-budget MB caps the (serialized) size of the per-file facts that are only needed during
+import resolution; beyond it they are spilled to a temporary file and read back file by file.
+
+--watch keeps running after the report is written: changes below --source-root (inotify on Linux,
+polling elsewhere or with --poll) are applied to the in-memory indexes file by file, only the files
+whose import rows can change are re-resolved, and the report is rewritten (see LiveImportIndex).
+
+--metrics out.json records wall/CPU time, files/s and bytes read per phase (discover, extract, index,
+imports, save), peak memory, the --metrics-slowest files of every extraction stage and the number of
+Imports rows per MatchedBy heuristic. --profile-phase <phase> also dumps cProfile stats for that phase.
+
+--from-ast <dir> reads the C# facts from the output of the Roslyn exporter (api_exporter/Program.cs)
+instead of scanning the sources: summary.json is streamed and each file's entry is read and reduced
+to its facts one at a time (see ast_export.py), so memory stays bounded by the kept facts. Only the
+exported .cs files are reported; --source-root defaults to the root the exporter scanned.
+
+Large trees can be scanned as N shards (on N machines sharing the tree, or N processes):
+  python tools/generate_imports_from_source.py --source-root R --output out/report.csv --shard 0/3   (and 1/3, 2/3)
+  python tools/generate_imports_from_source.py --output out/report.csv --format csv --merge out/*.partial.sqlite
+Each shard walks the tree, keeps the files whose relative path hashes to it (shard_of) and writes
+their facts and declaration postings to a partial index (write_partial_index). --merge checks that
+every shard is present exactly once and was extracted with the same script and options, merges the
+partials into the id-ordered indexes and resolves imports; the report is identical to a single run.
+
+Output formats (--format):
+  xlsx   - one workbook with the three sheets (default)
+  csv    - <output stem>_FileTypes.csv, <output stem>_Files.csv, <output stem>_Imports.csv
+  jsonl  - same split as csv, one JSON object per row
+  sqlite - one database with FileTypes, Files and Imports tables (indexed on file ids / paths)
+The csv/jsonl/sqlite backends stream Imports rows as they are resolved and are not subject to the
+Excel row limit.
+
+Requires: openpyxl (only for --format xlsx)
 Install: pip install openpyxl
 """
 import argparse
+import csv
+import json
 import re
+import string
 import fnmatch
+import hashlib
+import mmap
+import pickle
+import sqlite3
+import tempfile
 from pathlib import Path
 from collections import defaultdict, Counter
-from openpyxl import Workbook
-from openpyxl.styles import Font
+try:
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+except ImportError:  # only needed for --format xlsx
+    Workbook = None
 import os
 import sys
+import time
 import multiprocessing
-from concurrent.futures import ProcessPoolExecutor, as_completed
-
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from ast_export import AstExport, entry_methods, entry_path, entry_root, entry_types
+from phase_timer import RunMetrics, stage_clock
+from identical_files import IdenticalFiles
+from source_watcher import SourceWatcher
+
+NEW_TYPE_RE = re.compile(r"new\s+([A-Za-z0-9_]+)")
+# --from-ast: generic argument lists and the trailing dotted name of a call expression
+GENERIC_ARGS_RE = re.compile(r"<[^<>]*>")
+CALL_NAME_RE = re.compile(r"[A-Za-z0-9_.]+$")
 NAMESPACE_RE = re.compile(r"^\s*namespace\s+([A-Za-z0-9_.]+)\s*(?:\{|;)")
 USING_RE = re.compile(r"^\s*using\s+([A-Za-z0-9_.]+)\s*;")
 
@@ -44,6 +107,24 @@ EXCLUDE_FILENAME_PATTERNS = []
 # the same file was also matched by another heuristic like param/new/di/method)
 NO_USING_ONLY = False
 
+# bump whenever the shape of the cached per-file facts changes
+CACHE_SCHEMA_VERSION = 1
+
+DI_GENERIC_RE = re.compile(r"\bAdd(?:Scoped|Transient|Singleton)\s*<\s*([A-Za-z0-9_\.<>]+)\s*,\s*([A-Za-z0-9_\.<>]+)\s*>", re.IGNORECASE)
+DI_TYPEOF_RE = re.compile(r"\bAdd(?:Scoped|Transient|Singleton)\s*\(\s*typeof\(\s*([A-Za-z0-9_\.<>]+)\s*\)\s*,\s*typeof\(\s*([A-Za-z0-9_\.<>]+)\s*\)\s*\)", re.IGNORECASE)
+
+# Declaration scanning. Everything between a modifier and the '(' of a method signature (or the
+# '=' / ';' of a field) is made of these characters, so the text is cut once into maximal runs of
+# them and only runs followed by a terminator are inspected. This replaces the former single regexes
+# (modifier\s+[A-Za-z0-9_<>,\s\[\]]+\s+name\s*\( and friends) whose type class overlaps \s and
+# backtracked catastrophically on long generic signatures and minified/generated files.
+SIGNATURE_RUN_RE = re.compile(r"[A-Za-z0-9_<>,\s\[\]]+")
+FIELD_RUN_RE = re.compile(r"[A-Za-z0-9_<>.,\s\[\]]+")
+ASCII_WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+ASCII_WORD_CHARS = frozenset(string.ascii_letters + string.digits + '_')
+METHOD_MODIFIERS = frozenset(['public', 'private', 'protected', 'internal', 'static', 'async'])
+FIELD_MODIFIERS = frozenset(['public', 'private', 'protected', 'internal', 'static', 'readonly', 'volatile', 'const'])
+
 
 def sanitize_sheet_name(name):
     return name[:31]
@@ -78,13 +159,126 @@ def autosize(ws, cols=None):
         ws.column_dimensions[ws.cell(row=1, column=col).column_letter].width = width
 
 
-def find_namespaces_and_usings(file_path: Path):
+def read_source(file_path: Path):
+    """Read a source file once through a read-only memory map. Returns (text, sha1 hex digest of the
+    bytes); text is '' when the file is not valid UTF-8 (same outcome as the previous per-extractor
+    read_text(encoding='utf-8') calls) and the digest is None when the file cannot be read.
+    The raw bytes are never copied into memory and the text is only referenced by the caller."""
+    try:
+        with open(file_path, 'rb') as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return '', hashlib.sha1(b'').hexdigest()
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                digest = hashlib.sha1(mm).hexdigest()
+                try:
+                    text = str(mm, 'utf-8')
+                except UnicodeDecodeError:
+                    return '', digest
+    except (OSError, ValueError):
+        return '', None
+    # universal newlines, as read_text() would do
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text, digest
+
+
+def walk_files(root: Path, skip_dir=None):
+    """Yield every file below root (the same set as root.rglob('*') filtered with is_file()) from a single
+    os.scandir pass. Directories for which skip_dir(path) is true are not descended into, and
+    symlinked directories are not followed (as with rglob)."""
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir() and not entry.is_symlink():
+                    sub = d / entry.name
+                    if skip_dir is None or not skip_dir(sub):
+                        subdirs.append(sub)
+                elif entry.is_file():
+                    yield d / entry.name
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+
+# regex syntax whose outcome can depend on text after the match (end anchors, word boundaries, lookaheads)
+_LOOKS_PAST_MATCH = ('$', '\\Z', '\\b', '\\B', '(?=', '(?!')
+# a global inline flag such as (?i) is only allowed at the start of a pattern
+_GLOBAL_FLAGS_RE = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def _compile_any(patterns, allow_groups=True):
+    """Compile patterns into as few regexes as possible: one alternation when they combine safely,
+    otherwise one regex each. Returns a list of compiled patterns (empty for no patterns)."""
+    compiled = [re.compile(p) for p in patterns]
+    if len(compiled) > 1 and (allow_groups or not any(c.groups for c in compiled)) \
+            and not any(_GLOBAL_FLAGS_RE.search(p) for p in patterns):
+        try:
+            return [re.compile('|'.join(f'(?:{p})' for p in patterns))]
+        except re.error:
+            pass
+    return compiled
+
+
+class IgnoreMatcher:
+    """The --ignore-glob / --ignore-regex filter, compiled once.
+
+    A file is ignored when a glob matches (fnmatch semantics) its root-relative path or its full path,
+    both with '/' separators, or when a regex is found in its relative ('/' separators) or full path.
+    ignores_dir(d) is only true when every file below d is ignored, so the walk can skip the subtree:
+    a glob ending in '*' that matches '<dir>/' matches every longer path too, and so does a regex
+    found in '<dir>/' as long as it cannot look past its match.
+    """
+
+    def __init__(self, root: Path, globs, regexes):
+        self.root = root
+        globs = [os.path.normcase(g) for g in globs]
+        self.globs = _compile_any([fnmatch.translate(g) for g in globs])
+        self.dir_globs = _compile_any([fnmatch.translate(g) for g in globs if g.endswith('*')])
+        self.regexes = _compile_any(regexes, allow_groups=False)
+        self.dir_regexes = _compile_any([r for r in regexes if not any(t in r for t in _LOOKS_PAST_MATCH)],
+                                        allow_groups=False)
+
+    def _split(self, p: Path):
+        full = str(p)
+        try:
+            rel = str(p.relative_to(self.root)).replace('\\', '/')
+        except ValueError:
+            rel = full.replace('\\', '/')
+        return rel, full
+
+    @staticmethod
+    def _hit(globs, regexes, rel, full, full_slash):
+        if globs:
+            nrel = os.path.normcase(rel)
+            nfull = os.path.normcase(full_slash)
+            for g in globs:
+                if g.match(nrel) or g.match(nfull):
+                    return True
+        for rg in regexes:
+            if rg.search(rel) or rg.search(full):
+                return True
+        return False
+
+    def ignores_file(self, p: Path):
+        rel, full = self._split(p)
+        return self._hit(self.globs, self.regexes, rel, full, full.replace('\\', '/'))
+
+    def ignores_dir(self, d: Path):
+        rel, full = self._split(d)
+        return self._hit(self.dir_globs, self.dir_regexes, rel + '/', full + os.sep, full.replace('\\', '/') + '/')
+
+
+def parse_namespaces_and_usings(text: str):
     nss = []
     us = []
-    try:
-        text = file_path.read_text(encoding='utf-8')
-    except Exception:
-        return nss, us
     for line in text.splitlines():
         m = NAMESPACE_RE.match(line)
         if m:
@@ -98,61 +292,219 @@ def find_namespaces_and_usings(file_path: Path):
     return nss, us
 
 
-def find_declared_types_and_methods(file_path: Path):
-    """Return tuple (classes, methods) where classes is list of declared class/type names and
-    methods is list of declared method names in the file."""
-    classes = []
-    methods = []
-    try:
-        text = file_path.read_text(encoding='utf-8')
-    except Exception:
-        return classes, methods
+class XlsxReportWriter:
+    """Report tables as sheets of one workbook. Uses write-only mode unless autosize is requested."""
 
-    # class declarations
-    for m in re.finditer(r"\bclass\s+([A-Za-z0-9_]+)", text):
-        classes.append(m.group(1))
+    def __init__(self, output: Path, autosize_columns=False):
+        if Workbook is None:
+            raise SystemExit('openpyxl is required for --format xlsx (pip install openpyxl)')
+        self.output = output
+        self.autosize_columns = autosize_columns
+        # write-only workbook for much lower memory use and faster writes; regular one only for autosize
+        self.wb = Workbook(write_only=not autosize_columns)
+        self.ws = None
 
-    # struct, record, interface, enum as types too
-    for m in re.finditer(r"\b(struct|record|interface|enum)\s+([A-Za-z0-9_]+)", text):
-        classes.append(m.group(2))
+    def begin_table(self, name, header):
+        if self.autosize_columns and self.ws is None:
+            self.ws = self.wb.active
+            self.ws.title = sanitize_sheet_name(name)
+        else:
+            self.ws = self.wb.create_sheet(title=sanitize_sheet_name(name))
+        self.ws.append(header)
 
-    # method declarations (simple heuristic)
-    for m in re.finditer(r"\b(?:public|private|protected|internal|static|async|protected internal|internal protected)\s+[A-Za-z0-9_<>,\s\[\]]+\s+([A-Za-z0-9_]+)\s*\(", text):
-        methods.append(m.group(1))
+    def append(self, row):
+        self.ws.append(row)
 
-    # dedupe preserving order
-    classes = list(dict.fromkeys(classes))
-    methods = list(dict.fromkeys(methods))
-    return classes, methods
+    def end_table(self):
+        if self.autosize_columns:
+            try:
+                autosize(self.ws)
+            except Exception:
+                pass
 
+    def close(self):
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        self.wb.save(str(self.output))
+        return [self.output]
 
-def build_decl_indexes(source_files):
-    """Build indexes: class_name -> file ids, method_name -> file ids"""
-    class_idx = defaultdict(list)
-    method_idx = defaultdict(list)
-    for rec in source_files:
-        fid = rec['id']
-        path = Path(rec['path'])
-        classes, methods = find_declared_types_and_methods(path)
-        rec['declared_classes'] = classes
-        rec['declared_methods'] = methods
-        for c in classes:
-            class_idx[c].append(fid)
-    # dedupe
-    nss = list(dict.fromkeys(nss))
-    us = list(dict.fromkeys(us))
-    return nss, us
 
+class CsvReportWriter:
+    """Report tables as <output stem>_<Table>.csv files, written row by row."""
 
-def find_declared_types_and_methods(file_path: Path):
+    suffix = '.csv'
+
+    def __init__(self, output: Path):
+        self.output = output
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        self.fh = None
+        self.paths = []
+
+    def table_path(self, name):
+        return self.output.with_name(f'{self.output.stem}_{name}{self.suffix}')
+
+    def begin_table(self, name, header):
+        path = self.table_path(name)
+        self.fh = open(path, 'w', encoding='utf-8', newline='')
+        self.paths.append(path)
+        self.header = list(header)
+        self.start(header)
+
+    def start(self, header):
+        self.csv = csv.writer(self.fh)
+        self.csv.writerow(header)
+
+    def append(self, row):
+        self.csv.writerow(row)
+
+    def end_table(self):
+        self.fh.close()
+        self.fh = None
+
+    def close(self):
+        return self.paths
+
+
+class JsonlReportWriter(CsvReportWriter):
+    """Report tables as <output stem>_<Table>.jsonl files, one JSON object per row (empty cells -> null)."""
+
+    suffix = '.jsonl'
+
+    def start(self, header):
+        pass
+
+    def append(self, row):
+        self.fh.write(json.dumps({k: (None if v == '' else v) for k, v in zip(self.header, row)}, ensure_ascii=False))
+        self.fh.write('\n')
+
+
+class SqliteReportWriter:
+    """Report tables in one sqlite database. Rows are inserted in batches inside a single transaction;
+    lookup indexes (file ids, paths) are created once all rows are in."""
+
+    INDEXES = {
+        'Files': ['RelPath'],
+        'Imports': ['FileID', 'ImportedFileID', 'ImportedRelPath'],
+    }
+
+    def __init__(self, output: Path, batch_size=10000):
+        self.output = output
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        if self.output.exists():
+            self.output.unlink()
+        self.conn = sqlite3.connect(str(self.output))
+        self.conn.execute('PRAGMA journal_mode = OFF')
+        self.conn.execute('PRAGMA synchronous = OFF')
+        self.batch_size = batch_size
+        self.batch = []
+
+    def begin_table(self, name, header):
+        cols = ', '.join(f'"{h}" {"INTEGER" if h.endswith("ID") or h == "Count" else "TEXT"}' for h in header)
+        self.conn.execute(f'CREATE TABLE "{name}" ({cols})')
+        self.name = name
+        self.insert_sql = f'INSERT INTO "{name}" VALUES ({", ".join("?" for _ in header)})'
+
+    def append(self, row):
+        self.batch.append([None if v == '' else v for v in row])
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.conn.executemany(self.insert_sql, self.batch)
+            self.batch = []
+
+    def end_table(self):
+        self.flush()
+        for col in self.INDEXES.get(self.name, []):
+            self.conn.execute(f'CREATE INDEX "ix_{self.name}_{col}" ON "{self.name}" ("{col}")')
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+        return [self.output]
+
+
+REPORT_FORMATS = {
+    'xlsx': '.xlsx',
+    'csv': '.csv',
+    'jsonl': '.jsonl',
+    'sqlite': '.sqlite',
+}
+
+
+def open_report_writer(fmt, output: Path, autosize_columns=False):
+    if fmt == 'xlsx':
+        return XlsxReportWriter(output, autosize_columns=autosize_columns)
+    if fmt == 'csv':
+        return CsvReportWriter(output)
+    if fmt == 'jsonl':
+        return JsonlReportWriter(output)
+    if fmt == 'sqlite':
+        return SqliteReportWriter(output)
+    raise ValueError(f'unknown report format: {fmt}')
+
+
+def find_namespaces_and_usings(file_path: Path):
+    text, _ = read_source(file_path)
+    return parse_namespaces_and_usings(text)
+
+
+def _is_word_char(ch):
+    # same notion of a word character as the regex \b
+    return ch == '_' or ch.isalnum()
+
+
+def scan_declaration_run(text: str, start: int, end: int, modifiers):
+    """Inspect one maximal run text[start:end] of declaration characters that is followed by a
+    terminator ('(' for methods, '=' / ';' for fields).
+
+    The declaration matches when the run ends with an identifier (the declared name) preceded by
+    whitespace, and one of `modifiers` occurs earlier in the run as a whole word followed by
+    whitespace, with at least one character between it and the name. Returns
+    (modifier_end, name_start, name_end) for the first such modifier, or None. Linear in the run length.
+    """
+    name_end = end
+    while name_end > start and text[name_end - 1].isspace():
+        name_end -= 1
+    name_start = name_end
+    while name_start > start and text[name_start - 1] in ASCII_WORD_CHARS:
+        name_start -= 1
+    if name_start == name_end or name_start == start or not text[name_start - 1].isspace():
+        return None
+    for m in ASCII_WORD_RE.finditer(text, start, name_start):
+        modifier_end = m.end()
+        if name_start - modifier_end < 3:
+            break
+        if (m.group() in modifiers and text[modifier_end].isspace()
+                and (m.start() == 0 or not _is_word_char(text[m.start() - 1]))):
+            return modifier_end, name_start, name_end
+    return None
+
+
+def iter_method_signatures(text: str):
+    """Yield (run_start, name_start, name_end, paren_index) for every 'modifier <type...> Name(' signature."""
+    for run in SIGNATURE_RUN_RE.finditer(text):
+        end = run.end()
+        if end == len(text) or text[end] != '(':
+            continue
+        decl = scan_declaration_run(text, run.start(), end, METHOD_MODIFIERS)
+        if decl is not None:
+            yield run.start(), decl[1], decl[2], end
+
+
+def strip_generic_suffix(t: str):
+    """re.sub(r"<.*>$", "", t) for a stripped string, without rescanning the line once per '<'."""
+    if not t.endswith('>'):
+        return t
+    lt = t.find('<', t.rfind('\n') + 1)
+    return t if lt == -1 else t[:lt]
+
+
+def parse_declared_types_and_methods(text: str):
     """Return tuple (classes, methods) where classes is list of declared class/type names and
-    methods is list of declared method names in the file."""
+    methods is list of declared method names in the text."""
     classes = []
     methods = []
-    try:
-        text = file_path.read_text(encoding='utf-8')
-    except Exception:
-        return classes, methods
 
     # class declarations
     for m in re.finditer(r"\bclass\s+([A-Za-z0-9_]+)", text):
@@ -162,9 +514,9 @@ def find_declared_types_and_methods(file_path: Path):
     for m in re.finditer(r"\b(struct|record|interface|enum)\s+([A-Za-z0-9_]+)", text):
         classes.append(m.group(2))
 
-    # method declarations (simple heuristic)
-    for m in re.finditer(r"\b(?:public|private|protected|internal|static|async|protected internal|internal protected)\s+[A-Za-z0-9_<>,\s\[\]]+\s+([A-Za-z0-9_]+)\s*\(", text):
-        methods.append(m.group(1))
+    # method declarations (simple heuristic): 'modifier <type...> Name('
+    for _, name_start, name_end, _ in iter_method_signatures(text):
+        methods.append(text[name_start:name_end])
 
     # dedupe preserving order
     classes = list(dict.fromkeys(classes))
@@ -172,57 +524,65 @@ def find_declared_types_and_methods(file_path: Path):
     return classes, methods
 
 
-def build_decl_indexes(source_files):
-    """Build indexes: class_name -> file ids, method_name -> file ids"""
+def find_declared_types_and_methods(file_path: Path):
+    text, _ = read_source(file_path)
+    return parse_declared_types_and_methods(text)
+
+
+def build_decl_indexes(records):
+    """Build indexes: class_name -> file ids, method_name -> file ids (from already extracted records)"""
     class_idx = defaultdict(list)
     method_idx = defaultdict(list)
-    for rec in source_files:
+    for rec in records:
         fid = rec['id']
-        path = Path(rec['path'])
-        classes, methods = find_declared_types_and_methods(path)
-        rec['declared_classes'] = classes
-        rec['declared_methods'] = methods
-        for c in classes:
+        for c in rec['declared_classes']:
             class_idx[c].append(fid)
-        for m in methods:
+        for m in rec['declared_methods']:
             method_idx[m].append(fid)
     return class_idx, method_idx
 
 
-def build_decl_indexes_parallel(records, workers=None):
-    """Parallel version of build_decl_indexes using ProcessPoolExecutor."""
-    if workers is None:
-        workers = max(1, multiprocessing.cpu_count() - 1)
-    class_idx = defaultdict(list)
-    method_idx = defaultdict(list)
-    # submit parsing tasks
-    with ProcessPoolExecutor(max_workers=workers) as ex:
-        future_to_rec = {ex.submit(find_declared_types_and_methods, Path(rec['path'])): rec for rec in records}
-        for fut in as_completed(future_to_rec):
-            rec = future_to_rec[fut]
-            try:
-                classes, methods = fut.result()
-            except Exception:
-                classes, methods = [], []
-            rec['declared_classes'] = classes
-            rec['declared_methods'] = methods
-            fid = rec['id']
-            for c in classes:
-                class_idx[c].append(fid)
-            for m in methods:
-                method_idx[m].append(fid)
-    return class_idx, method_idx
+# per-target flags in ImportTargets.flags
+TARGET_EXCLUDED = 1        # filename matches an --exclude-filename-pattern
+TARGET_USING_IGNORED = 2   # filename contains one of USING_IGNORE_KEYWORDS
+
+
+class ImportTargets:
+    """Read-only per-file lookups used by process_record_imports, built once from the records.
+
+    by_id: file id -> record (list indexed by id; ids are 1..N)
+    flags: bytearray bitmap of TARGET_EXCLUDED / TARGET_USING_IGNORED per file id
+    by_filename: lowercase file name -> file ids (record order), for the TypeName.cs fallback
+    """
+
+    def __init__(self, records):
+        n = max((r['id'] for r in records), default=0)
+        self.by_id = [None] * (n + 1)
+        self.flags = bytearray(n + 1)
+        self.by_filename = defaultdict(list)
+        for r in records:
+            fid = r['id']
+            self.by_id[fid] = r
+            fname = Path(r['path']).name.lower()
+            self.by_filename[fname].append(fid)
+            if any(pat and pat in fname for pat in EXCLUDE_FILENAME_PATTERNS):
+                self.flags[fid] |= TARGET_EXCLUDED
+            if any(kw in fname for kw in USING_IGNORE_KEYWORDS):
+                self.flags[fid] |= TARGET_USING_IGNORED
 
 
 def process_record_imports(args_tuple):
-    """Worker function for import detection. args_tuple contains (rec, class_idx, method_idx, di_map, ns_to_ids)
+    """Worker function for import detection. args_tuple contains (rec, class_idx, method_idx, di_map, ns_to_ids, targets)
+    where targets is the ImportTargets built from all records (without it no target filtering or
+    filename fallback is done).
     Returns (file_id, relpath, list_of_(imported_id, matched_by, matched_symbol))
     """
-    rec, class_idx, method_idx, di_map, ns_to_ids = args_tuple
+    rec, class_idx, method_idx, di_map, ns_to_ids = args_tuple[:5]
+    targets = args_tuple[5] if len(args_tuple) > 5 else None
+    flags = targets.flags if targets is not None else None
     matches = []
 
-    # Use precomputed caches if available to avoid re-parsing the file
-    text = rec.get('text', '')
+    # Use the facts extracted up front; the file itself is not re-read here
     var_map = rec.get('var_map', {})
     param_field_types = rec.get('param_field_types', set())
     new_types = rec.get('new_types', set())
@@ -232,23 +592,12 @@ def process_record_imports(args_tuple):
 
     def should_skip_target(fid):
         """Return True if the target file's name matches any user-supplied exclude pattern."""
-        try:
-            records_list = globals().get('records', [])
-            if not records_list:
-                return False
-            target = next((r for r in records_list if r['id'] == fid), None)
-            if not target:
-                return False
-            fname = Path(target['path']).name.lower()
-            for pat in EXCLUDE_FILENAME_PATTERNS:
-                if pat and pat in fname:
-                    return True
-        except Exception:
-            return False
-        return False
+        return flags is not None and bool(flags[fid] & TARGET_EXCLUDED)
 
+    # type-name sets are walked in sorted order so the row order does not depend on the
+    # per-process string hash seed (keeps sequential and parallel runs byte-identical)
     # 1) param/field/return types
-    for t in param_field_types:
+    for t in sorted(param_field_types):
         if t in class_idx:
             for fid in class_idx[t]:
                 if fid not in seen and fid != rec['id'] and not should_skip_target(fid):
@@ -264,7 +613,7 @@ def process_record_imports(args_tuple):
                             seen.add(fid)
 
     # 2) new TypeName usages
-    for typename in new_types:
+    for typename in sorted(new_types):
         if typename in class_idx:
             for fid in class_idx[typename]:
                 if fid not in seen and fid != rec['id'] and not should_skip_target(fid):
@@ -301,23 +650,7 @@ def process_record_imports(args_tuple):
     for using in rec.get('usings', []):
         for fid in match_using_to_file_ids(using, ns_to_ids):
             if fid not in seen and fid != rec['id']:
-                try:
-                    target = next((r for r in globals().get('records', []) if r['id'] == fid), None)
-                except Exception:
-                    target = None
-                skip = False
-                if target:
-                    fname = Path(target['path']).name.lower()
-                    for kw in USING_IGNORE_KEYWORDS:
-                        if kw in fname:
-                            skip = True
-                            break
-                    if not skip:
-                        for pat in EXCLUDE_FILENAME_PATTERNS:
-                            if pat and pat in fname:
-                                skip = True
-                                break
-                if not skip:
+                if flags is None or not flags[fid] & (TARGET_USING_IGNORED | TARGET_EXCLUDED):
                     using_candidates.append((fid, using))
 
     # decide whether to add using candidates: if NO_USING_ONLY is True, only add those which
@@ -329,20 +662,97 @@ def process_record_imports(args_tuple):
 
     # 5) filename fallback: if a referenced type name wasn't found, look for filename match
     # (cheap heuristic) - check param_field_types and new_types
-    for t in set(list(param_field_types) + list(new_types)):
+    for t in sorted(set(param_field_types) | set(new_types)):
         if t not in class_idx:
             # attempt find a file whose filename matches TypeName.cs
-            for r in globals().get('records', []):
-                fname = Path(r['path']).name
-                if fname.lower() == f"{t.lower()}.cs":
-                    fid = r['id']
-                    if fid not in seen and fid != rec['id'] and not should_skip_target(fid):
-                        matches.append((fid, 'filename', t))
-                        seen.add(fid)
+            if targets is None:
+                continue
+            for fid in targets.by_filename.get(f"{t.lower()}.cs", ()):
+                if fid not in seen and fid != rec['id'] and not should_skip_target(fid):
+                    matches.append((fid, 'filename', t))
+                    seen.add(fid)
 
     return rec['id'], rec['relpath'], matches
 
 
+# read-only import-resolution state for worker processes: inherited through fork, or installed once
+# per worker by _init_import_worker, so the indexes are never pickled per task
+_IMPORT_STATE = None
+# start method of the --parallel-imports pool; None: fork where available, otherwise spawn
+IMPORT_START_METHOD = None
+
+
+def _import_options():
+    return {
+        'strict_usings': GLOBAL_STRICT_USINGS,
+        'exclude_filename_patterns': EXCLUDE_FILENAME_PATTERNS,
+        'no_using_only': NO_USING_ONLY,
+    }
+
+
+def _init_import_worker(state, options):
+    global _IMPORT_STATE, GLOBAL_STRICT_USINGS, EXCLUDE_FILENAME_PATTERNS, NO_USING_ONLY
+    if state is not None:
+        _IMPORT_STATE = state
+    GLOBAL_STRICT_USINGS = options['strict_usings']
+    EXCLUDE_FILENAME_PATTERNS = options['exclude_filename_patterns']
+    NO_USING_ONLY = options['no_using_only']
+
+
+def _resolve_import_chunk(bounds):
+    start, stop = bounds
+    records, class_idx, method_idx, di_map, ns_to_ids, targets, store = _IMPORT_STATE
+    results = []
+    for rec in records[start:stop]:
+        try:
+            if rec.get('spilled'):
+                # resolution facts were spilled under --memory-budget; only held for this record
+                rec = dict(rec, **store.load(rec['path']))
+            results.append(process_record_imports((rec, class_idx, method_idx, di_map, ns_to_ids, targets)))
+        except Exception:
+            results.append(None)
+    return results
+
+
+def resolve_imports(records, class_idx, method_idx, di_map, ns_to_ids, targets, workers=1, chunk_size=256, store=None):
+    """Yield process_record_imports() results in file-id order (None for a file that failed).
+
+    Records marked 'spilled' get their resolution facts from store (a ResolutionFactStore) just
+    before they are resolved.
+
+    With workers > 1 the records are split into contiguous chunks resolved in a process pool. The
+    shared indexes reach the workers once (fork inheritance where available, otherwise the pool
+    initializer) and chunks are yielded in submission order, so the output is identical to the
+    sequential run.
+    """
+    global _IMPORT_STATE
+    if store is not None:
+        store.seal()
+    state = (records, class_idx, method_idx, di_map, ns_to_ids, targets, store)
+    if workers <= 1 or len(records) <= chunk_size:
+        _IMPORT_STATE = state
+        try:
+            yield from _resolve_import_chunk((0, len(records)))
+        finally:
+            _IMPORT_STATE = None
+        return
+
+    method = IMPORT_START_METHOD or ('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+    ctx = multiprocessing.get_context(method)
+    if method == 'fork':
+        _IMPORT_STATE = state
+        initargs = (None, _import_options())
+    else:
+        initargs = (state, _import_options())
+    bounds = [(i, min(i + chunk_size, len(records))) for i in range(0, len(records), chunk_size)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_import_worker, initargs=initargs) as ex:
+            for chunk in ex.map(_resolve_import_chunk, bounds):
+                yield from chunk
+    finally:
+        _IMPORT_STATE = None
+
+
 def find_variable_type_map(text: str):
     """Heuristic map of local variable name -> type by scanning 'var name = new Type' or 'Type name ='"""
     var_map = {}
@@ -356,45 +766,59 @@ def find_variable_type_map(text: str):
     return var_map
 
 
-def find_field_and_param_types(file_path: Path):
-    """Return a set of type names referenced in field declarations and method parameter lists."""
+def parse_field_and_param_types(text: str):
+    """Return a set of type names referenced in field declarations and method parameter lists.
+    text is expected to be comment-stripped already."""
     types = set()
-    try:
-        text = file_path.read_text(encoding='utf-8')
-        # strip comments to avoid false matches coming from commented-out code
-        text = strip_comments(text)
-    except Exception:
-        return types
 
     # fields: look for common field declaration patterns like 'private readonly IUsersService _usersService;'
-    for m in re.finditer(r"\b(?:public|private|protected|internal|static|readonly|volatile|const)\s+([A-Za-z0-9_<>.,\s\[\]]+)\s+[A-Za-z0-9_]+\s*(?:=|;)", text):
-        t = m.group(1).strip()
-        # take first token (strip generics)
-        tshort = re.sub(r"<.*>$", "", t).split()[-1]
-        if tshort:
-            types.add(tshort)
+    for run in FIELD_RUN_RE.finditer(text):
+        end = run.end()
+        if end == len(text) or text[end] not in '=;':
+            continue
+        decl = scan_declaration_run(text, run.start(), end, FIELD_MODIFIERS)
+        if decl is None:
+            continue
+        modifier_end, name_start, _ = decl
+        # everything between the first modifier and the field name; take its last token (strip generics)
+        parts = strip_generic_suffix(text[modifier_end:name_start - 1].strip()).split()
+        if parts:
+            types.add(parts[-1])
 
     # method parameter lists: capture parameter lists from method signatures
-    for m in re.finditer(r"\b(?:public|private|protected|internal|static|async|protected internal|internal protected)\s+[A-Za-z0-9_<>,\s\[\]]+\s+[A-Za-z0-9_]+\s*\(([^)]*)\)", text):
-        plist = m.group(1)
+    resume = 0
+    for run_start, _, _, paren in iter_method_signatures(text):
+        if run_start < resume:
+            # inside the parameter list of the previous signature
+            continue
+        close = text.find(')', paren + 1)
+        if close == -1:
+            break
+        resume = close + 1
+        plist = text[paren + 1:close]
         if not plist:
             continue
         for p in plist.split(','):
             p = p.strip()
             if not p:
                 continue
-            # remove attributes like [FromBody]
-            p = re.sub(r"\[[^\]]+\]", "", p).strip()
+            # remove attributes like [FromBody]; an unclosed '[' after the last ']' never matches
+            last = p.rfind(']')
+            p = (re.sub(r"\[[^\]]+\]", "", p[:last + 1]) + p[last + 1:]).strip()
             # remove modifiers (ref/out/in/params)
             p = re.sub(r"\b(ref|out|in|params)\b", "", p).strip()
             parts = p.split()
             if len(parts) >= 2:
-                t = parts[0]
-                tshort = re.sub(r"<.*>$", "", t)
-                types.add(tshort)
+                types.add(strip_generic_suffix(parts[0]))
     return types
 
 
+def find_field_and_param_types(file_path: Path):
+    text, _ = read_source(file_path)
+    # strip comments to avoid false matches coming from commented-out code
+    return parse_field_and_param_types(strip_comments(text))
+
+
 def extract_invocations(text: str):
     """Return list of invocation expressions (raw expression before '(') and argument list strings"""
     invocations = []
@@ -405,53 +829,467 @@ def extract_invocations(text: str):
     return invocations
 
 
+class _NsNode:
+    __slots__ = ('children', 'order', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        # set on nodes that end a declared namespace: insertion order in ns_to_ids and its file ids
+        self.order = None
+        self.ids = None
+
+
+class NamespaceTrie:
+    """Prefix tree over dotted namespace segments, built once from the namespace -> file ids map.
+
+    match(using, strict) returns the same set as the linear scan in match_using_to_file_ids (declared
+    namespaces equal to / children of the using, plus parents of it unless strict), walking only
+    depth(using) nodes plus the matched subtree. Results are memoized per (using, strict); the returned
+    sets are shared and must not be mutated.
+    """
+
+    def __init__(self, ns_to_ids):
+        self.ns_to_ids = ns_to_ids
+        self.root = _NsNode()
+        self._memo = {}
+        for order, (ns, ids) in enumerate(ns_to_ids.items()):
+            node = self.root
+            for seg in ns.split('.'):
+                child = node.children.get(seg)
+                if child is None:
+                    child = node.children[seg] = _NsNode()
+                node = child
+            node.order = order
+            node.ids = ids
+
+    def items(self):
+        return self.ns_to_ids.items()
+
+    def match(self, using, strict=False):
+        key = (using, strict)
+        hit = self._memo.get(key)
+        if hit is not None:
+            return hit
+        found = []
+        node = self.root
+        segs = using.split('.')
+        for i, seg in enumerate(segs):
+            node = node.children.get(seg)
+            if node is None:
+                break
+            if i < len(segs) - 1 and node.ids is not None and not strict:
+                # declared namespace is a parent of the using
+                found.append((node.order, node.ids))
+        else:
+            # declared namespace equals the using or is a child of it
+            stack = [node]
+            while stack:
+                n = stack.pop()
+                if n.ids is not None:
+                    found.append((n.order, n.ids))
+                stack.extend(n.children.values())
+        # fill the set in ns_to_ids order so it is built exactly like the linear scan did
+        matches = set()
+        for _, ids in sorted(found, key=lambda x: x[0]):
+            matches.update(ids)
+        self._memo[key] = matches
+        return matches
+
+
 def build_namespace_index(records):
+    """Return a NamespaceTrie over declared namespace -> file ids."""
     ns_to_ids = defaultdict(list)
     for rec in records:
         for ns in rec['declared_namespaces']:
             ns_to_ids[ns].append(rec['id'])
-    return ns_to_ids
+    return NamespaceTrie(ns_to_ids)
+
 
+def find_di_registrations(text: str):
+    """Return list of (interfaceShortName, implementationShortName) DI registrations found in text,
+    e.g. AddScoped<IService, Service>() or AddScoped(typeof(IService), typeof(Service))."""
+    regs = []
+    for m in DI_GENERIC_RE.finditer(text):
+        regs.append((m.group(1).split('.')[-1], m.group(2).split('.')[-1]))
+    for m in DI_TYPEOF_RE.finditer(text):
+        regs.append((m.group(1).split('.')[-1], m.group(2).split('.')[-1]))
+    return regs
 
-def build_di_registration_map(src_root: Path, ignore_globs, ignore_regexes):
-    """Scan source files for DI registrations like AddScoped<IService, Service>() or AddScoped(typeof(IService), typeof(Service))
-    Returns mapping interfaceShortName -> list of implementation short names.
+
+def build_di_registration_map(facts_list):
+    """Merge per-file DI registrations (AddScoped<IService, Service>() or AddScoped(typeof(IService), typeof(Service)))
+    in the given order. Returns mapping interfaceShortName -> list of implementation short names.
     """
     di_map = defaultdict(list)
-    pattern_generic = re.compile(r"\bAdd(?:Scoped|Transient|Singleton)\s*<\s*([A-Za-z0-9_\.<>]+)\s*,\s*([A-Za-z0-9_\.<>]+)\s*>", re.IGNORECASE)
-    pattern_typeof = re.compile(r"\bAdd(?:Scoped|Transient|Singleton)\s*\(\s*typeof\(\s*([A-Za-z0-9_\.<>]+)\s*\)\s*,\s*typeof\(\s*([A-Za-z0-9_\.<>]+)\s*\)\s*\)", re.IGNORECASE)
+    for facts in facts_list:
+        for iface, impl in facts['di']:
+            if impl not in di_map[iface]:
+                di_map[iface].append(impl)
+    return di_map
+
+
+def extract_file_facts(path_str, stage_times=None):
+    """Read and comment-strip one file once and run every per-file extractor on it.
 
-    def is_ignored(p: Path):
+    Returns (facts, file_info): facts is the compact per-file record (namespaces, usings, declared
+    classes/methods, var map, field/param types, new types, invocations, DI registrations) and
+    file_info is (size, mtime_ns, sha1) of the bytes that were parsed, used as the cache key.
+    This is the unit of work that runs in the process pool. When stage_times is a dict, the seconds
+    spent in each extraction stage are added to it (--metrics).
+    """
+    lap = stage_clock(stage_times)
+    path = Path(path_str)
+    text_raw, digest = read_source(path)
+    lap('read')
+    text = strip_comments(text_raw)
+    lap('strip_comments')
+    classes, methods = parse_declared_types_and_methods(text_raw)
+    lap('declarations')
+    nss, us = parse_namespaces_and_usings(text_raw)
+    lap('namespaces_usings')
+    var_map = find_variable_type_map(text)
+    lap('var_map')
+    param_field_types = parse_field_and_param_types(text)
+    lap('field_param_types')
+    # new TypeName usages
+    new_types = set(NEW_TYPE_RE.findall(text))
+    lap('new_types')
+    invocations = extract_invocations(text)
+    lap('invocations')
+    di = find_di_registrations(text_raw) if path.suffix.lower() == '.cs' else []
+    lap('di')
+    facts = {
+        'namespaces': nss,
+        'usings': us,
+        'classes': classes,
+        'methods': methods,
+        'var_map': var_map,
+        'param_field_types': param_field_types,
+        'new_types': new_types,
+        'invocations': invocations,
+        'di': di,
+    }
+    try:
+        st = path.stat()
+        file_info = (st.st_size, st.st_mtime_ns, digest) if digest is not None else None
+    except OSError:
+        file_info = None
+    return facts, file_info
+
+
+def extract_file_facts_timed(path_str):
+    """extract_file_facts() for the pool when --metrics is on: (facts, file_info, stage_times)."""
+    stage_times = {}
+    facts, file_info = extract_file_facts(path_str, stage_times)
+    return facts, file_info, stage_times
+
+
+def file_sha1(path: Path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def extraction_fingerprint(exts):
+    """Fingerprint of everything that influences per-file extraction: the cache schema version, the
+    source of this script (the regex heuristics live here) and the extraction-related CLI flags.
+    Any change invalidates the whole cache."""
+    h = hashlib.sha1()
+    h.update(str(CACHE_SCHEMA_VERSION).encode())
+    try:
+        h.update(Path(__file__).read_bytes())
+    except Exception:
+        pass
+    h.update(repr(sorted(exts)).encode())
+    return h.hexdigest()
+
+
+class FactCache:
+    """On-disk (sqlite) cache of extract_file_facts() results keyed by path, size, mtime and content hash.
+
+    An entry is reused when size and mtime are unchanged, or when only the mtime changed but the content
+    hash still matches (e.g. after a fresh checkout). Entries for files that were not looked up during a
+    run are pruned on close().
+    """
+
+    def __init__(self, db_path: Path, fingerprint: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS facts (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha1 TEXT, data BLOB)')
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if not row or row[0] != fingerprint:
+            # extraction rules or flags changed: nothing stored is trustworthy any more
+            self.conn.execute('DELETE FROM facts')
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,))
+            self.conn.commit()
+        self.entries = {r[0]: (r[1], r[2], r[3]) for r in self.conn.execute('SELECT path, size, mtime_ns, sha1 FROM facts')}
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path):
+        """Return cached facts for path, or None if the file is new or changed."""
+        key = str(path)
+        self.seen.add(key)
+        entry = self.entries.get(key)
         try:
-            rel = str(p.relative_to(src_root)).replace('\\', '/')
-        except Exception:
-            rel = str(p).replace('\\', '/')
-        for g in ignore_globs:
-            if fnmatch.fnmatch(rel, g) or fnmatch.fnmatch(str(p).replace('\\', '/'), g):
-                return True
-        for rg in ignore_regexes:
-            if rg.search(rel) or rg.search(str(p)):
-                return True
-        return False
+            st = path.stat()
+        except OSError:
+            entry = None
+        if entry is not None and entry[0] == st.st_size:
+            if entry[1] != st.st_mtime_ns:
+                try:
+                    if file_sha1(path) != entry[2]:
+                        entry = None
+                    else:
+                        self.conn.execute('UPDATE facts SET mtime_ns = ? WHERE path = ?', (st.st_mtime_ns, key))
+                except OSError:
+                    entry = None
+            if entry is not None:
+                row = self.conn.execute('SELECT data FROM facts WHERE path = ?', (key,)).fetchone()
+                if row:
+                    self.hits += 1
+                    return pickle.loads(row[0])
+        self.misses += 1
+        return None
+
+    def put(self, path: Path, facts, file_info):
+        """Store facts extracted from a file whose (size, mtime_ns, sha1) was file_info."""
+        if file_info is None:
+            return
+        size, mtime_ns, digest = file_info
+        self.conn.execute('INSERT OR REPLACE INTO facts (path, size, mtime_ns, sha1, data) VALUES (?, ?, ?, ?, ?)',
+                          (str(path), size, mtime_ns, digest, pickle.dumps(facts, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def flush(self):
+        """Commit the entries stored so far (--watch keeps the cache open between updates)."""
+        self.conn.commit()
+
+    def close(self):
+        stale = [k for k in self.entries if k not in self.seen]
+        self.conn.executemany('DELETE FROM facts WHERE path = ?', [(k,) for k in stale])
+        self.conn.commit()
+        self.conn.close()
+
+
+def iter_file_facts(paths, cache=None, workers=None, metrics=None, identical=None):
+    """Yield (path, facts) for paths, serving unchanged files from cache (first) and extracting the rest
+    in a process pool. Facts are handed over one file at a time, so the caller decides what is kept.
+    With metrics (a RunMetrics), every extracted file's size and per-stage times are recorded.
+    With identical (an IdenticalFiles), only the first of the uncached copies of a file is extracted;
+    the other copies get the same facts object (nothing downstream modifies facts in place)."""
+    if workers is None:
+        workers = max(1, multiprocessing.cpu_count() - 1)
+    missing = []
+    for p in paths:
+        facts = cache.get(p) if cache is not None else None
+        if facts is None:
+            missing.append(p)
+        else:
+            if identical is not None:
+                identical.skip(p)
+            yield p, facts
+    # the first uncached copy of each blob is extracted, the others are handed its facts
+    seen = set()
+    unique = []
+    for p in missing:
+        blob = identical.blob(p) if identical is not None else None
+        if blob is None or blob not in seen:
+            unique.append(p)
+            seen.add(blob)
+    if metrics is not None:
+        metrics.count('extraction', 'cache_hits', len(paths) - len(missing))
+        metrics.count('extraction', 'parsed', len(unique))
+        metrics.count('extraction', 'identical_copies', len(missing) - len(unique))
+    if missing:
+        extract = extract_file_facts if metrics is None else extract_file_facts_timed
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = ex.map(extract, [str(p) for p in unique], chunksize=16)
+            for p in missing:
+                shared = identical.shared(p) if identical is not None else None
+                if shared is not None:
+                    # a copy of a file extracted earlier in this loop; cached under its own mtime
+                    facts, file_info = shared
+                    try:
+                        file_info = (file_info[0], p.stat().st_mtime_ns, file_info[2]) if file_info is not None else None
+                    except OSError:
+                        file_info = None
+                else:
+                    result = next(results)
+                    facts, file_info = result[0], result[1]
+                    if metrics is not None:
+                        metrics.record_file(p, result[2], file_info[0] if file_info is not None else 0)
+                    if identical is not None:
+                        identical.keep(p, (facts, file_info))
+                if cache is not None:
+                    cache.put(p, facts, file_info)
+                yield p, facts
+
+
+def collect_file_facts(paths, cache=None, workers=None):
+    """Return {path_str: facts} for paths (see iter_file_facts)."""
+    return {str(p): facts for p, facts in iter_file_facts(paths, cache=cache, workers=workers)}
+
+
+def ast_short_type(type_name):
+    """Short name of an exporter type string: generic arguments, array / nullable suffixes and the
+    namespace qualifier dropped ('Dictionary<int, Foo>' -> 'Dictionary', 'Ns.Foo[]' -> 'Foo')."""
+    t = strip_generic_suffix((type_name or '').strip()).rstrip('[]?').strip()
+    return t.split('.')[-1]
+
+
+def facts_from_ast_entry(entry):
+    """extract_file_facts()-shaped facts for one AstExporter file entry (see ast_export.py).
+
+    Namespaces, usings, declared types, methods, field and parameter types, invocations and DI
+    registrations come from the exporter's syntax-tree data. Local 'var x = new T' types and
+    'new T' usages have no structured counterpart there, so the same heuristics as for source text
+    run on the methods' bodyText.
+    """
+    classes = list(dict.fromkeys(t['name'] for t in entry.get('declaredTypes') or () if t.get('name')))
+    methods = []
+    param_field_types = set()
+    var_map = {}
+    new_types = set()
+    invocations = []
+    di = []
+    for info in entry_types(entry):
+        for field in info.get('fields') or ():
+            t = ast_short_type(field.get('type'))
+            if t:
+                param_field_types.add(t)
+    for method, _ in entry_methods(entry):
+        if method.get('name'):
+            methods.append(method['name'])
+        for param in method.get('parameters') or ():
+            t = ast_short_type(param.get('type'))
+            if t:
+                param_field_types.add(t)
+        body = method.get('bodyText') or ''
+        var_map.update(find_variable_type_map(body))
+        new_types.update(NEW_TYPE_RE.findall(body))
+        for call in method.get('methodCalls') or ():
+            expr = call.get('expression') or ''
+            args = ', '.join(call.get('arguments') or ())
+            # the exporter keeps generic arguments in the expression: AddScoped<IService, Service>
+            di.extend(find_di_registrations(f'{expr}({args})'))
+            while GENERIC_ARGS_RE.search(expr):
+                expr = GENERIC_ARGS_RE.sub('', expr)
+            m = CALL_NAME_RE.search(expr.replace('?.', '.'))
+            if m and m.group(0).strip('.'):
+                invocations.append((m.group(0).strip('.'), args))
+    return {
+        'namespaces': list(dict.fromkeys(entry.get('namespaces') or ())),
+        'usings': list(dict.fromkeys(entry.get('usings') or ())),
+        'classes': classes,
+        'methods': list(dict.fromkeys(methods)),
+        'var_map': var_map,
+        'param_field_types': param_field_types,
+        'new_types': new_types,
+        'invocations': invocations,
+        'di': di,
+    }
+
+
+def iter_ast_file_facts(export: AstExport, src_root: Path, ignore, metrics=None):
+    """Yield (path, facts) for the files of an AstExporter output, reading one entry at a time
+    (--from-ast). Files the ignore matcher rejects are skipped."""
+    for entry in export.iter_entries():
+        p = entry_path(entry, src_root)
+        if ignore.ignores_file(p):
+            continue
+        stage_times = {} if metrics is not None else None
+        lap = stage_clock(stage_times)
+        facts = facts_from_ast_entry(entry)
+        lap('ast_facts')
+        if metrics is not None:
+            metrics.record_file(p, stage_times)
+        yield p, facts
 
-    for p in src_root.rglob('*.cs'):
-        if p.is_file() and not is_ignored(p):
-            try:
-                text = p.read_text(encoding='utf-8')
-            except Exception:
-                continue
-            for m in pattern_generic.finditer(text):
-                iface = m.group(1).split('.')[-1]
-                impl = m.group(2).split('.')[-1]
-                if impl not in di_map[iface]:
-                    di_map[iface].append(impl)
-            for m in pattern_typeof.finditer(text):
-                iface = m.group(1).split('.')[-1]
-                impl = m.group(2).split('.')[-1]
-                if impl not in di_map[iface]:
-                    di_map[iface].append(impl)
 
-    return di_map
+def ast_export_root(export: AstExport):
+    """The root AstExporter scanned, from the first entry that records it (None if none does)."""
+    for entry in export.iter_entries():
+        root = entry_root(entry)
+        if root is not None:
+            return root
+    return None
+
+
+# facts only read while the file's own imports are resolved (process_record_imports)
+RESOLUTION_FACT_KEYS = ('var_map', 'param_field_types', 'new_types', 'invocations')
+
+
+class ResolutionFactStore:
+    """Keeps the per-file resolution facts (RESOLUTION_FACT_KEYS) under a memory budget.
+
+    Facts stay on the record until their serialized size adds up to budget_bytes; the facts of later
+    files are spilled to a temporary sqlite file and loaded back while that file's imports are
+    resolved. budget_bytes=None keeps everything in memory. Each process opens its own connection,
+    so the store can be shared with fork- or spawn-started import workers once seal() was called.
+    """
+
+    def __init__(self, budget_bytes=None, spill_dir=None):
+        self.budget = budget_bytes
+        self.spill_dir = spill_dir
+        self.used = 0
+        self.spilled = 0
+        self.path = None
+        self._conn = None
+        self._pid = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_pid'] = None
+        return state
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            if self.path is None:
+                fd, self.path = tempfile.mkstemp(prefix='import_facts_', suffix='.sqlite', dir=self.spill_dir)
+                os.close(fd)
+            self._conn = sqlite3.connect(self.path)
+            self._pid = os.getpid()
+            self._conn.execute('CREATE TABLE IF NOT EXISTS facts (path TEXT PRIMARY KEY, data BLOB)')
+        return self._conn
+
+    def keep(self, path_str, facts):
+        """Return the resolution facts to put on the record, or None when they were spilled."""
+        part = {k: facts[k] for k in RESOLUTION_FACT_KEYS}
+        if self.budget is None:
+            return part
+        data = pickle.dumps(part, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.used + len(data) <= self.budget:
+            self.used += len(data)
+            return part
+        self._connection().execute('INSERT OR REPLACE INTO facts (path, data) VALUES (?, ?)', (path_str, data))
+        self.spilled += 1
+        return None
+
+    def load(self, path_str):
+        row = self._connection().execute('SELECT data FROM facts WHERE path = ?', (path_str,)).fetchone()
+        return pickle.loads(row[0]) if row else {}
+
+    def seal(self):
+        """Make spilled facts visible to other processes."""
+        if self._conn is not None:
+            self._conn.commit()
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
 
 
 def match_using_to_file_ids(using, ns_to_ids):
@@ -461,7 +1299,12 @@ def match_using_to_file_ids(using, ns_to_ids):
     If GLOBAL_STRICT_USINGS is True we use a conservative rule: only declared namespace == using or
     declared namespace startswith(using + '.') (i.e. using is a parent or equal). We explicitly
     remove the reverse check which was causing some noisy matches.
+
+    ns_to_ids is normally the NamespaceTrie from build_namespace_index (lookup in O(namespace depth));
+    a plain namespace -> ids mapping falls back to a linear scan.
     """
+    if isinstance(ns_to_ids, NamespaceTrie):
+        return ns_to_ids.match(using, strict=GLOBAL_STRICT_USINGS)
     matches = set()
     for decl_ns, ids in ns_to_ids.items():
         if GLOBAL_STRICT_USINGS:
@@ -474,11 +1317,524 @@ def match_using_to_file_ids(using, ns_to_ids):
     return matches
 
 
-def main():
+def count_extensions(files):
+    """FileTypes table: extension (lowercase, '(no_ext)' for none) -> number of files."""
+    ext_counter = Counter()
+    for p in files:
+        ext = p.suffix.lower() if p.suffix else '(no_ext)'
+        ext_counter[ext] += 1
+    return ext_counter
+
+
+def new_record(fid, path: Path, src_root: Path, facts, resolution):
+    """The record import resolution works on, from a file's extracted facts. resolution is what
+    ResolutionFactStore.keep() returned for them (None: spilled)."""
+    rec = {
+        'id': fid,
+        'path': str(path),
+        'relpath': str(path.relative_to(src_root)),
+        'declared_namespaces': facts['namespaces'],
+        'usings': facts['usings'],
+        'declared_classes': facts['classes'],
+        'declared_methods': facts['methods'],
+    }
+    if resolution is None:
+        rec['spilled'] = True
+    else:
+        rec.update(resolution)
+    return rec
+
+
+def reference_names(rec):
+    """(names, usings) a record's import rows depend on: every name process_record_imports looks up in
+    class_idx, method_idx or di_map (a superset: all var_map types, both ends of every invocation) and
+    the usings it matches against ns_to_ids."""
+    names = set(rec.get('param_field_types', ()))
+    names.update(rec.get('new_types', ()))
+    names.update(rec.get('var_map', {}).values())
+    for expr, _ in rec.get('invocations', ()):
+        parts = expr.split('.')
+        names.add(parts[0])
+        names.add(parts[-1])
+    return names, set(rec.get('usings', ()))
+
+
+def using_matches_namespace(using, ns):
+    """True when files declaring ns can be among match_using_to_file_ids(using) (permissive rule, which
+    includes the strict one)."""
+    return ns == using or ns.startswith(using + '.') or using.startswith(ns + '.')
+
+
+def patch_postings(index, fid, old, new):
+    """Move file fid's entries in index (name -> ascending file ids, one per declaration, as built by
+    build_decl_indexes) from its old declaration list to the new one. Returns the names whose entries
+    changed."""
+    changed = {name for name in set(old) | set(new) if old.count(name) != new.count(name)}
+    for name in changed:
+        ids = [i for i in index.get(name, ()) if i != fid]
+        count = new.count(name)
+        if count:
+            pos = bisect_left(ids, fid)
+            ids[pos:pos] = [fid] * count
+        if ids:
+            index[name] = ids
+        else:
+            index.pop(name, None)
+    return changed
+
+
+class LiveImportIndex:
+    """Records, declaration indexes and resolved import rows of one source tree, kept in memory by --watch.
+
+    update() applies a batch of changed files as per-file deltas: the files are re-extracted (through
+    the fact cache), their class_idx / method_idx entries are patched in place, di_map and ns_to_ids
+    are re-merged only when the file's DI registrations or namespaces changed, and only the files that
+    look up a changed name, DI interface or namespace (name_refs / using_refs) are re-resolved.
+    File ids are positions in the sorted file list, so adding or removing a source file renumbers
+    them: then the indexes are rebuilt from the kept facts and every file is re-resolved, still
+    without re-parsing the unchanged ones.
+    """
+
+    def __init__(self, all_files, src_root: Path, exts, records, di_files, di_regs, indexes, store,
+                 cache=None, workers=1, import_workers=1):
+        self.all_files = set(all_files)
+        self.src_root = src_root
+        self.exts = exts
+        self.records = records
+        self.by_path = {r['path']: r for r in records}
+        self.source_files = [Path(r['path']) for r in records]
+        self.di_files = di_files
+        # path -> DI registrations, for the .cs files that have any
+        self.di_regs = di_regs
+        self.class_idx, self.method_idx, self.di_map, self.ns_to_ids, self.targets = indexes
+        self.store = store
+        self.cache = cache
+        self.workers = workers
+        self.import_workers = import_workers
+        # name / using -> paths of the records whose rows depend on it (reference_names)
+        self.name_refs = defaultdict(set)
+        self.using_refs = defaultdict(set)
+        for rec in records:
+            self._add_refs(rec)
+        self.results = list(self._resolve(records))
+
+    def _facts(self, rec):
+        return dict(rec, **self.store.load(rec['path'])) if rec.get('spilled') else rec
+
+    def _add_refs(self, rec):
+        names, usings = reference_names(self._facts(rec))
+        for name in names:
+            self.name_refs[name].add(rec['path'])
+        for using in usings:
+            self.using_refs[using].add(rec['path'])
+
+    def _drop_refs(self, rec):
+        names, usings = reference_names(self._facts(rec))
+        for refs, keys in ((self.name_refs, names), (self.using_refs, usings)):
+            for key in keys:
+                paths = refs.get(key)
+                if paths is not None:
+                    paths.discard(rec['path'])
+                    if not paths:
+                        del refs[key]
+
+    def _replace(self, fid, path: Path, facts):
+        """Record for path built from new facts; the old record's references are dropped first (its
+        spilled facts are overwritten by keep())."""
+        old = self.by_path.get(str(path))
+        if old is not None:
+            self._drop_refs(old)
+        rec = new_record(fid, path, self.src_root, facts, self.store.keep(str(path), facts))
+        self._add_refs(rec)
+        self.by_path[rec['path']] = rec
+        return rec
+
+    def _merge_di(self):
+        self.di_map = build_di_registration_map({'di': self.di_regs[str(p)]} for p in self.di_files if str(p) in self.di_regs)
+
+    def _resolve(self, records):
+        return resolve_imports(records, self.class_idx, self.method_idx, self.di_map, self.ns_to_ids, self.targets,
+                               workers=self.import_workers, store=self.store)
+
+    def update(self, all_files, changed):
+        """Apply one SourceWatcher.wait() batch (changed paths, or None for "everything") given the
+        re-listed tree. Returns (files re-extracted, files re-resolved), or None when nothing that is
+        reported changed."""
+        all_set = set(all_files)
+        added = all_set - self.all_files
+        removed = self.all_files - all_set
+        if changed is None:
+            modified = all_set - added
+        else:
+            modified = {p for p in map(Path, changed) if p in all_set} - added
+        self.all_files = all_set
+        parse = sorted(p for p in added | modified if p.suffix.lower() in self.exts or p.suffix.lower() == '.cs')
+        if not parse and not added and not removed:
+            return None
+        new_facts = dict(iter_file_facts(parse, cache=self.cache, workers=self.workers)) if parse else {}
+        if self.cache is not None:
+            self.cache.flush()
+
+        di_changed = False
+        for p in removed:
+            di_changed |= self.di_regs.pop(str(p), None) is not None
+        for p, facts in new_facts.items():
+            if p.suffix.lower() == '.cs' and facts['di'] != self.di_regs.get(str(p), []):
+                di_changed = True
+                if facts['di']:
+                    self.di_regs[str(p)] = facts['di']
+                else:
+                    del self.di_regs[str(p)]
+        self.di_files = sorted(p for p in all_set if p.suffix.lower() == '.cs')
+
+        source_files = sorted(p for p in all_set if p.suffix.lower() in self.exts)
+        if source_files != self.source_files:
+            resolved = self._rebuild(source_files, new_facts)
+        else:
+            resolved = self._patch(new_facts, di_changed)
+        return len(new_facts), resolved
+
+    def _rebuild(self, source_files, new_facts):
+        old = self.by_path
+        records = []
+        for fid, p in enumerate(source_files, start=1):
+            rec = old.get(str(p))
+            if p in new_facts:
+                rec = self._replace(fid, p, new_facts[p])
+            else:
+                rec['id'] = fid
+            records.append(rec)
+        live = {str(p) for p in source_files}
+        for key in [k for k in old if k not in live]:
+            self._drop_refs(old.pop(key))
+        self.records = records
+        self.source_files = source_files
+        self.class_idx, self.method_idx = build_decl_indexes(records)
+        self._merge_di()
+        self.ns_to_ids = build_namespace_index(records)
+        self.targets = ImportTargets(records)
+        self.results = list(self._resolve(records))
+        return len(records)
+
+    def _patch(self, new_facts, di_changed):
+        names = set()
+        namespaces = set()
+        dirty = set()
+        for p, facts in new_facts.items():
+            old = self.by_path.get(str(p))
+            if old is None:
+                # a .cs file outside --extensions: only its DI registrations are used
+                continue
+            fid = old['id']
+            names |= patch_postings(self.class_idx, fid, old['declared_classes'], facts['classes'])
+            names |= patch_postings(self.method_idx, fid, old['declared_methods'], facts['methods'])
+            if facts['namespaces'] != old['declared_namespaces']:
+                namespaces.update(old['declared_namespaces'], facts['namespaces'])
+            rec = self._replace(fid, p, facts)
+            self.records[fid - 1] = self.targets.by_id[fid] = rec
+            dirty.add(rec['path'])
+        ifaces = set()
+        if di_changed:
+            old_map = self.di_map
+            self._merge_di()
+            ifaces = {i for i in old_map.keys() | self.di_map.keys() if old_map.get(i) != self.di_map.get(i)}
+        # DI expansion looks the implementations up in class_idx
+        ifaces.update(i for i, impls in self.di_map.items() if names.intersection(impls))
+        if namespaces:
+            # the trie keeps ns_to_ids insertion order, which match() results are filled in
+            self.ns_to_ids = build_namespace_index(self.records)
+            for using, paths in self.using_refs.items():
+                if any(using_matches_namespace(using, ns) for ns in namespaces):
+                    dirty |= paths
+        for name in names | ifaces:
+            dirty |= self.name_refs.get(name, set())
+        records = sorted((self.by_path[k] for k in dirty), key=lambda r: r['id'])
+        for rec, result in zip(records, self._resolve(records)):
+            self.results[rec['id'] - 1] = result
+        return len(records)
+
+    def close(self):
+        self.store.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def watch_imports(live, args, src_root: Path, output: Path, ignore):
+    """--watch loop: wait for changes below src_root, apply them to live and rewrite the report."""
+    watcher = SourceWatcher(src_root, skip_dir=ignore.ignores_dir, interval=args.poll_interval, poll=args.poll)
+    if watcher.mode == 'poll' and not args.poll:
+        print(f'inotify unavailable ({watcher.fallback_reason}); polling every {args.poll_interval}s')
+    print(f'Watching {src_root} for changes ({watcher.mode}); press Ctrl+C to stop')
+    try:
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            all_files = [p for p in walk_files(src_root, ignore.ignores_dir) if not ignore.ignores_file(p)]
+            counts = live.update(all_files, changed)
+            if counts is None:
+                continue
+            writer = open_report_writer(args.format, output, autosize_columns=args.autosize)
+            write_report(writer, count_extensions(all_files), live.records, live.results, progress=False)
+            writer.close()
+            print(f'Updated {output}: {counts[0]} files re-read, {counts[1]} re-resolved '
+                  f'in {time.perf_counter() - start:.2f}s')
+    except KeyboardInterrupt:
+        print('Stopped watching.')
+    finally:
+        watcher.close()
+        live.close()
+    return 0
+
+
+def write_report(writer, ext_counter, records, results, progress=True, metrics=None):
+    """Write the FileTypes, Files and Imports tables. results yields one process_record_imports()
+    result (or None for a file that failed) per record, in record order. With metrics, the Imports
+    rows are counted per MatchedBy heuristic."""
+    writer.begin_table('FileTypes', ['Extension', 'Count'])
+    for k, v in sorted(ext_counter.items(), key=lambda x: (-x[1], x[0])):
+        writer.append([k, v])
+    writer.end_table()
+
+    # Do not include absolute path column as requested
+    writer.begin_table('Files', ['FileID', 'RelPath', 'DeclaredNamespaces', 'Usings'])
+    for r in records:
+        writer.append([r['id'], r['relpath'], '; '.join(r['declared_namespaces']), '; '.join(r['usings'])])
+    writer.end_table()
+
+    # Add columns to show WHY a file was included (diagnostic)
+    writer.begin_table('Imports', ['FileID', 'RelPath', 'ImportedFileID', 'ImportedRelPath', 'MatchedBy', 'MatchedSymbol'])
+    total = len(records)
+    for idx, result in enumerate(results, start=1):
+        if progress and (idx % 50 == 0 or idx == total):
+            print(f'Processing imports: {idx}/{total}')
+        if result is None:
+            if metrics is not None:
+                metrics.count('imports', 'failed_files')
+            continue
+        fid, rel, imported = result
+        if not imported:
+            writer.append([fid, rel, '', '', '', ''])
+            if metrics is not None:
+                metrics.count('imports', 'files_without_imports')
+        else:
+            for iid, matched_by, matched_sym in imported:
+                imp = records[iid - 1]
+                writer.append([fid, rel, iid, imp['relpath'], matched_by, matched_sym])
+                if metrics is not None:
+                    metrics.count('matches', matched_by)
+    writer.end_table()
+
+
+# layout version of the --shard partial indexes; --merge refuses partials of another version
+PARTIAL_SCHEMA_VERSION = 1
+
+
+def parse_shard(spec):
+    """'I/N' -> (I, N) with 0 <= I < N (argparse type for --shard)."""
+    try:
+        index, count = (int(x) for x in spec.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected I/N, got {spec!r}')
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f'shard index must be in 0..N-1, got {spec!r}')
+    return index, count
+
+
+def shard_of(relpath, count):
+    """Shard (0..count-1) a file belongs to: a hash of its '/'-separated path relative to the source root,
+    so every process computes the same split whatever the platform or walk order."""
+    key = str(relpath).replace('\\', '/').encode('utf-8')
+    return int.from_bytes(hashlib.sha1(key).digest()[:8], 'big') % count
+
+
+def default_partial_path(output: Path, shard):
+    return output.with_name(f'{output.stem}.shard{shard[0]}of{shard[1]}.partial.sqlite')
+
+
+def write_partial_index(path: Path, src_root: Path, ext_counter, facts_iter, source_set, options, shard):
+    """--shard: write one shard's partial index (sqlite), streaming the facts as they are extracted.
+
+    Tables: meta (schema, extraction fingerprint, shard, options), file_types (extension counts of the
+    shard's files), facts (relpath -> pickled extract_file_facts() facts; source = 1 for --extensions files,
+    0 for .cs files read only for DI registrations), postings (class / method / namespace name -> relpath,
+    with the number of declarations) and di (the DI registrations of each .cs file, in order).
+    Returns the number of files written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE file_types (ext TEXT PRIMARY KEY, count INTEGER);
+        CREATE TABLE facts (relpath TEXT PRIMARY KEY, source INTEGER, data BLOB);
+        CREATE TABLE postings (kind TEXT, name TEXT, relpath TEXT, n INTEGER);
+        CREATE TABLE di (relpath TEXT, seq INTEGER, iface TEXT, impl TEXT);
+    """)
+    meta = {'schema': PARTIAL_SCHEMA_VERSION, 'fingerprint': extraction_fingerprint(options['extensions']),
+            'shard': shard[0], 'shards': shard[1], 'source_root': str(src_root), 'options': options}
+    conn.executemany('INSERT INTO meta VALUES (?, ?)', [(k, json.dumps(v)) for k, v in meta.items()])
+    conn.executemany('INSERT INTO file_types VALUES (?, ?)', sorted(ext_counter.items()))
+    written = 0
+    for p, facts in facts_iter:
+        rel = p.relative_to(src_root).as_posix()
+        source = p in source_set
+        conn.execute('INSERT INTO facts VALUES (?, ?, ?)',
+                     (rel, int(source), pickle.dumps(facts, protocol=pickle.HIGHEST_PROTOCOL)))
+        if source:
+            for kind, names in (('class', facts['classes']), ('method', facts['methods']), ('namespace', facts['namespaces'])):
+                conn.executemany('INSERT INTO postings VALUES (?, ?, ?, ?)',
+                                 [(kind, name, rel, n) for name, n in Counter(names).items()])
+        if p.suffix.lower() == '.cs':
+            conn.executemany('INSERT INTO di VALUES (?, ?, ?, ?)',
+                             [(rel, seq, iface, impl) for seq, (iface, impl) in enumerate(facts['di'])])
+        written += 1
+    conn.commit()
+    conn.close()
+    return written
+
+
+def _read_partial_meta(path):
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    meta = {k: json.loads(v) for k, v in conn.execute('SELECT key, value FROM meta')}
+    return conn, meta
+
+
+def merge_partial_indexes(paths, exts, src_root=None, store=None):
+    """--merge: combine the partial indexes of every shard into what a single-process run builds before
+    import resolution. Returns (src_root, ext_counter, records, (class_idx, method_idx, di_map, ns_to_ids)).
+
+    File ids are assigned over the union of the shards' source files in the same sorted order as the
+    single-process run, the postings of every shard are merged into the id-ordered class / method /
+    namespace indexes and the DI registrations are merged in sorted .cs file order, so the resolved
+    imports are identical. Per-file facts are read one file at a time; their resolution part goes
+    through store (ResolutionFactStore), which spills beyond --memory-budget.
+    Raises ValueError when the partials are not one complete, consistent set of shards."""
+    store = store or ResolutionFactStore()
+    parts = []
+    try:
+        for path in paths:
+            parts.append(_read_partial_meta(path))
+        metas = [meta for _, meta in parts]
+        if not metas:
+            raise ValueError('no partial indexes given')
+        first = metas[0]
+        for path, meta in zip(paths, metas):
+            if meta.get('schema') != PARTIAL_SCHEMA_VERSION:
+                raise ValueError(f'{path}: unsupported partial index schema {meta.get("schema")}')
+            for key in ('fingerprint', 'shards', 'options'):
+                if meta[key] != first[key]:
+                    raise ValueError(f'{path}: {key} differs from {paths[0]} (shards must run the same script '
+                                     f'with the same options)')
+        if sorted(first['options']['extensions']) != sorted(exts):
+            raise ValueError(f'the partials were extracted with --extensions {",".join(first["options"]["extensions"])}')
+        if first['fingerprint'] != extraction_fingerprint(exts):
+            raise ValueError('the partials were extracted by a different version of this script')
+        shards = sorted(meta['shard'] for meta in metas)
+        if shards != list(range(first['shards'])):
+            missing = sorted(set(range(first['shards'])) - set(shards))
+            raise ValueError(f'expected shards 0..{first["shards"] - 1} once each'
+                             + (f'; missing {missing}' if missing else '; got duplicates'))
+
+        src_root = Path(src_root) if src_root else Path(first['source_root'])
+        ext_counter = Counter()
+        source_rels = []
+        cs_rels = []
+        for conn, _ in parts:
+            ext_counter.update(dict(conn.execute('SELECT ext, count FROM file_types')))
+            for rel, source in conn.execute('SELECT relpath, source FROM facts'):
+                if source:
+                    source_rels.append(rel)
+                if rel.lower().endswith('.cs'):
+                    cs_rels.append(rel)
+        # the single-process run sorts Path objects below the same root
+        order = sorted((src_root / rel, rel) for rel in source_rels)
+        ids = {rel: fid for fid, (_, rel) in enumerate(order, start=1)}
+
+        records = [None] * len(order)
+        for conn, _ in parts:
+            for rel, data in conn.execute('SELECT relpath, data FROM facts WHERE source = 1'):
+                fid = ids[rel]
+                facts = pickle.loads(data)
+                p = order[fid - 1][0]
+                records[fid - 1] = new_record(fid, p, src_root, facts, store.keep(str(p), facts))
+
+        postings = {'class': defaultdict(list), 'method': defaultdict(list), 'namespace': defaultdict(list)}
+        for conn, _ in parts:
+            for kind, name, rel, n in conn.execute('SELECT kind, name, relpath, n FROM postings'):
+                postings[kind][name].append((ids[rel], n))
+        merged = {}
+        for kind, index in postings.items():
+            out = defaultdict(list)
+            for name, entries in index.items():
+                for fid, n in sorted(entries):
+                    out[name].extend([fid] * n)
+            merged[kind] = out
+
+        regs = defaultdict(list)
+        for conn, _ in parts:
+            for rel, iface, impl in conn.execute('SELECT relpath, iface, impl FROM di ORDER BY relpath, seq'):
+                regs[rel].append((iface, impl))
+        di_map = build_di_registration_map({'di': regs.get(rel, [])}
+                                           for _, rel in sorted((src_root / rel, rel) for rel in cs_rels))
+    finally:
+        for conn, _ in parts:
+            conn.close()
+    return src_root, ext_counter, records, (merged['class'], merged['method'], di_map, NamespaceTrie(merged['namespace']))
+
+
+# phases main() reports to its timer (--metrics, --profile-phase, bench_scanners.py)
+PHASES = ('discover', 'extract', 'merge', 'index', 'imports', 'save')
+
+
+def run_merge(args, output: Path, exts, src_root, phase, metrics=None):
+    """--merge: combine the shards' partial indexes (merge_partial_indexes), resolve imports and write the
+    report, as the single-process run does from its own extraction."""
+    budget = int(args.memory_budget * 1024 * 1024) if args.memory_budget is not None else None
+    store = ResolutionFactStore(budget)
+    try:
+        with phase('merge') as stats:
+            src_root, ext_counter, records, indexes = merge_partial_indexes(args.merge, exts, src_root, store)
+            stats['files'] = len(records)
+    except (ValueError, sqlite3.Error) as e:
+        store.close()
+        print('Cannot merge partial indexes:', e)
+        return 2
+    print(f'Merged {len(args.merge)} partial indexes: {sum(ext_counter.values())} files, {len(records)} source files')
+    if store.spilled:
+        print(f'Memory budget: {store.spilled} of {len(records)} files spilled resolution facts to disk')
+    class_idx, method_idx, di_map, ns_to_ids = indexes
+    with phase('index') as stats:
+        targets = ImportTargets(records)
+        stats['files'] = len(records)
+    import_workers = args.workers if args.parallel_imports else 1
+    writer = open_report_writer(args.format, output, autosize_columns=args.autosize)
+    with phase('imports') as stats:
+        results = resolve_imports(records, class_idx, method_idx, di_map, ns_to_ids, targets, workers=import_workers, store=store)
+        write_report(writer, ext_counter, records, results, metrics=metrics)
+        store.close()
+        stats['files'] = len(records)
+    with phase('save'):
+        written = writer.close()
+    for path in written:
+        print('Wrote', path)
+    if metrics is not None:
+        metrics.write(args.metrics, script='generate_imports_from_source', source_root=str(src_root),
+                      files=sum(ext_counter.values()), source_files=len(records), workers=args.workers,
+                      partials=len(args.merge))
+        print('Wrote metrics to', args.metrics)
+    return 0
+
+
+def main(argv=None, timer=None):
+    """Command-line entry point. timer (a phase_timer.PhaseTimer) receives the time spent in each phase:
+    discover, extract, index, imports (resolution and row writing, which are streamed) and save;
+    --metrics creates a RunMetrics for it."""
     parser = argparse.ArgumentParser()
     parser.add_argument('--source-root', help='Source root to scan (will prompt if omitted)')
     parser.add_argument('--extensions', default='.cs', help='Comma-separated file extensions to include for namespace/usings scanning (default: .cs)')
-    parser.add_argument('--output', default='asts_enhanced/file_imports_from_source.xlsx', help='Output XLSX file')
+    parser.add_argument('--output', default='asts_enhanced/file_imports_from_source.xlsx', help='Output file (the suffix is adjusted to --format)')
+    parser.add_argument('--format', choices=sorted(REPORT_FORMATS), default='xlsx', help='Output backend: xlsx (default), csv, jsonl or sqlite')
     parser.add_argument('--ignore-glob', action='append', default=[], help='Glob pattern to ignore (can be passed multiple times). Example: **/obj/**')
     parser.add_argument('--ignore-regex', action='append', default=[], help='Regex pattern to ignore (can be passed multiple times).')
     parser.add_argument('--autosize', action='store_true', help='Enable autosize columns (disabled by default for speed)')
@@ -486,10 +1842,51 @@ def main():
     parser.add_argument('--strict-usings', action='store_true', help='Only match using->namespace conservatively (reduces noisy using matches)')
     parser.add_argument('--exclude-filename-pattern', action='append', default=[], help='Substring pattern to exclude matching filenames (case-insensitive). Can be passed multiple times.')
     parser.add_argument('--no-using-only', action='store_true', help="Don't include imports that are only matched via 'using' (keeps only imports with other match reasons)")
-    args = parser.parse_args()
-
+    parser.add_argument('--parallel-imports', action='store_true', help='Resolve imports in --workers processes (output is identical to the sequential run)')
+    parser.add_argument('--cache', help='Per-file fact cache location (default: <output dir>/.import_fact_cache.sqlite)')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the per-file fact cache (re-parse every file)')
+    parser.add_argument('--no-dedup', action='store_true', help='Extract byte-identical files one by one instead of once per content hash')
+    parser.add_argument('--memory-budget', type=float, help='Keep at most this many MB (serialized size) of per-file resolution facts in memory; the rest is spilled to a temporary file')
+    parser.add_argument('--watch', action='store_true', help='After writing the report, keep watching --source-root and rewrite the report incrementally on every change')
+    parser.add_argument('--poll', action='store_true', help='With --watch: poll for changes instead of using inotify')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='With --watch: seconds between checks (default: 1.0)')
+    parser.add_argument('--metrics', help='Write per-phase timings, bytes read, peak memory, the slowest files per extraction stage and match counts per heuristic to this JSON file')
+    parser.add_argument('--metrics-slowest', type=int, default=10, help='With --metrics: how many of the slowest files to keep per extraction stage (default: 10)')
+    parser.add_argument('--profile-phase', choices=PHASES, help='With --metrics: run this phase under cProfile (main process only)')
+    parser.add_argument('--profile-out', help='With --profile-phase: cProfile stats file (default: <metrics file>.<phase>.prof)')
+    parser.add_argument('--from-ast', help='Read C# facts from this AstExporter output directory (summary.json + files/) instead of scanning the sources; --source-root defaults to the root it exported')
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N', help='Only extract shard I (0-based) of N and write its partial index instead of a report (see --merge)')
+    parser.add_argument('--partial', help='With --shard: partial index path (default: <output stem>.shard<I>of<N>.partial.sqlite next to --output)')
+    parser.add_argument('--merge', nargs='+', metavar='PARTIAL', help='Merge the partial indexes of all N shards, resolve imports and write the report (no files are read)')
+    args = parser.parse_args(argv)
+    if args.profile_phase and not args.metrics:
+        parser.error('--profile-phase needs --metrics')
+    if args.from_ast and args.watch:
+        parser.error('--watch cannot be combined with --from-ast')
+    if args.shard and args.merge:
+        parser.error('--shard and --merge are separate steps')
+    if (args.shard or args.merge) and (args.watch or args.from_ast):
+        parser.error('--shard / --merge cannot be combined with --watch or --from-ast')
+    if args.metrics:
+        timer = RunMetrics(args.metrics_slowest, args.profile_phase,
+                           args.profile_out or f'{args.metrics}.{args.profile_phase}.prof')
+    metrics = timer if isinstance(timer, RunMetrics) else None
+    phase = timer.phase if timer is not None else (lambda name: nullcontext({}))
+
+    export = None
+    if args.from_ast:
+        try:
+            export = AstExport(args.from_ast)
+        except FileNotFoundError as e:
+            print(e)
+            return 2
     src_root = args.source_root
-    if not src_root:
+    if not src_root and export is not None:
+        src_root = ast_export_root(export)
+        if src_root is None:
+            print('The AST export does not record absolute paths; pass --source-root.')
+            return 2
+    if not src_root and not args.merge:
         # prompt interactively and offer current working directory as default
         try:
             default_root = os.getcwd()
@@ -498,8 +1895,8 @@ def main():
         except Exception:
             print('No source root provided and cannot prompt. Use --source-root.')
             return 2
-    src_root = Path(src_root)
-    if not src_root.exists():
+    src_root = Path(src_root) if src_root else None
+    if export is None and not args.merge and not src_root.exists():
         print('Source root does not exist:', src_root)
         return 2
 
@@ -513,135 +1910,144 @@ def main():
 
     exts = [e.strip().lower() for e in args.extensions.split(',') if e.strip()]
     output = Path(args.output)
+    if output.suffix.lower() != REPORT_FORMATS[args.format]:
+        output = output.with_suffix(REPORT_FORMATS[args.format])
+    if args.merge:
+        # the partial indexes hold everything up to import resolution
+        return run_merge(args, output, exts, src_root, phase, metrics)
 
     # collect files
     default_ignore = ['**/obj/**', '**/bin/**']
     ignore_globs = list(default_ignore) + args.ignore_glob
-    ignore_regexes = [re.compile(r) for r in args.ignore_regex]
-
-    def is_ignored_path(p: Path):
-        # ignore by glob against relative path, and by regex against relative or absolute path
-        try:
-            rel = str(p.relative_to(src_root)).replace('\\', '/')
-        except Exception:
-            rel = str(p).replace('\\', '/')
-        # glob patterns
-        for pattern in ignore_globs:
-            if fnmatch.fnmatch(rel, pattern) or fnmatch.fnmatch(str(p).replace('\\', '/'), pattern):
-                return True
-        # regex patterns
-        for rg in ignore_regexes:
-            if rg.search(rel) or rg.search(str(p)):
-                return True
-        return False
-
-    all_files = [p for p in src_root.rglob('*') if p.is_file() and not is_ignored_path(p)]
+    # compiled once; whole ignored subtrees are skipped during the walk
+    ignore = IgnoreMatcher(src_root, ignore_globs, args.ignore_regex)
+
+    with phase('discover') as stats:
+        # with --from-ast the file list is the export's, collected while its entries are read
+        all_files = [] if export is not None else [p for p in walk_files(src_root, ignore.ignores_dir)
+                                                   if not ignore.ignores_file(p)]
+        if args.shard:
+            # every shard walks the whole tree and keeps its own deterministic part of it
+            all_files = [p for p in all_files if shard_of(p.relative_to(src_root).as_posix(), args.shard[1]) == args.shard[0]]
+        # byte-identical files that will be extracted are grouped by content hash, so each is extracted once
+        identical = None
+        if export is None and not args.no_dedup:
+            identical = IdenticalFiles([p for p in all_files if p.suffix.lower() in exts or p.suffix.lower() == '.cs'])
+        stats['files'] = len(all_files)
     # sheet1: file types
-    ext_counter = Counter()
-    for p in all_files:
-        ext = p.suffix.lower() if p.suffix else '(no_ext)'
-        ext_counter[ext] += 1
-
-    # for files of interest (.cs etc), extract namespaces/usings
-    source_files = [p for p in all_files if p.suffix.lower() in exts]
-    records = []
-    for idx, p in enumerate(sorted(source_files), start=1):
-        rel = str(p.relative_to(src_root))
-        nss, us = find_namespaces_and_usings(p)
-        records.append({
-            'id': idx,
-            'path': str(p),
-            'relpath': rel,
-            'declared_namespaces': nss,
-            'usings': us
-        })
-
-    # Precompute and cache common regex-derived info per file to avoid re-reading/parsing during import detection.
-    # This speeds up the sequential import loop significantly.
-    for rec in records:
-        try:
-            text_raw = Path(rec['path']).read_text(encoding='utf-8')
-            text = strip_comments(text_raw)
-        except Exception:
-            text = ''
-        rec['text'] = text
-        rec['var_map'] = find_variable_type_map(text)
-        try:
-            rec['param_field_types'] = find_field_and_param_types(Path(rec['path']))
-        except Exception:
-            rec['param_field_types'] = set()
-        # new TypeName usages
-        rec['new_types'] = set(m.group(1) for m in re.finditer(r"new\s+([A-Za-z0-9_]+)", text))
-        rec['invocations'] = extract_invocations(text)
-
-    # build declaration indexes for classes and methods (parallelized)
-    class_idx, method_idx = build_decl_indexes_parallel(records, workers=args.workers)
-
-    ns_to_ids = build_namespace_index(records)
-    # build DI registration map (interface -> implementations)
-    di_map = build_di_registration_map(src_root, ignore_globs, ignore_regexes)
-
-    # Build namespace index (used for explicit using->file matches)
-    ns_to_ids = build_namespace_index(records)
-
-    # create workbook. Use write-only mode by default for speed; enable regular workbook only if autosize requested
-    if args.autosize:
-        wb = Workbook()
-        ws1 = wb.active
-        ws1.title = sanitize_sheet_name('FileTypes')
-    else:
-        # create a write-only workbook for much lower memory use and faster writes
-        wb = Workbook(write_only=True)
-        ws1 = wb.create_sheet(title=sanitize_sheet_name('FileTypes'))
-    ws1.append(['Extension', 'Count'])
-    for k, v in sorted(ext_counter.items(), key=lambda x: (-x[1], x[0])):
-        ws1.append([k, v])
-    if args.autosize:
-        try:
-            autosize(ws1, cols=[1,2])
-        except Exception:
-            pass
-
-    ws2 = wb.create_sheet(title=sanitize_sheet_name('Files'))
-    # Do not include absolute path column as requested
-    ws2.append(['FileID', 'RelPath', 'DeclaredNamespaces', 'Usings'])
-    for r in records:
-        ws2.append([r['id'], r['relpath'], '; '.join(r['declared_namespaces']), '; '.join(r['usings'])])
-    if args.autosize:
-        try:
-            autosize(ws2)
-        except Exception:
-            pass
-
-    ws3 = wb.create_sheet(title=sanitize_sheet_name('Imports'))
-    # Add columns to show WHY a file was included (diagnostic)
-    ws3.append(['FileID', 'RelPath', 'ImportedFileID', 'ImportedRelPath', 'MatchedBy', 'MatchedSymbol'])
-
-    # Heuristic: for each file, find referenced files by the same heuristics as before.
-    # Process sequentially to preserve deterministic results (parallel workers were causing incorrect/misaligned outputs).
-    total = len(records)
-    for idx, rec in enumerate(records, start=1):
-        if idx % 50 == 0 or idx == total:
-            print(f'Processing imports: {idx}/{total}')
-        try:
-            fid, rel, imported = process_record_imports((rec, class_idx, method_idx, di_map, ns_to_ids))
-        except Exception:
-            continue
-        if not imported:
-            ws3.append([fid, rel, '', '', '', ''])
+    ext_counter = count_extensions(all_files)
+
+    # for files of interest (.cs etc), extract per-file facts (namespaces/usings, declarations, var map,
+    # field/param types, new types, invocations, DI registrations) in a single pass over each file.
+    # DI registrations are read from every .cs file, so those are extracted even if not in --extensions.
+    # Unchanged files come from the cache.
+    source_files = sorted(p for p in all_files if p.suffix.lower() in exts)
+    di_files = sorted(p for p in all_files if p.suffix.lower() == '.cs')
+    cache = None
+    if not args.no_cache and export is None:
+        # shards get a cache each, so that shards running side by side do not share one sqlite file
+        default_cache = f'.import_fact_cache.shard{args.shard[0]}of{args.shard[1]}.sqlite' if args.shard else '.import_fact_cache.sqlite'
+        cache_path = Path(args.cache) if args.cache else output.parent / default_cache
+        cache = FactCache(cache_path, extraction_fingerprint(exts))
+    if args.shard:
+        partial = Path(args.partial) if args.partial else default_partial_path(output, args.shard)
+        options = {'extensions': exts, 'ignore_glob': ignore_globs, 'ignore_regex': args.ignore_regex}
+        with phase('extract') as stats:
+            facts_iter = iter_file_facts(sorted(set(source_files) | set(di_files)), cache=cache, workers=args.workers, metrics=metrics, identical=identical)
+            stats['files'] = write_partial_index(partial, src_root, ext_counter, facts_iter, set(source_files), options, args.shard)
+        if cache is not None:
+            print(f'Fact cache: {cache.hits} reused, {cache.misses} parsed')
+            cache.close()
+        if identical is not None:
+            print(identical.summary())
+        print(f'Shard {args.shard[0]}/{args.shard[1]}: {len(all_files)} files, facts of {stats["files"]} written to {partial}')
+        if metrics is not None:
+            metrics.write(args.metrics, script='generate_imports_from_source', source_root=str(src_root),
+                          files=len(all_files), source_files=len(source_files), workers=args.workers,
+                          shard=list(args.shard))
+            print('Wrote metrics to', args.metrics)
+        return 0
+    # only the extracted facts are kept (each file's text is dropped once its facts are extracted);
+    # the resolution facts of source files go through the store, which spills beyond --memory-budget
+    budget = int(args.memory_budget * 1024 * 1024) if args.memory_budget is not None else None
+    store = ResolutionFactStore(budget)
+    source_set = set(source_files)
+    kept = {}
+    with phase('extract') as stats:
+        if export is not None:
+            facts_iter = iter_ast_file_facts(export, src_root, ignore, metrics=metrics)
         else:
-            for iid, matched_by, matched_sym in imported:
-                imp = records[iid - 1]
-                ws3.append([fid, rel, iid, imp['relpath'], matched_by, matched_sym])
-    if args.autosize:
-        try:
-            autosize(ws3)
-        except Exception:
-            pass
-
-    output.parent.mkdir(parents=True, exist_ok=True)
-    wb.save(str(output))
-    print('Wrote', output)
+            facts_iter = iter_file_facts(sorted(source_set | set(di_files)), cache=cache, workers=args.workers, metrics=metrics, identical=identical)
+        for p, facts in facts_iter:
+            if export is not None and str(p) not in kept:
+                all_files.append(p)
+            kept[str(p)] = {k: facts[k] for k in ('namespaces', 'usings', 'classes', 'methods', 'di')}
+            if p in source_set or (export is not None and p.suffix.lower() in exts):
+                kept[str(p)]['resolution'] = store.keep(str(p), facts)
+        stats['files'] = len(kept)
+    if export is not None:
+        # the export only covers .cs files; C# regex scanning is skipped entirely
+        print(f'AST export: {len(all_files)} files read from {export.summary}'
+              + (f' ({export.missing} listed entries missing)' if export.missing else ''))
+        all_files.sort()
+        ext_counter = count_extensions(all_files)
+        source_files = sorted(p for p in all_files if p.suffix.lower() in exts)
+        di_files = sorted(p for p in all_files if p.suffix.lower() == '.cs')
+    if cache is not None:
+        print(f'Fact cache: {cache.hits} reused, {cache.misses} parsed')
+    if identical is not None:
+        print(identical.summary())
+    if cache is not None:
+        if not args.watch:
+            cache.close()
+    if store.spilled:
+        print(f'Memory budget: {store.spilled} of {len(source_files)} files spilled resolution facts to disk')
+
+    with phase('index') as stats:
+        records = [new_record(idx, p, src_root, kept[str(p)], kept[str(p)]['resolution'])
+                   for idx, p in enumerate(source_files, start=1)]
+
+        # declaration indexes for classes and methods
+        class_idx, method_idx = build_decl_indexes(records)
+        # build DI registration map (interface -> implementations)
+        di_map = build_di_registration_map(kept[str(p)] for p in di_files)
+        # --watch re-merges the DI registrations whenever a file's registrations change
+        di_regs = {str(p): kept[str(p)]['di'] for p in di_files if kept[str(p)]['di']} if args.watch else None
+        del kept
+
+        # Build namespace index (used for explicit using->file matches)
+        ns_to_ids = build_namespace_index(records)
+        # per-target filters and filename index, so import detection never scans all records
+        targets = ImportTargets(records)
+        stats['files'] = len(records)
+
+    import_workers = args.workers if args.parallel_imports else 1
+    writer = open_report_writer(args.format, output, autosize_columns=args.autosize)
+    with phase('imports') as stats:
+        if args.watch:
+            # every file's rows are kept so that later updates only re-resolve the affected files
+            live = LiveImportIndex(all_files, src_root, exts, records, di_files, di_regs,
+                                   (class_idx, method_idx, di_map, ns_to_ids, targets),
+                                   store, cache=cache, workers=args.workers, import_workers=import_workers)
+            write_report(writer, ext_counter, records, live.results, metrics=metrics)
+        else:
+            # Heuristic: for each file, find referenced files by the same heuristics as before.
+            # Sequential by default; --parallel-imports resolves chunks in worker processes and reassembles
+            # them in file-id order, which gives the same rows. Rows go to the writer as they are produced.
+            results = resolve_imports(records, class_idx, method_idx, di_map, ns_to_ids, targets, workers=import_workers, store=store)
+            write_report(writer, ext_counter, records, results, metrics=metrics)
+            store.close()
+        stats['files'] = len(records)
+    with phase('save'):
+        written = writer.close()
+    for path in written:
+        print('Wrote', path)
+    if metrics is not None:
+        metrics.write(args.metrics, script='generate_imports_from_source', source_root=str(src_root),
+                      files=len(all_files), source_files=len(source_files), workers=args.workers)
+        print('Wrote metrics to', args.metrics)
+    if args.watch:
+        return watch_imports(live, args, src_root, output, ignore)
     return 0
 
 
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Content-hash grouping of byte-identical source files (generated clients, copied migrations, vendored
+helpers), shared by generate_imports_from_source.py and api_exporter/generate_file_sheets.py.
+
+Both scanners derive a file's facts from its bytes and its extension only, so identical files with
+the same extension have identical facts: IdenticalFiles groups them during discovery and the
+scanners extract each group once and hand the facts to every copy. Only files that share extension
+and size with another file are hashed, so trees without copies cost one stat per file.
+"""
+import hashlib
+import os
+from collections import Counter, defaultdict
+
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class IdenticalFiles:
+    """Blob keys (extension, size, sha1) of the files that have at least one identical copy, and the
+    facts of the copy extracted first until every other copy has been handed them.
+
+    blob(path) is None for files without a copy. Every grouped file goes through shared() (facts of an
+    extracted copy, counted as reused), keep() (after extracting it) or skip() (served some other way,
+    e.g. from a cache); a group's facts are dropped once all its files have. Only the first hand-out
+    of a path counts: generate_file_sheets.py indexes a file once for every project enclosing it.
+    """
+
+    def __init__(self, paths):
+        by_size = defaultdict(list)
+        for p in paths:
+            try:
+                size = os.stat(p).st_size
+            except OSError:
+                continue
+            by_size[(p.suffix, size)].append(p)
+        self.blobs = {}
+        self.hashed_bytes = 0
+        for (suffix, size), same_size in by_size.items():
+            if len(same_size) < 2:
+                continue
+            by_digest = defaultdict(list)
+            for p in same_size:
+                try:
+                    by_digest[_sha1(p)].append(p)
+                except OSError:
+                    continue
+                self.hashed_bytes += size
+            for digest, copies in by_digest.items():
+                if len(copies) > 1:
+                    for p in copies:
+                        self.blobs[str(p)] = (suffix, size, digest)
+        # blob -> files not handed out yet
+        self.pending = Counter(self.blobs.values())
+        self.groups = len(self.pending)
+        self.handed_out = set()
+        self.facts = {}
+        self.reused_files = 0
+        self.reused_bytes = 0
+
+    def blob(self, path):
+        return self.blobs.get(str(path))
+
+    def _hand_out(self, path, blob):
+        """Count path as handed out; False if it already was."""
+        key = str(path)
+        if key in self.handed_out:
+            return False
+        self.handed_out.add(key)
+        self.pending[blob] -= 1
+        if self.pending[blob] <= 0:
+            self.pending[blob] = 0
+            self.facts.pop(blob, None)
+        return True
+
+    def shared(self, path):
+        """The facts kept for an identical copy of path, or None when path has to be extracted."""
+        blob = self.blobs.get(str(path))
+        if blob not in self.facts:
+            return None
+        facts = self.facts[blob]
+        if self._hand_out(path, blob):
+            self.reused_files += 1
+            self.reused_bytes += blob[1]
+        return facts
+
+    def keep(self, path, facts):
+        """Keep the facts extracted from path for its copies that are still to come."""
+        blob = self.blobs.get(str(path))
+        if blob is not None and self._hand_out(path, blob) and self.pending[blob]:
+            self.facts[blob] = facts
+
+    def skip(self, path):
+        blob = self.blobs.get(str(path))
+        if blob is not None:
+            self._hand_out(path, blob)
+
+    def summary(self):
+        if not self.blobs:
+            return 'Identical files: none'
+        return (f'Identical files: {len(self.blobs)} files in {self.groups} groups; '
+                f'{self.reused_files} copies ({self.reused_bytes / (1024 * 1024):.1f} MB) served from '
+                f'an identical file instead of being extracted')
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Phase timing and run metrics shared by generate_imports_from_source.py, api_exporter/generate_file_sheets.py
+and bench_scanners.py.
+
+A PhaseTimer records wall-clock time, CPU time of this process and CPU time of reaped child processes
+(worker pools) per named phase; phases entered more than once accumulate. Each phase can carry a file
+count, from which throughput is derived.
+
+RunMetrics (--metrics) adds bytes read per phase, the slowest files per extraction stage (timed in the
+workers with stage_clock), named counters, peak memory, an optional cProfile dump of one phase and a
+JSON report.
+"""
+import cProfile
+import heapq
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where it cannot be read)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def peak_children_rss_mb():
+    """Largest peak resident set size among reaped child processes in MB (None where unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _children_cpu():
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+def stage_clock(times):
+    """Return lap(stage): adds the seconds since the previous lap (or since this call) to times[stage].
+    With times None, lap does nothing, so extractors can be timed without a separate code path."""
+    if times is None:
+        return lambda stage: None
+    last = [time.perf_counter()]
+
+    def lap(stage):
+        now = time.perf_counter()
+        times[stage] = times.get(stage, 0.0) + now - last[0]
+        last[0] = now
+    return lap
+
+
+class PhaseTimer:
+    """Accumulates {phase: {'wall_s', 'cpu_s', 'child_cpu_s', 'files'}} in the order phases are first
+    entered. The entry is yielded, so a phase can fill in its file count once it is known."""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name, files=None):
+        entry = self.phases.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'child_cpu_s': 0.0, 'files': None})
+        wall, cpu, child_cpu = time.perf_counter(), time.process_time(), _children_cpu()
+        try:
+            yield entry
+        finally:
+            entry['wall_s'] += time.perf_counter() - wall
+            entry['cpu_s'] += time.process_time() - cpu
+            entry['child_cpu_s'] += _children_cpu() - child_cpu
+            if files is not None:
+                entry['files'] = (entry['files'] or 0) + files
+
+    def report(self):
+        """The recorded phases with files_per_s added where a file count is known."""
+        out = {}
+        for name, entry in self.phases.items():
+            row = dict(entry)
+            if row['files'] is not None and row['wall_s'] > 0:
+                row['files_per_s'] = row['files'] / row['wall_s']
+            out[name] = row
+        return out
+
+    def total_wall_s(self):
+        return sum(entry['wall_s'] for entry in self.phases.values())
+
+
+class RunMetrics(PhaseTimer):
+    """PhaseTimer plus what --metrics reports.
+
+    record_file() adds a file's bytes to the innermost active phase and keeps, per extraction stage,
+    the `slowest` files with the largest time. count() tallies named counters (e.g. matches per
+    heuristic). When profile_phase is set, that phase runs under cProfile (in this process only:
+    work done in worker processes is not profiled) and the stats are dumped to profile_path.
+    """
+
+    def __init__(self, slowest=10, profile_phase=None, profile_path=None):
+        super().__init__()
+        self.slowest = slowest
+        self.stage_heaps = {}
+        self.counters = {}
+        self.profile_phase = profile_phase
+        self.profile_path = profile_path
+        self._profiler = None
+        self._active = []
+
+    @contextmanager
+    def phase(self, name, files=None):
+        profile = name == self.profile_phase
+        if profile and self._profiler is None:
+            self._profiler = cProfile.Profile()
+        with super().phase(name, files) as entry:
+            entry.setdefault('bytes_read', 0)
+            self._active.append(entry)
+            if profile:
+                self._profiler.enable()
+            try:
+                yield entry
+            finally:
+                if profile:
+                    self._profiler.disable()
+                self._active.pop()
+
+    def record_file(self, path, stage_times=None, nbytes=0):
+        if self._active:
+            self._active[-1]['bytes_read'] += nbytes
+        for stage, seconds in (stage_times or {}).items():
+            heap = self.stage_heaps.setdefault(stage, [])
+            item = (seconds, str(path))
+            if len(heap) < self.slowest:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def count(self, group, key, n=1):
+        self.counters.setdefault(group, Counter())[key] += n
+
+    def report(self):
+        out = super().report()
+        for row in out.values():
+            if row.get('bytes_read') and row['wall_s'] > 0:
+                row['mb_per_s'] = row['bytes_read'] / (1024 * 1024) / row['wall_s']
+        return out
+
+    def write(self, path, **extra):
+        """Write the JSON report (extra keys are added at the top level); dumps the profile if any."""
+        phases = self.report()
+        data = dict(extra)
+        data.update({
+            'total_wall_s': self.total_wall_s(),
+            'total_cpu_s': sum(p['cpu_s'] + p['child_cpu_s'] for p in phases.values()),
+            'bytes_read': sum(p.get('bytes_read', 0) for p in phases.values()),
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_child_rss_mb': peak_children_rss_mb(),
+            'phases': phases,
+            'slowest_files': {stage: [{'path': p, 'seconds': s} for s, p in sorted(heap, reverse=True)]
+                              for stage, heap in self.stage_heaps.items()},
+            'counters': {group: dict(sorted(c.items(), key=lambda kv: (-kv[1], kv[0])))
+                         for group, c in self.counters.items()},
+        })
+        if self._profiler is not None and self.profile_path:
+            self._profiler.dump_stats(self.profile_path)
+            data['profile'] = {'phase': self.profile_phase, 'path': str(self.profile_path)}
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, indent=2)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Source-tree watcher used by the --watch modes of generate_imports_from_source.py and
+api_exporter/generate_file_sheets.py, and by the reload of api_exporter/serve_deps.py.
+
+On Linux every directory of the tree is watched with inotify (through ctypes, no extra dependency).
+Elsewhere, or when inotify cannot be used (no inotify in libc, fs.inotify.max_user_watches reached,
+--poll), the tree is polled instead by comparing (mtime, size) snapshots every `interval` seconds.
+
+wait() blocks until something changed and the tree then stayed quiet for `settle` seconds, so a
+checkout or merge that touches many files is reported as one batch.
+changes() returns what changed so far without blocking (api_exporter/serve_deps.py reloads with it).
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+# inotify event bits (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+# struct inotify_event header: wd, mask, cookie, len (followed by len bytes of NUL-padded name)
+_EVENT = struct.Struct('iIII')
+
+
+def iter_dirs(root, skip_dir=None):
+    """Yield root and every directory below it, without following symlinks. Directories for which
+    skip_dir(path) is true are not descended into (same pruning as the scripts' file walks)."""
+    stack = [str(root)]
+    while stack:
+        d = stack.pop()
+        yield d
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False) and not (skip_dir and skip_dir(Path(entry.path))):
+                            stack.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+class _Inotify:
+    """One inotify instance with a watch per directory."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        # AttributeError here means there is no inotify (not Linux)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.fd = fd
+        self.dirs = {}
+
+    def add(self, path):
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK | IN_ONLYDIR)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOSPC, errno.ENOMEM):
+                raise OSError(err, 'inotify watch limit reached (fs.inotify.max_user_watches)')
+            # the directory vanished or is unreadable; its parent still reports it
+            return
+        self.dirs[wd] = path
+
+    def read(self):
+        """Return the (directory, mask, name) of the pending events ([] when there are none)."""
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos + _EVENT.size <= len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, pos)
+                name = buf[pos + _EVENT.size:pos + _EVENT.size + length].split(b'\0', 1)[0]
+                pos += _EVENT.size + length
+                events.append((self.dirs.get(wd), mask, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SourceWatcher:
+    """Reports changed paths below root.
+
+    wait() returns the set of paths (str) that were created, modified, deleted or moved: files, and
+    directories for directory-level events. It returns None when events were lost (inotify queue
+    overflow) and every file must be considered changed. Callers re-list the tree after each batch to
+    pick up added and removed files; the returned paths tell which existing files were modified.
+    """
+
+    def __init__(self, root, skip_dir=None, interval=1.0, settle=0.5, poll=False):
+        self.root = str(root)
+        self.skip_dir = skip_dir
+        self.interval = interval
+        self.settle = settle
+        self.mode = 'poll'
+        self.fallback_reason = 'polling requested' if poll else None
+        self._inotify = None
+        if not poll:
+            try:
+                self._inotify = _Inotify()
+                for d in iter_dirs(self.root, skip_dir):
+                    self._inotify.add(d)
+                self.mode = 'inotify'
+            except (OSError, AttributeError) as exc:
+                if self._inotify is not None:
+                    self._inotify.close()
+                    self._inotify = None
+                self.fallback_reason = str(exc) or type(exc).__name__
+        if self._inotify is None:
+            self._snapshot = self._stat_tree()
+
+    def _stat_tree(self):
+        snapshot = {}
+        for d in iter_dirs(self.root, self.skip_dir):
+            try:
+                with os.scandir(d) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_file():
+                                st = entry.stat()
+                                snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return snapshot
+
+    def _poll(self, timeout):
+        time.sleep(timeout)
+        snapshot = self._stat_tree()
+        old = self._snapshot
+        self._snapshot = snapshot
+        return {p for p in old.keys() | snapshot.keys() if old.get(p) != snapshot.get(p)}
+
+    def _drain(self, timeout):
+        ready, _, _ = select.select([self._inotify.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        for d, mask, name in self._inotify.read():
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if d is None:
+                continue
+            path = os.path.join(d, name) if name else d
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if self.skip_dir and self.skip_dir(Path(path)):
+                    continue
+                # new subtree: watch it, and report whatever was written into it before the watch existed
+                for sub in iter_dirs(path, self.skip_dir):
+                    self._inotify.add(sub)
+                    changed.add(sub)
+        return changed
+
+    def wait(self):
+        """Block until something changed and the tree was then quiet for `settle` seconds."""
+        collect = self._drain if self._inotify is not None else self._poll
+        changed = set()
+        while True:
+            got = collect(self.settle if changed else self.interval)
+            if got is None:
+                # lost events: drain whatever else is queued, then report "everything"
+                while collect(self.settle) != set():
+                    pass
+                return None
+            if got:
+                changed |= got
+            elif changed:
+                return changed
+
+    def changes(self):
+        """Paths changed since the previous call (or since the watcher was created), without waiting for
+        the tree to settle; None when events were lost. For callers that pick up changes on demand."""
+        if self._inotify is None:
+            return self._poll(0)
+        changed = set()
+        while True:
+            got = self._drain(0)
+            if got is None:
+                while self._drain(0) != set():
+                    pass
+                return None
+            if not got:
+                return changed
+            changed |= got
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
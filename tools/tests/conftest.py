@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# the scanners are scripts, not a package: make tools/ and tools/api_exporter/ importable
+TOOLS = Path(__file__).resolve().parent.parent
+for d in (TOOLS, TOOLS / 'api_exporter'):
+    if str(d) not in sys.path:
+        sys.path.insert(0, str(d))
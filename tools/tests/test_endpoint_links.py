@@ -0,0 +1,20 @@
+from endpoint_links import extract_cs_routes, extract_ts_http_calls
+
+
+def test_ts_call_after_a_url_literal_on_the_same_line():
+    text = ("const docs = 'https://docs.example.com'; this.http.get('/api/patients');\n"
+            "// this.http.get('/api/old');\n"
+            "/* this.http.post('/api/removed') */\n"
+            "const base = \"http://localhost\"; const url = '/api/items'; this.http.post(url, {});\n")
+    assert extract_ts_http_calls(text) == [('GET', '/api/patients'), ('POST', '/api/items')]
+
+
+def test_cs_route_after_a_url_literal_on_the_same_line():
+    text = ('[Route("api/[controller]")]\n'
+            'public class PatientsController : ControllerBase {\n'
+            '    const string Docs = "https://docs.example.com"; [HttpGet("{id}")] public IActionResult Get(int id) => Ok();\n'
+            '    // [HttpPost("old")] public IActionResult Old() => Ok();\n'
+            '    string dir = @"c:\\data\\"; [HttpPost("add")] public IActionResult Add() => Ok();\n'
+            '}\n')
+    assert extract_cs_routes(text) == [('GET', 'api/Patients/{id}', 'PatientsController', 'Get'),
+                                       ('POST', 'api/Patients/add', 'PatientsController', 'Add')]
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+gfs = pytest.importorskip('generate_file_sheets', exc_type=ImportError)
+
+
+def test_import_cycle_does_not_make_a_file_its_own_dependency(tmp_path):
+    (tmp_path / 'package.json').write_text('{}')
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'a.ts').write_text("import { B } from './b';\nexport class A {}\n")
+    (src / 'b.ts').write_text("import { A } from './a';\nexport class B {}\n")
+    (src / 'index.ts').write_text("export * from './a';\nexport * from './b';\n")
+    rows = {row['file']: row for row in gfs.process_project(tmp_path.resolve(), max_levels=3)}
+    a = rows['src/a.ts']
+    assert 'src/b.ts' in a['levels'][1]
+    for level in a['levels'][1:]:
+        assert 'src/a.ts' not in level
+
+
+def test_plain_relative_cycle_leaves_a_file_out_of_its_own_levels(tmp_path):
+    # baseline behaviour listed a.ts as its own Level 2 dependency here
+    (tmp_path / 'package.json').write_text('{}')
+    (tmp_path / 'a.ts').write_text("import { B } from './b';\nexport class A {}\n")
+    (tmp_path / 'b.ts').write_text("import { A } from './a';\nexport class B {}\n")
+    rows = {row['file']: row for row in gfs.process_project(tmp_path.resolve(), max_levels=3)}
+    assert rows['a.ts']['levels'][1] == {'b.ts'}
+    assert rows['a.ts']['levels'][2] == set()
+    assert rows['b.ts']['levels'][2] == set()
+
+
+def test_using_cycle_leaves_a_file_out_of_its_own_levels(tmp_path):
+    (tmp_path / 'App.csproj').write_text('<Project />')
+    (tmp_path / 'A.cs').write_text('using App.B;\nnamespace App.A { class A { } }\n')
+    (tmp_path / 'B.cs').write_text('using App.A;\nnamespace App.B { class B { } }\n')
+    rows = {row['file']: row for row in gfs.process_project(tmp_path.resolve(), max_levels=3)}
+    assert rows['A.cs']['levels'][1] == {'B.cs'}
+    assert all('A.cs' not in level for level in rows['A.cs']['levels'][1:])
+
+
+def test_method_bodies_are_found_after_modifiers_and_generic_types():
+    text = ('public class C {\n'
+            '    public async Task<List<int>> Load(int id) { Fetch(id); }\n'
+            '    private static Dictionary<string, int[]> Map() { var s = "{"; return null; }\n'
+            '    void Plain () { Other(); }\n'
+            '    int x = obj.Call(1);\n'
+            '}\n')
+    bodies = gfs.extract_cs_method_bodies(text)
+    assert sorted(bodies) == ['Load', 'Map', 'Plain']
+    assert bodies['Load'].strip() == 'Fetch(id);'
+    assert bodies['Plain'].strip() == 'Other();'
+
+
+@pytest.mark.parametrize('make', [
+    # a big enum: one long identifier/comma run ending in a method declaration
+    lambda n: 'public enum Big { ' + ', '.join(f'M{i}' for i in range(n)) + ' }\npublic void F() { }\n',
+    # an initializer of identifier pairs that never reaches a '('
+    lambda n: 'var x = new { ' + ' '.join(f'a{i} b{i}' for i in range(n)) + ' };\n',
+], ids=['enum', 'initializer'])
+def test_method_extraction_stays_linear_on_long_declaration_runs(make):
+    # the former backtracking regex took about 39 s for 4000 enum members; this scan takes milliseconds
+    start = time.perf_counter()
+    gfs.extract_cs_method_bodies(make(16000))
+    assert time.perf_counter() - start < 2.0
@@ -0,0 +1,68 @@
+import pytest
+
+from identical_files import IdenticalFiles
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def test_copies_share_the_first_copys_facts(tmp_path):
+    a = write(tmp_path / 'a' / 'x.ts', 'export class X {}\n')
+    b = write(tmp_path / 'b' / 'x.ts', 'export class X {}\n')
+    c = write(tmp_path / 'c' / 'y.ts', 'export class Y {}\n')
+    d = write(tmp_path / 'd' / 'x.js', 'export class X {}\n')
+    identical = IdenticalFiles([a, b, c, d])
+    # same bytes, different extension: not grouped
+    assert identical.blob(c) is None and identical.blob(d) is None
+    assert identical.groups == 1
+    assert identical.shared(a) is None
+    identical.keep(a, 'facts')
+    assert identical.shared(b) == 'facts'
+    assert identical.reused_files == 1
+    assert identical.facts == {} and identical.pending[identical.blob(a)] == 0
+
+
+def test_repeat_hand_out_of_a_path_counts_once(tmp_path):
+    a = write(tmp_path / 'a.ts', 'export class X {}\n')
+    b = write(tmp_path / 'b.ts', 'export class X {}\n')
+    c = write(tmp_path / 'c.ts', 'export class X {}\n')
+    identical = IdenticalFiles([a, b, c])
+    identical.keep(a, 'facts')
+    # b is indexed for two enclosing projects
+    assert identical.shared(b) == 'facts'
+    assert identical.shared(b) == 'facts'
+    identical.keep(a, 'again')
+    assert identical.reused_files == 1
+    assert identical.pending[identical.blob(a)] == 1
+    assert identical.shared(c) == 'facts'
+    assert identical.reused_files == 2
+    assert identical.facts == {} and identical.pending[identical.blob(a)] == 0
+
+
+def test_nested_projects_in_generate_file_sheets(tmp_path):
+    pytest.importorskip('openpyxl')
+    import generate_file_sheets as gfs
+
+    ui = tmp_path / 'ui'
+    write(ui / 'package.json', '{}')
+    write(ui / 'src' / 'lib' / 'inner' / 'package.json', '{}')
+    write(ui / 'src' / 'lib' / 'inner' / 'src' / 'helper.ts', 'export class Helper {}\n')
+    write(ui / 'src' / 'helper_copy.ts', 'export class Helper {}\n')
+    write(ui / 'src' / 'app.ts', "import { Helper } from './lib/inner/src/helper';\nexport class App {}\n")
+    scan = gfs.scan_workspace(tmp_path)
+    projects = gfs.find_projects(tmp_path, scan)
+    assert len(projects) == 2
+    identical = IdenticalFiles([p for files in scan['files'].values() for p in files])
+
+    def rows(identical):
+        return [gfs.process_project(proj, files=gfs.list_source_files(proj, scan), identical=identical)
+                for proj in projects]
+
+    assert rows(identical) == rows(None)
+    # helper.ts is indexed for both projects but is one copy of helper_copy.ts
+    assert identical.reused_files == 1
+    assert identical.facts == {}
+    assert all(n == 0 for n in identical.pending.values())
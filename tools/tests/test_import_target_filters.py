@@ -0,0 +1,49 @@
+import csv
+
+import pytest
+
+import generate_imports_from_source as gis
+
+
+SOURCES = {
+    'App/App.csproj': '<Project Sdk="Microsoft.NET.Sdk"></Project>\n',
+    'App/Web/Startup.cs': 'namespace App.Web;\n\npublic class Startup\n{\n    public void Configure() { }\n}\n',
+    'App/Web/HomeController.cs': (
+        'using App.Web;\nusing App.Services;\n\nnamespace App.Web;\n\n'
+        'public class HomeController\n{\n    public void Index(OrderService orders)\n    {\n'
+        '        var widget = new Widget();\n    }\n}\n'
+    ),
+    'App/Services/OrderService.cs': 'namespace App.Services;\n\npublic class OrderService\n{\n    public void Place() { }\n}\n',
+    # no declaration the index can match: Widget is only found by its file name
+    'App/Services/Widget.cs': '// generated\n',
+}
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / 'src'
+    for rel, text in SOURCES.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return root
+
+
+def imports(root, out, *extra):
+    assert gis.main(['--source-root', str(root), '--output', str(out / 'report.csv'), '--format', 'csv',
+                     '--no-cache', *extra]) == 0
+    with open(out / 'report_Imports.csv', newline='') as fh:
+        return {(r['RelPath'], r['ImportedRelPath'], r['MatchedBy']) for r in csv.DictReader(fh) if r['ImportedRelPath']}
+
+
+def test_using_ignored_targets_and_filename_fallback(workspace, tmp_path):
+    rows = imports(workspace, tmp_path / 'default')
+    assert rows == {
+        ('App/Web/HomeController.cs', 'App/Services/OrderService.cs', 'param'),
+        ('App/Web/HomeController.cs', 'App/Services/Widget.cs', 'filename'),
+    }
+
+
+def test_exclude_filename_pattern(workspace, tmp_path):
+    rows = imports(workspace, tmp_path / 'excluded', '--exclude-filename-pattern', 'OrderService')
+    assert rows == {('App/Web/HomeController.cs', 'App/Services/Widget.cs', 'filename')}
@@ -0,0 +1,32 @@
+import multiprocessing
+
+import pytest
+
+import generate_imports_from_source as gis
+from bench_scanners import generate_workspace
+
+
+@pytest.fixture(scope='module')
+def workspace(tmp_path_factory):
+    root = tmp_path_factory.mktemp('workspace')
+    generate_workspace(root, 600, seed=3)
+    return root
+
+
+def run(root, out, *extra):
+    assert gis.main(['--source-root', str(root), '--output', str(out / 'report.csv'), '--format', 'csv',
+                     '--no-cache', '--workers', '3', *extra]) == 0
+    return {name: (out / f'report_{name}.csv').read_bytes() for name in ('FileTypes', 'Files', 'Imports')}
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_parallel_imports_match_sequential(workspace, tmp_path, monkeypatch, method):
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f'{method} is not available on this platform')
+    sequential = run(workspace, tmp_path / 'sequential')
+    monkeypatch.setattr(gis, 'IMPORT_START_METHOD', method)
+    parallel = run(workspace, tmp_path / 'parallel', '--parallel-imports')
+    # more records than one chunk, so the pool really splits the work
+    assert parallel['Files'].count(b'\n') - 1 > 256
+    assert parallel['Imports'].count(b'\n') > 1
+    assert parallel == sequential
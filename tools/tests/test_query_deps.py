@@ -0,0 +1,41 @@
+import sqlite3
+
+import query_deps
+
+
+def make_index(path, files):
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE files (file_id INTEGER PRIMARY KEY, file TEXT, file_key TEXT, file_name TEXT, project_root TEXT, sheet TEXT, declared TEXT);
+        CREATE TABLE file_deps (file_id INTEGER, level INTEGER, dep TEXT);
+        CREATE TABLE method_calls (file_id INTEGER, method TEXT, level INTEGER, target TEXT);
+    """)
+    conn.execute("INSERT INTO meta VALUES ('levels', '1')")
+    for fid, (project_root, file) in enumerate(files, start=1):
+        conn.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (fid, file, file, file.rsplit("/", 1)[-1].lower(), project_root, f"sheet{fid}", ""))
+        conn.execute("INSERT INTO file_deps VALUES (?, 1, ?)", (fid, f"dep{fid}"))
+        conn.execute("INSERT INTO method_calls VALUES (?, 'Register', 1, ?)", (fid, f"target{fid}"))
+    conn.commit()
+    conn.close()
+    return query_deps.open_index(path)
+
+
+def test_same_relative_path_in_two_projects(tmp_path):
+    conn, levels = make_index(tmp_path / "i.sqlite", [("/ws/Backend/Module0", "DependencyInjection.cs"),
+                                                      ("/ws/Backend/Module1", "DependencyInjection.cs")])
+    result = query_deps.query_file(conn, levels, "DependencyInjection.cs")
+    assert sorted(result) == ["/ws/Backend/Module0/DependencyInjection.cs", "/ws/Backend/Module1/DependencyInjection.cs"]
+    assert result["/ws/Backend/Module1/DependencyInjection.cs"]["levels"] == {"Level 1": ["dep2"]}
+    assert list(query_deps.query_file(conn, levels, "Module1/DependencyInjection.cs")) == [
+        "/ws/Backend/Module1/DependencyInjection.cs"]
+    assert len(query_deps.query_method(conn, levels, "Register")) == 2
+
+
+def test_path_suffix_matches_whole_segments(tmp_path):
+    conn, levels = make_index(tmp_path / "i.sqlite", [("/ws/Api", "Controllers/Foo.cs")])
+    assert query_deps.find_files(conn, "ers/Foo.cs") == []
+    assert [r[1] for r in query_deps.find_files(conn, "Controllers/Foo.cs")] == ["/ws/Api/Controllers/Foo.cs"]
+    assert [r[1] for r in query_deps.find_files(conn, "Api/Controllers/Foo.cs")] == ["/ws/Api/Controllers/Foo.cs"]
+    assert [r[1] for r in query_deps.find_files(conn, "foo.cs")] == ["/ws/Api/Controllers/Foo.cs"]